@@ -1,34 +1,81 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2026 Xie Youtian
-import mwclient
 import os
 import sys
 import configparser
 import argparse
-import difflib
 import logging
+from typing import Optional, TYPE_CHECKING
 
-from get import get_page_list
-from convert import get_pinyinized_page_list, generate_template
-from send import send_template
+from get import PageInfo, get_page_list, stream_category_members, save_page_list
+from convert import (get_pinyinized_page_list, pinyinize_category_stream, generate_template, generate_split_template,
+                     write_template, transliteration_version, TemplateIndex)
+from pinyin_cache import PinyinCache
+from pinyin_table import PinyinTable
+from send import send_template, send_pages, latest_revisions, template_sha1
+from diff import render_diff, expand_subpages, transcluded_titles, DIFF_FORMATS
+from snapshot import sync_page_list, load_page_list_file
+from watch import watch
+from connection import connect, save_session
+from batch import run_batch
+from metrics import Metrics, PROFILERS
 
-def init_site():
-    """初始化并登录到WikiFur站点"""
+if TYPE_CHECKING:
+    import mwclient
+
+STAGES = ("connect", "fetch", "pinyin", "template", "diff", "send")
+
+def init_site(response_hook=None, session_path=None):
+    """初始化并登录到WikiFur站点，指定session_path时优先复用缓存的登录会话"""
     config = configparser.ConfigParser()
     config.read("config.ini", encoding="utf-8")
     
-    site = mwclient.Site(config["Location"]["domain"])
-    site.login(username=config["Credential"]["username"], password=config["Credential"]["password"])
-    return site
+    return connect(config["Location"], config["Credential"], response_hook=response_hook,
+                   session_path=session_path)
+
+def positive_int(value: str) -> int:
+    """argparse的type：正整数"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"必须为正整数: {value}")
+    return number
 
 def main(argv: list[str]) -> int:
     parser = argparse.ArgumentParser(description="生成并可选地推送人物模板到WikiFur")
     parser.add_argument("--send", action="store_true", help="推送模板到WikiFur（默认为仅输出到stdout）")
     parser.add_argument("--dry-run", action="store_true", help="显示与当前页面内容的差异但不推送")
+    parser.add_argument("--diff-format", choices=DIFF_FORMATS, default="entries",
+                        help="--dry-run的差异格式：entries按人物列出增删、换组与逝世标记变化，json为其机器可读形式，unified为逐行差异（默认为entries）")
     parser.add_argument("-v", "--verbose", action="store_true", help="显示详细日志")
     parser.add_argument("-q", "--quiet", action="store_true", help="只显示错误日志")
     parser.add_argument("--page", default="模板:人物", help="目标页面标题（默认为'模板:人物'）")
     parser.add_argument("--summary", help="编辑摘要（默认为自动生成）")
+    parser.add_argument("-o", "--output", metavar="FILE", help="默认模式下把模板写入文件而不是stdout")
+    parser.add_argument("--batch", metavar="FILE", help="批量模式：按配置文件中的多个 [Location:...]/[Target:...] 配置节处理多个站点和页面")
+    parser.add_argument("--batch-workers", type=int, default=4, help="批量模式下同时处理的目标数上限（默认为4）")
+    parser.add_argument("--max-group-size", type=positive_int, default=40, help="模板中每个字母分组的最大人数（默认为40）")
+    parser.add_argument("--target-groups", type=positive_int, help="模板的目标分组数（默认为满足最大人数所需的最少组数）")
+    parser.add_argument("--split-subpages", action="store_true", help="把每个首字母的条目放在单独的子页面（如'模板:人物/A'）中，由父模板嵌入，只编辑内容变化的子页面")
+    parser.add_argument("--subpage-workers", type=int, default=4, help="拆分模式下同时推送的子页面数上限（默认为4）")
+    parser.add_argument("--from-snapshot", metavar="FILE", help="从 --save-snapshot 保存的页面列表（或 --snapshot-path 的增量同步快照）读取人物，无需联网和登录（--send/--dry-run 仍会连接站点）")
+    parser.add_argument("--save-snapshot", metavar="FILE", help="把获取到的人物页面列表保存到文件，供之后使用 --from-snapshot 离线生成模板")
+    parser.add_argument("--incremental", action="store_true", help="使用本地快照增量同步分类成员（只请求上次运行以来的变更）")
+    parser.add_argument("--snapshot-path", default="persons_snapshot.json", help="增量同步使用的快照文件路径（默认为'persons_snapshot.json'）")
+    parser.add_argument("--fetch-workers", type=int, default=2, help="并行获取分类成员的线程数，1表示依次获取（默认为2）")
+    parser.add_argument("--pinyin-cache", metavar="PATH", help="持久化拼音缓存（SQLite）文件路径，未指定时不使用缓存")
+    parser.add_argument("--pinyin-workers", type=int, default=1, help="拼音转换使用的进程数，0表示使用全部CPU核心，1表示串行转换（默认为1）")
+    parser.add_argument("--pinyin-chunk-size", type=int, default=2000, help="并行拼音转换时每批的标题数（默认为2000）")
+    parser.add_argument("--pinyin-table", metavar="PATH", help="使用 pinyin_table.py 生成的拼音查找表代替pypinyin（结果相同，启动更快、内存更少）")
+    parser.add_argument("--session-cache", metavar="PATH", help="登录会话缓存文件路径：会话仍有效时复用其Cookie与CSRF令牌而不重新登录，未指定时每次运行都重新登录")
+    parser.add_argument("--full-resync", action="store_true", help="与 --incremental 一起使用，忽略现有快照并完整重新同步")
+    parser.add_argument("--watch", action="store_true", help="守护模式：保持登录并轮询最近更改，只在人物分类成员变化时重新生成（使用 --snapshot-path 的快照）")
+    parser.add_argument("--watch-interval", type=float, default=60, help="守护模式轮询最近更改的间隔秒数（默认为60）")
+    parser.add_argument("--watch-debounce", type=float, default=30, help="守护模式下最后一次变化后等待平静的秒数（默认为30）")
+    parser.add_argument("--metrics", action="store_true", help="运行结束后在stderr输出各阶段的耗时、API请求与计数表格")
+    parser.add_argument("--metrics-json", metavar="FILE", help="把各阶段指标保存为JSON文件")
+    parser.add_argument("--profile", choices=STAGES, metavar="STAGE", help=f"对指定阶段启用分析器（{'/'.join(STAGES)}）")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile", help="--profile使用的分析器（默认为cprofile）")
+    parser.add_argument("--profile-output", metavar="FILE", help="保存分析结果（cProfile为pstats格式，pyinstrument为HTML）")
     
     # 检查是否需要显示帮助
     if "--help" in argv or "-h" in argv:
@@ -36,6 +83,16 @@ def main(argv: list[str]) -> int:
         return 0
     
     args = parser.parse_args(argv[1:])
+    if args.from_snapshot and (args.incremental or args.watch):
+        parser.error("--from-snapshot 不能与 --incremental 或 --watch 同时使用")
+    if args.batch:
+        # 批量模式的各目标共用一次获取，不支持快照、增量同步和分阶段指标
+        unsupported = [option for option, value in (
+            ("--incremental", args.incremental), ("--watch", args.watch), ("--from-snapshot", args.from_snapshot),
+            ("--save-snapshot", args.save_snapshot), ("--metrics", args.metrics),
+            ("--metrics-json", args.metrics_json), ("--profile", args.profile)) if value]
+        if unsupported:
+            parser.error(f"--batch 不能与 {', '.join(unsupported)} 同时使用")
     
     # 配置日志
     if args.verbose:
@@ -49,27 +106,227 @@ def main(argv: list[str]) -> int:
         format='%(levelname)s: %(message)s'
     )
     
-    logging.info("【第1步】正在初始化与WikiFur站点的连接...")
-    # 初始化站点连接
+    # 查找表在整个运行期间（包括守护模式与批量模式）只打开一次
     try:
-        site = init_site()
-        logging.info("【第1步】站点连接初始化完成")
-    except Exception as e:
-        logging.error(f"无法连接到WikiFur: {e}")
-        logging.error("请检查config.ini文件中的凭证和网络连接。")
+        table = PinyinTable(args.pinyin_table) if args.pinyin_table else None
+    except (OSError, ValueError) as e:
+        logging.error(f"无法打开拼音查找表 '{args.pinyin_table}': {e}")
         return 1
-    
+
+    if args.batch:
+        try:
+            return run_batch(args.batch, send=args.send, dry_run=args.dry_run and not args.send,
+                             diff_format=args.diff_format, workers=args.batch_workers,
+                             fetch_workers=args.fetch_workers, session_path=args.session_cache,
+                             split_subpages=args.split_subpages, subpage_workers=args.subpage_workers,
+                             pinyin_cache_path=args.pinyin_cache, table=table)
+        finally:
+            if table is not None:
+                table.close()
+
+    metrics = Metrics(profile_stage=args.profile, profiler=args.profiler, profile_output=args.profile_output)
+    try:
+        return run(args, metrics, table)
+    finally:
+        if table is not None:
+            table.close()
+        if args.metrics:
+            metrics.print_table()
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+
+def open_pinyin_cache(args: argparse.Namespace, table: Optional[PinyinTable]) -> Optional[PinyinCache]:
+    """按--pinyin-cache打开持久化拼音缓存，未指定时返回None"""
+    if not args.pinyin_cache:
+        return None
+    return PinyinCache(args.pinyin_cache, transliteration_version(table))
+
+def template_index_path(args: argparse.Namespace) -> str:
+    """模板索引文件的路径：与--snapshot-path的快照放在一起，例如'persons_snapshot.index.json'"""
+    return os.path.splitext(args.snapshot_path)[0] + ".index.json"
+
+def open_template_index(args: argparse.Namespace, table: Optional[PinyinTable]) -> TemplateIndex:
+    """读取上次保存的模板索引，不存在或不可用时返回空索引"""
+    index = TemplateIndex.load(template_index_path(args), transliteration_version(table),
+                               max_group_size=args.max_group_size, target_groups=args.target_groups)
+    return index or TemplateIndex(max_group_size=args.max_group_size, target_groups=args.target_groups)
+
+def publish_with_index(args: argparse.Namespace, site: Optional["mwclient.Site"], page_list_tagged: list[PageInfo],
+                       metrics: Metrics, table: Optional[PinyinTable], index: TemplateIndex) -> int:
+    """用模板索引执行publish，之后把索引保存到磁盘供下次运行使用"""
+    try:
+        return publish(args, site, page_list_tagged, metrics, table, index)
+    finally:
+        try:
+            index.save(template_index_path(args), transliteration_version(table))
+        except OSError as e:
+            logging.warning(f"无法保存模板索引 '{template_index_path(args)}': {e}")
+
+def run(args: argparse.Namespace, metrics: Metrics, table: Optional[PinyinTable] = None) -> int:
+    # 从页面列表文件离线生成模板时，只有推送或比较差异才需要连接站点
+    site = None
+    if not args.from_snapshot or args.send or args.dry_run:
+        logging.info("【第1步】正在初始化与WikiFur站点的连接...")
+        # 初始化站点连接
+        try:
+            with metrics.stage("connect"):
+                site = init_site(response_hook=metrics.on_response, session_path=args.session_cache)
+            logging.info("【第1步】站点连接初始化完成")
+        except Exception as e:
+            logging.error(f"无法连接到WikiFur: {e}")
+            logging.error("请检查config.ini文件中的凭证和网络连接。")
+            return 1
+
+    try:
+        return fetch_and_publish(args, site, metrics, table)
+    finally:
+        # 运行期间获取的CSRF令牌和服务器更新的Cookie一并保存，下次运行可以直接编辑
+        if site is not None and args.session_cache:
+            save_session(args.session_cache, site)
+
+def fetch_and_publish(args: argparse.Namespace, site: Optional["mwclient.Site"], metrics: Metrics,
+                      table: Optional[PinyinTable] = None) -> int:
+    """第2步起：获取人物页面列表（或进入守护模式），然后转换、生成并按参数输出或推送"""
+    if args.watch:
+        # 索引在多次推送之间保留（也保存到磁盘），每次只处理发生变化的页面和分组行
+        index = open_template_index(args, table)
+        try:
+            return watch(site, args.snapshot_path,
+                         lambda page_list: publish_with_index(args, site, page_list, metrics, table, index) == 0,
+                         interval=args.watch_interval, debounce=args.watch_debounce,
+                         full_resync=args.full_resync, max_workers=args.fetch_workers)
+        except KeyboardInterrupt:
+            logging.info("【守护】收到中断信号，已停止")
+            return 0
+
     logging.info("【第2步】开始获取人物页面列表...")
-    page_list_tagged = get_page_list(site)
+    # 在线完整获取且串行转换时，边下载边转换拼音，第3步与第2步重叠进行；
+    # 指定多个转换进程时仍先获取完整列表，再整批交给进程池
+    streaming = not args.from_snapshot and not args.incremental and args.pinyin_workers == 1
+    if streaming and args.profile == "pinyin":
+        # 分析器无法只分析穿插在下载之间的转换
+        logging.info("  已指定 --profile pinyin，将先获取完整的页面列表再转换拼音（不边下载边转换）")
+        streaming = False
+    with metrics.stage("fetch"):
+        if args.from_snapshot:
+            try:
+                page_list_tagged = load_page_list_file(args.from_snapshot)
+            except (OSError, ValueError) as e:
+                logging.error(f"无法读取页面列表文件 '{args.from_snapshot}': {e}")
+                return 1
+        elif args.incremental:
+            page_list_tagged = sync_page_list(site, args.snapshot_path, full_resync=args.full_resync,
+                                              max_workers=args.fetch_workers)
+        elif streaming:
+            cache = open_pinyin_cache(args, table)
+            try:
+                # 每一批的转换耗时单独计入pinyin阶段（同时也包含在fetch阶段的墙钟时间中），
+                # 期间后台线程发出的请求仍计入fetch阶段
+                page_list_tagged = pinyinize_category_stream(
+                    stream_category_members(site, max_workers=args.fetch_workers), cache=cache, table=table,
+                    timer=lambda: metrics.stage("pinyin", attribute_requests=False))
+            finally:
+                if cache is not None:
+                    cache.close()
+            metrics.count("pinyin", "conversions", cache.misses if cache is not None else len(page_list_tagged))
+            if cache is not None:
+                metrics.count("pinyin", "cache_hits", cache.hits)
+        else:
+            page_list_tagged = get_page_list(site, max_workers=args.fetch_workers)
+        if args.save_snapshot:
+            save_page_list(args.save_snapshot, page_list_tagged)
+            logging.info(f"  页面列表已保存到 {args.save_snapshot}")
+    metrics.count("fetch", "pages", len(page_list_tagged))
     logging.info(f"【第2步】已获取 {len(page_list_tagged)} 个人物页面信息")
-    
+    if args.incremental:
+        # 增量同步时沿用上次保存的模板索引，只转换新标题、只重新生成发生变化的分组行
+        return publish_with_index(args, site, page_list_tagged, metrics, table, open_template_index(args, table))
+    return publish(args, site, page_list_tagged, metrics, table, pinyinized=streaming)
+
+def publish(args: argparse.Namespace, site: Optional["mwclient.Site"], page_list_tagged: list[PageInfo],
+            metrics: Metrics, table: Optional[PinyinTable] = None, index: Optional[TemplateIndex] = None,
+            pinyinized: bool = False) -> int:
+    """
+    第3步起：拼音转换、生成模板，并按参数输出、比较差异或推送。
+
+    传入index时（守护模式与增量同步），只为新出现的标题计算拼音，并只重新生成发生变化的分组行。
+    pinyinized为True表示页面列表已在获取时转换并排序（见pinyinize_category_stream），跳过第3步。
+    """
+    if pinyinized:
+        return _generate_and_publish(args, site, page_list_tagged, metrics, index)
+
     logging.info("【第3步】开始将页面标题转换为拼音...")
-    page_list_pinyinized = get_pinyinized_page_list(page_list_tagged)
+    pinyin_workers = args.pinyin_workers or os.cpu_count() or 1
+    with metrics.stage("pinyin"):
+        cache = open_pinyin_cache(args, table)
+        try:
+            if index is not None:
+                changed = index.sync(page_list_tagged, cache=cache, workers=pinyin_workers,
+                                     chunk_size=args.pinyin_chunk_size, table=table)
+                metrics.count("pinyin", "index_changes", changed)
+            else:
+                page_list_pinyinized = get_pinyinized_page_list(page_list_tagged, cache=cache, workers=pinyin_workers,
+                                                                chunk_size=args.pinyin_chunk_size, table=table)
+        finally:
+            if cache is not None:
+                cache.close()
+        if cache is not None:
+            metrics.count("pinyin", "conversions", cache.misses)
+            metrics.count("pinyin", "cache_hits", cache.hits)
+        elif index is None:
+            metrics.count("pinyin", "conversions", len(page_list_tagged))
     logging.info("【第3步】页面标题拼音转换完成")
-    
+    return _generate_and_publish(args, site, page_list_tagged if index is not None else page_list_pinyinized,
+                                 metrics, index)
+
+def _generate_and_publish(args: argparse.Namespace, site: Optional["mwclient.Site"],
+                          page_list_pinyinized: list[PageInfo], metrics: Metrics,
+                          index: Optional[TemplateIndex]) -> int:
+    """第4步起：生成模板，并按参数输出、比较差异或推送"""
+    if not args.send and not args.dry_run and index is None and not args.split_subpages:
+        # 默认行为：边生成边输出，不在内存中保存完整的模板文本
+        target = args.output or "控制台"
+        logging.info(f"【第4步】正在生成人物模板并输出到{target}...")
+        with metrics.stage("template"):
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    write_template(page_list_pinyinized, f, max_group_size=args.max_group_size,
+                                   target_groups=args.target_groups)
+            else:
+                write_template(page_list_pinyinized, sys.stdout, max_group_size=args.max_group_size,
+                               target_groups=args.target_groups)
+                sys.stdout.write("\n")
+        logging.info("【第4步】人物模板生成完成")
+        return 0
+
     logging.info("【第4步】正在生成人物模板...")
-    template = generate_template(page_list_pinyinized)
+    subpages: dict[str, str] = {}
+    with metrics.stage("template"):
+        if args.split_subpages and index is not None:
+            template, subpages = index.render_split(args.page)
+        elif args.split_subpages:
+            template, subpages = generate_split_template(page_list_pinyinized, page_title=args.page,
+                                                         max_group_size=args.max_group_size,
+                                                         target_groups=args.target_groups)
+        elif index is not None:
+            template = index.render()
+        else:
+            template = generate_template(page_list_pinyinized, max_group_size=args.max_group_size,
+                                         target_groups=args.target_groups)
     logging.info("【第4步】人物模板生成完成")
+
+    if not args.send and not args.dry_run:
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            if subpages:
+                for title, text in {args.page: template, **subpages}.items():
+                    out.write(f"===== {title} =====\n{text}\n")
+            else:
+                out.write(template if args.output else template + "\n")
+        finally:
+            if args.output:
+                out.close()
+        return 0
     
     # 干运行模式：显示差异但不推送
     if args.dry_run and args.send:
@@ -78,39 +335,47 @@ def main(argv: list[str]) -> int:
     # 干运行模式：显示差异但不推送
     if args.dry_run and not args.send:
         logging.info(f"【第5步】正在获取当前页面内容 '{args.page}'...")
-        try:
-            current_content = site.pages[args.page].text()
-        except Exception as e:
-            logging.error(f"无法获取当前页面内容: {e}")
-            return 1
-        if current_content == template:
-            logging.info("当前页面内容与生成的模板相同，无需更新。")
-        else:
-            logging.info("差异如下（--- 当前页面，+++ 生成模板）:")
-            diff = difflib.unified_diff(
-                current_content.splitlines(keepends=True),
-                template.splitlines(keepends=True),
-                fromfile='当前页面',
-                tofile='生成模板',
-                lineterm=''
-            )
-            sys.stdout.writelines(diff)
+        with metrics.stage("diff"):
+            pages = {args.page: template, **subpages}
+            try:
+                # 先只比较最新修订版本的SHA-1，内容相同时不必下载整个页面
+                revisions = latest_revisions(site, pages)
+                changed = [title for title, text in pages.items()
+                           if revisions[title] is None or revisions[title]["sha1"] != template_sha1(text)]
+                if not changed:
+                    logging.info("当前页面内容与生成的模板相同，无需更新。")
+                    return 0
+                if subpages:
+                    logging.info(f"需要编辑 {len(changed)}/{len(pages)} 个页面: {', '.join(changed)}")
+                current_content = site.pages[args.page].text()
+                if subpages:
+                    # 把当前与生成的父模板都展开为完整模板再比较；内容未变的子页面不必下载
+                    current_subpages = {title: subpages[title] if title in subpages and title not in changed
+                                        else site.pages[title].text()
+                                        for title in transcluded_titles(current_content, args.page)}
+                    current_content = expand_subpages(current_content, current_subpages)
+                    template = expand_subpages(template, subpages)
+            except Exception as e:
+                logging.error(f"无法获取当前页面内容: {e}")
+                return 1
+            logging.info("差异如下:")
+            sys.stdout.writelines(render_diff(current_content, template, args.diff_format))
         return 0
 
-    if args.send:
-        logging.info("【第5步】正在推送模板到WikiFur...")
-        success = send_template(site, template, page_title=args.page, summary=args.summary)
-        if success:
-            logging.info("【第5步】模板推送完成")
-            return 0
+    logging.info("【第5步】正在推送模板到WikiFur...")
+    with metrics.stage("send"):
+        if subpages:
+            # 先推送子页面，父模板嵌入的子页面都已更新后再更新父模板
+            success = (send_pages(site, subpages, summary=args.summary, max_workers=args.subpage_workers)
+                       and send_template(site, template, page_title=args.page, summary=args.summary))
         else:
-            logging.error("模板推送失败")
-            return 1
-    else:
-        # 默认行为：输出到stdout
-        logging.info("【第5步】输出生成的模板到控制台")
-        print(template)
+            success = send_template(site, template, page_title=args.page, summary=args.summary)
+    if success:
+        logging.info("【第5步】模板推送完成")
         return 0
+    else:
+        logging.error("模板推送失败")
+        return 1
 
 if __name__ == "__main__":
     sys.exit(main(sys.argv))
\ No newline at end of file
@@ -0,0 +1,273 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""
+批量模式：在一次运行中为多个站点、多个页面生成并推送人物模板。
+
+批量配置文件示例：
+
+    [Credential]
+    ; 各站点共用的默认凭证
+    username=your_username
+    password=password_here
+
+    [Location:zh]
+    domain=zh.wikifur.com
+
+    [Location:en]
+    domain=en.wikifur.com
+    ; 可以覆盖默认凭证
+    username=another_username
+    password=another_password
+
+    [Target:zh-persons]
+    location=zh
+    page=模板:人物
+    ; 以下均为可选项
+    summary=更新人物模板（自动生成）
+    max_group_size=40
+    target_groups=12
+    output=zh-persons.txt
+    ; 默认沿用命令行的 --split-subpages
+    split_subpages=yes
+
+每个站点（按协议、域名、路径和用户名区分）只登录一次，同一站点的所有目标共用一个
+mwclient.Site及其HTTP keep-alive连接，人物列表和拼音转换也只进行一次。
+各目标在有界的线程池中并发处理，最后输出每个目标是否成功的汇总。
+指定会话缓存时，所有站点的登录会话保存在同一个文件中，之后的运行直接复用。
+拼音缓存与拼音查找表由所有站点共用，各站点的拼音转换依次进行（转换受GIL限制，并发没有收益）。
+"""
+import configparser
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, TypedDict, TYPE_CHECKING
+
+from connection import connect, save_session
+from get import PageInfo, get_page_list
+from convert import (get_pinyinized_page_list, generate_template, generate_split_template, write_template,
+                     transliteration_version)
+from pinyin_cache import PinyinCache
+from send import send_template, send_pages, latest_revision, latest_revisions, template_sha1
+from diff import render_diff, expand_subpages, transcluded_titles
+
+if TYPE_CHECKING:
+    import mwclient
+    from pinyin_table import PinyinTable
+
+class TargetResult(TypedDict):
+    target: str
+    domain: str
+    page: str
+    success: bool
+    message: str
+    seconds: float
+
+class _Pinyinizer:
+    """
+    所有站点共用的拼音转换：可选的拼音缓存与查找表。
+
+    缓存在主线程中打开和关闭（SQLite连接不能跨线程使用），转换期间只访问其内存中的条目，
+    各站点的转换通过锁依次进行。
+    """
+
+    def __init__(self, cache: Optional[PinyinCache] = None, table: Optional["PinyinTable"] = None):
+        self.cache = cache
+        self.table = table
+        self._lock = threading.Lock()
+
+    def __call__(self, page_list: list[PageInfo]) -> list[PageInfo]:
+        with self._lock:
+            return get_pinyinized_page_list(page_list, cache=self.cache, table=self.table)
+
+class _Location:
+    """一个站点的共享状态：登录后的Site以及只需计算一次的人物列表"""
+
+    def __init__(self, section: configparser.SectionProxy, credential: dict[str, str], fetch_workers: int,
+                 session_path: Optional[str] = None, pinyinizer: Optional[_Pinyinizer] = None):
+        self.section = section
+        self.credential = credential
+        self.domain = section["domain"]
+        self.fetch_workers = fetch_workers
+        self.session_path = session_path
+        self.pinyinizer = pinyinizer or _Pinyinizer()
+        self._lock = threading.Lock()
+        self._site: Optional["mwclient.Site"] = None
+        self._pinyinized: Optional[list[PageInfo]] = None
+
+    def site(self) -> "mwclient.Site":
+        with self._lock:
+            if self._site is None:
+                logging.info(f"  正在登录站点 '{self.domain}'...")
+                self._site = connect(self.section, self.credential, session_path=self.session_path)
+            return self._site
+
+    def save_session(self) -> None:
+        """把登录会话（包括处理目标时获取的CSRF令牌）保存到会话缓存"""
+        if self.session_path is not None and self._site is not None:
+            save_session(self.session_path, self._site)
+
+    def pinyinized(self) -> list[PageInfo]:
+        site = self.site()
+        with self._lock:
+            if self._pinyinized is None:
+                page_list = get_page_list(site, max_workers=self.fetch_workers)
+                self._pinyinized = self.pinyinizer(page_list)
+            return self._pinyinized
+
+def load_batch_config(path: str) -> tuple[configparser.ConfigParser, list[tuple[str, configparser.SectionProxy]]]:
+    """读取批量配置，返回(配置, [(目标名, 目标配置节)])"""
+    config = configparser.ConfigParser()
+    if not config.read(path, encoding="utf-8"):
+        raise FileNotFoundError(path)
+    return config, [(name.split(":", 1)[1], config[name]) for name in config.sections() if name.startswith("Target:")]
+
+def _build_locations(config: configparser.ConfigParser, fetch_workers: int, session_path: Optional[str] = None,
+                     pinyinizer: Optional[_Pinyinizer] = None) -> dict[str, _Location]:
+    default_credential = config["Credential"] if config.has_section("Credential") else {}
+    locations: dict[str, _Location] = {}
+    shared: dict[tuple, _Location] = {}
+    for section_name in config.sections():
+        if not section_name.startswith("Location:"):
+            continue
+        section = config[section_name]
+        credential = {
+            "username": section.get("username", default_credential.get("username")),
+            "password": section.get("password", default_credential.get("password")),
+        }
+        # 指向同一站点、使用同一账户的配置节共用一个会话
+        key = (section.get("scheme", "https"), section["domain"], section.get("path", "/w/"), credential["username"])
+        if key not in shared:
+            shared[key] = _Location(section, credential, fetch_workers, session_path, pinyinizer)
+        locations[section_name.split(":", 1)[1]] = shared[key]
+    return locations
+
+def _run_target(name: str, target: configparser.SectionProxy, locations: dict[str, _Location],
+                send: bool, dry_run: bool, diff_format: str, output_lock: threading.Lock,
+                split_subpages: bool = False, subpage_workers: int = 4) -> TargetResult:
+    start = time.perf_counter()
+    page_title = target.get("page", "模板:人物")
+    location_name = target.get("location", "")
+    result: TargetResult = {"target": name, "domain": "", "page": page_title, "success": False,
+                            "message": "", "seconds": 0.0}
+    try:
+        if location_name not in locations:
+            raise KeyError(f"未定义的站点 '{location_name}'")
+        location = locations[location_name]
+        result["domain"] = location.domain
+
+        pinyinized = location.pinyinized()
+        max_group_size = target.getint("max_group_size", 40)
+        target_groups = target.getint("target_groups", None)
+        split = target.getboolean("split_subpages", split_subpages)
+
+        subpages: dict[str, str] = {}
+        if split:
+            template, subpages = generate_split_template(pinyinized, page_title=page_title,
+                                                         max_group_size=max_group_size, target_groups=target_groups)
+        elif send or dry_run:
+            template = generate_template(pinyinized, max_group_size=max_group_size, target_groups=target_groups)
+
+        if send:
+            # 与单页面模式相同，先推送子页面，全部成功后再更新父模板
+            result["success"] = (
+                (not subpages or send_pages(location.site(), subpages, summary=target.get("summary"),
+                                            max_workers=subpage_workers))
+                and send_template(location.site(), template, page_title=page_title, summary=target.get("summary")))
+            result["message"] = "已推送" if result["success"] else "推送失败"
+        elif dry_run:
+            site = location.site()
+            pages = {page_title: template, **subpages}
+            revisions = latest_revisions(site, pages) if subpages else {page_title: latest_revision(site, page_title)}
+            if all(revisions[title] is not None and revisions[title]["sha1"] == template_sha1(text)
+                   for title, text in pages.items()):
+                result["message"] = "无需更新"
+            else:
+                current_content = site.pages[page_title].text()
+                if subpages:
+                    # 把当前与生成的父模板都展开为完整模板再比较
+                    current_content = expand_subpages(current_content, {
+                        title: site.pages[title].text() for title in transcluded_titles(current_content, page_title)})
+                    template = expand_subpages(template, subpages)
+                with output_lock:
+                    sys.stdout.write(f"=== {name}（{location.domain} {page_title}）===\n")
+                    sys.stdout.writelines(render_diff(current_content, template, diff_format))
+                    sys.stdout.write("\n")
+                result["message"] = "有差异"
+            result["success"] = True
+        else:
+            output = target.get("output", f"{name}.txt")
+            with open(output, "w", encoding="utf-8") as f:
+                if subpages:
+                    for title, text in {page_title: template, **subpages}.items():
+                        f.write(f"===== {title} =====\n{text}\n")
+                else:
+                    write_template(pinyinized, f, max_group_size=max_group_size, target_groups=target_groups)
+            result["success"] = True
+            result["message"] = f"已写入 {output}"
+    except Exception as e:
+        logging.error(f"  目标 '{name}' 处理失败: {e}")
+        result["message"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def run_batch(config_path: str, send: bool = False, dry_run: bool = False, diff_format: str = "entries",
+              workers: int = 4, fetch_workers: int = 2, session_path: Optional[str] = None,
+              split_subpages: bool = False, subpage_workers: int = 4, pinyin_cache_path: Optional[str] = None,
+              table: Optional["PinyinTable"] = None) -> int:
+    """
+    按批量配置处理所有目标。
+
+    Args:
+        config_path: 批量配置文件路径
+        send: 推送模板到各目标页面
+        dry_run: 显示各目标与当前页面的差异但不推送
+        diff_format: 差异格式，见diff.DIFF_FORMATS
+        workers: 同时处理的目标数上限
+        fetch_workers: 每个站点并行获取分类成员的线程数
+        session_path: 可选的会话缓存文件路径，见connection.connect
+        split_subpages: 各目标默认是否拆分为首字母子页面（目标的split_subpages可以覆盖）
+        subpage_workers: 拆分模式下每个目标同时推送的子页面数上限
+        pinyin_cache_path: 可选的持久化拼音缓存文件路径，所有站点共用
+        table: 可选的拼音查找表
+
+    Returns:
+        int: 全部成功时为0，否则为1
+    """
+    try:
+        config, targets = load_batch_config(config_path)
+    except (OSError, configparser.Error) as e:
+        logging.error(f"无法读取批量配置 '{config_path}': {e}")
+        return 1
+    if not targets:
+        logging.error(f"批量配置 '{config_path}' 中没有任何 [Target:...] 配置节")
+        return 1
+    cache = PinyinCache(pinyin_cache_path, transliteration_version(table)) if pinyin_cache_path else None
+    locations = _build_locations(config, fetch_workers, session_path, _Pinyinizer(cache, table))
+
+    logging.info(f"【批量】共 {len(targets)} 个目标，{len(set(map(id, locations.values())))} 个站点会话，最多 {workers} 个并发")
+    output_lock = threading.Lock()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(_run_target, name, target, locations, send, dry_run,
+                                       diff_format, output_lock, split_subpages, subpage_workers)
+                       for name, target in targets]
+            results = [future.result() for future in futures]
+    finally:
+        if cache is not None:
+            cache.close()
+    for location in {id(location): location for location in locations.values()}.values():
+        location.save_session()
+
+    logging.info("【批量】处理结果汇总:")
+    for result in results:
+        status = "成功" if result["success"] else "失败"
+        logging.info(f"  [{status}] {result['target']} ({result['domain']} {result['page']}): "
+                     f"{result['message']}，耗时 {result['seconds']:.1f} 秒")
+    failed = sum(1 for result in results if not result["success"])
+    if failed:
+        logging.error(f"【批量】{failed}/{len(results)} 个目标失败")
+        return 1
+    logging.info(f"【批量】全部 {len(results)} 个目标处理成功")
+    return 0
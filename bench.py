@@ -0,0 +1,236 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""
+各处理阶段的基准测试。
+
+用合成的人物语料（汉字、假名、拉丁字母、数字开头、中英混合及用户页面，见fakewiki.synthetic_title）
+分别测量以下阶段：
+    merge     get_page_list中两个分类的合并（merge_category_members）
+    pinyin    get_pinyinized_page_list
+    template  generate_template
+    diff      当前页面与生成模板的逐行差异（--diff-format unified）
+    entries   当前页面与生成模板的条目差异（--diff-format entries/json）
+    records   构造拼音化后的页面记录（get.PageInfo），同时测量等价字典布局的峰值内存作为对比
+
+每个阶段报告吞吐量、峰值内存以及多次运行的延迟分位数，结果保存为JSON，
+可以用--compare与之前某次提交的结果比较。
+
+用法：
+    python bench.py --sizes 1000,10000,100000 --output bench_results.json
+    python bench.py --compare old_results.json
+"""
+import argparse
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import fakewiki
+from get import PageInfo, merge_category_members
+from convert import get_pinyinized_page_list, generate_template, transliteration_version
+from diff import unified_diff, entry_diff
+from pinyin_table import PinyinTable
+
+STAGES = ("merge", "pinyin", "template", "diff", "entries", "records")
+
+def make_corpus(size: int, seed: int = 0) -> tuple[list[PageInfo], list[PageInfo]]:
+    """生成合成语料，返回('人物'分类成员, '逝世的人物'分类成员)"""
+    fixture = fakewiki.synthetic_fixture(size, seed=seed)
+    persons: list[PageInfo] = []
+    deceased: list[PageInfo] = []
+    for page in fixture["pages"]:
+        # 与list_category_members相同的过滤规则
+        if page["ns"] not in (0, 2) or "/" in page["title"]:
+            continue
+        member = PageInfo(page["pageid"], page["title"], page["ns"] == 2)
+        if "人物" in page["categories"]:
+            persons.append(member)
+        if "逝世的人物" in page["categories"]:
+            deceased.append(member)
+    return persons, deceased
+
+def _current_page(page_list: list[PageInfo], seed: int) -> str:
+    """模拟维基上的当前页面：大约1%的人物尚未出现在模板中"""
+    rng = random.Random(seed)
+    previous = [page for page in page_list if rng.random() >= 0.01]
+    return generate_template(get_pinyinized_page_list(previous))
+
+def _build_records(pinyinized: list[PageInfo]) -> list[PageInfo]:
+    records = []
+    for page in pinyinized:
+        record = PageInfo(page.page_id, page.page_title, page.user_page, page.deceased)
+        record.pinyin = page.pinyin
+        record.pinyin_group = page.pinyin_group
+        records.append(record)
+    return records
+
+def _build_dicts(pinyinized: list[PageInfo]) -> list[dict]:
+    """此前以TypedDict表示拼音化页面时的字典布局，仅用于内存对比"""
+    return [{"page_id": page.page_id, "page_title": page.page_title, "pinyin": page.pinyin,
+             "pinyin_group": page.pinyin_group, "user_page": page.user_page, "deceased": page.deceased}
+            for page in pinyinized]
+
+def percentile(values: list[float], p: float) -> float:
+    """最近秩法分位数"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def peak_memory(func: Callable[[], object]) -> int:
+    """运行一次func，返回其间的峰值内存分配（字节）"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def measure(func: Callable[[], object], items: int, repeat: int) -> dict:
+    """运行func repeat次测量墙钟与CPU时间，再额外运行一次测量峰值内存"""
+    wall: list[float] = []
+    cpu: list[float] = []
+    for _ in range(repeat):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        func()
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+
+    # tracemalloc会显著拖慢运行，因此单独测量
+    peak = peak_memory(func)
+
+    p50 = percentile(wall, 50)
+    return {
+        "items": items,
+        "repeat": repeat,
+        "wall_seconds": {
+            "min": min(wall),
+            "mean": statistics.fmean(wall),
+            "p50": p50,
+            "p90": percentile(wall, 90),
+            "p99": percentile(wall, 99),
+        },
+        "cpu_seconds_mean": statistics.fmean(cpu),
+        "throughput_per_second": items / p50 if p50 > 0 else None,
+        "peak_memory_bytes": peak,
+    }
+
+def run(sizes: list[int], stages: list[str], repeat: int, seed: int, pinyin_workers: int = 1,
+        pinyin_table: Optional[PinyinTable] = None) -> list[dict]:
+    results = []
+    for size in sizes:
+        print(f"正在生成 {size} 个人物的语料...", file=sys.stderr)
+        persons, deceased = make_corpus(size, seed)
+        page_list = merge_category_members(persons, deceased)
+        pinyinized = get_pinyinized_page_list(page_list)
+        template = generate_template(pinyinized)
+        current = _current_page(page_list, seed) if {"diff", "entries"} & set(stages) else ""
+
+        stage_funcs = {
+            "merge": (lambda: merge_category_members(persons, deceased), len(persons) + len(deceased)),
+            "pinyin": (lambda: get_pinyinized_page_list(page_list, workers=pinyin_workers, table=pinyin_table),
+                       len(page_list)),
+            "template": (lambda: generate_template(pinyinized), len(pinyinized)),
+            "diff": (lambda: list(unified_diff(current, template)), len(pinyinized)),
+            "entries": (lambda: entry_diff(current, template), len(pinyinized)),
+            "records": (lambda: _build_records(pinyinized), len(pinyinized)),
+        }
+        for stage in stages:
+            func, items = stage_funcs[stage]
+            print(f"  正在测量 {stage}（{size} 人）...", file=sys.stderr)
+            result = measure(func, items, repeat)
+            result.update(size=size, stage=stage)
+            if stage == "records":
+                result["dict_peak_memory_bytes"] = peak_memory(lambda: _build_dicts(pinyinized))
+            results.append(result)
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results: list[dict], baseline: Optional[dict] = None) -> None:
+    """以表格形式输出结果；提供baseline时附上p50相对变化"""
+    previous = {}
+    if baseline is not None:
+        previous = {(r["size"], r["stage"]): r for r in baseline["results"]}
+    header = f"{'规模':>8} {'阶段':<10} {'p50(ms)':>10} {'p90(ms)':>10} {'p99(ms)':>10} {'吞吐量(/s)':>12} {'峰值内存(KB)':>14}"
+    if previous:
+        header += f" {'p50变化':>10}"
+    print(header)
+    for r in results:
+        wall = r["wall_seconds"]
+        line = (f"{r['size']:>8} {r['stage']:<10} {wall['p50'] * 1000:>10.2f} {wall['p90'] * 1000:>10.2f} "
+                f"{wall['p99'] * 1000:>10.2f} {r['throughput_per_second'] or 0:>12.0f} "
+                f"{r['peak_memory_bytes'] / 1024:>14.0f}")
+        old = previous.get((r["size"], r["stage"]))
+        if old is not None:
+            line += f" {wall['p50'] / old['wall_seconds']['p50'] - 1:>+10.1%}"
+        print(line)
+    for r in results:
+        if "dict_peak_memory_bytes" in r:
+            records, dicts = r["peak_memory_bytes"], r["dict_peak_memory_bytes"]
+            print(f"{r['size']} 人的页面记录：__slots__ {records / 1024:.0f} KB，字典 {dicts / 1024:.0f} KB"
+                  f"（{records / dicts - 1:+.1%}）")
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="分阶段测量人物模板生成流程的性能")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="语料规模，逗号分隔（默认为1000,10000,100000）")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"要测量的阶段，逗号分隔（默认为{','.join(STAGES)}）")
+    parser.add_argument("--repeat", type=int, default=5, help="每个阶段的运行次数（默认为5）")
+    parser.add_argument("--pinyin-workers", type=int, default=1, help="pinyin阶段使用的进程数（默认为1，即串行）")
+    parser.add_argument("--pinyin-table", metavar="PATH", help="pinyin阶段使用的拼音查找表（默认使用pypinyin）")
+    parser.add_argument("--seed", type=int, default=0, help="语料的随机种子")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON文件路径（默认为'bench_results.json'）")
+    parser.add_argument("--compare", metavar="FILE", help="与之前保存的结果比较")
+    args = parser.parse_args(argv[1:])
+
+    # 被测函数的INFO日志会干扰计时，只保留警告
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    sizes = [int(size) for size in args.sizes.split(",")]
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"未知的阶段: {', '.join(sorted(unknown))}")
+
+    pinyin_table = PinyinTable(args.pinyin_table) if args.pinyin_table else None
+    results = run(sizes, stages, args.repeat, args.seed, args.pinyin_workers, pinyin_table)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "transliteration": transliteration_version(),
+            "seed": args.seed,
+            "pinyin_workers": args.pinyin_workers,
+            "pinyin_table": args.pinyin_table,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"与提交 {baseline['meta'].get('commit')} 的结果比较：")
+    print_table(results, baseline)
+    print(f"结果已保存到 {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,131 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Mapping, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import mwclient
+
+SESSION_CACHE_VERSION = 1
+
+# 批量模式等场景下可能有多个线程写同一个会话缓存文件
+_session_lock = threading.Lock()
+
+def _session_key(scheme: str, domain: str, path: str, username: str) -> str:
+    return f"{scheme}://{domain}{path}#{username}"
+
+def _read_sessions(path: str) -> dict:
+    """读取会话缓存文件，文件不存在、格式不符或权限过宽时返回空字典"""
+    try:
+        if os.name == "posix" and os.stat(path).st_mode & 0o077:
+            logging.warning(f"会话缓存 '{path}' 可以被其他用户读取，将忽略其内容并重新登录")
+            return {}
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"无法读取会话缓存 '{path}': {e}")
+        return {}
+    if not isinstance(data, dict) or data.get("version") != SESSION_CACHE_VERSION:
+        return {}
+    return data.get("sessions", {})
+
+def save_session(path: str, site: "mwclient.Site") -> None:
+    """
+    把已登录站点的Cookie与令牌保存到会话缓存，供之后的运行通过connect复用。
+
+    文件只允许当前用户读写（0600）。同一个文件可以保存多个站点、多个账户的会话，
+    保存失败时只记录警告。
+    """
+    if not site.credentials:
+        return
+    now = time.time()
+    cookies = [{"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path,
+                "secure": cookie.secure, "expires": cookie.expires, "rest": dict(cookie._rest)}
+               for cookie in site.connection.cookies
+               if cookie.expires is None or cookie.expires > now]
+    # 登录令牌只在登录时使用一次，不必保存
+    tokens = {name: token for name, token in site.tokens.items() if name != "login" and token and token != "0"}
+    key = _session_key(site.scheme, site.host, site.path, site.credentials[0])
+    with _session_lock:
+        sessions = _read_sessions(path)
+        sessions[key] = {"cookies": cookies, "tokens": tokens, "saved": now}
+        tmp_path = path + ".tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            if os.name == "posix":
+                # 残留的临时文件可能带有更宽的权限，O_CREAT的mode对已存在的文件不起作用
+                os.fchmod(fd, 0o600)
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": SESSION_CACHE_VERSION, "sessions": sessions}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"无法保存会话缓存 '{path}': {e}")
+
+def _restore_session(site: "mwclient.Site", session_path: str, username: str) -> bool:
+    """
+    把缓存的Cookie放入站点的连接并初始化站点，返回缓存的会话是否仍处于登录状态。
+
+    初始化本来就要查询一次meta=userinfo，因此检查会话是否有效不需要额外的请求。
+    """
+    import mwclient
+    from requests.cookies import create_cookie
+    with _session_lock:
+        entry = _read_sessions(session_path).get(_session_key(site.scheme, site.host, site.path, username))
+    if not entry:
+        return False
+    now = time.time()
+    for cookie in entry.get("cookies", []):
+        if cookie.get("expires") is None or cookie["expires"] > now:
+            site.connection.cookies.set_cookie(create_cookie(**cookie))
+    try:
+        site.site_init()
+    except mwclient.errors.APIError:
+        # 不允许匿名读取的站点会拒绝失效会话的请求
+        site.connection.cookies.clear()
+        return False
+    # 匿名用户只属于'*'组，任何已登录的用户都属于'user'组
+    if "user" not in site.groups:
+        site.connection.cookies.clear()
+        return False
+    site.tokens.update(entry.get("tokens", {}))
+    return True
+
+def connect(location: Mapping[str, str], credential: Mapping[str, str],
+            response_hook: Optional[Callable] = None, session_path: Optional[str] = None) -> "mwclient.Site":
+    """
+    根据配置连接并登录到站点。
+
+    Args:
+        location: [Location]配置节，必须包含domain，可选scheme与path
+            （用于连接本地的测试服务器，见fakewiki.py）
+        credential: [Credential]配置节，包含username与password
+        response_hook: 可选的requests响应钩子，在发出第一个请求前注册（见metrics.Metrics.on_response）
+        session_path: 可选的会话缓存文件路径。缓存的会话仍然有效时直接复用（连同CSRF令牌），
+            不再登录；否则重新登录并保存新的会话（见save_session）
+
+    Returns:
+        mwclient.Site: 已登录的站点对象
+    """
+    import mwclient
+    # login()结束时会调用site_init()，因此构造时不必先请求一次站点信息
+    site = mwclient.Site(location["domain"], path=location.get("path", "/w/"),
+                         scheme=location.get("scheme", "https"), do_init=False)
+    if response_hook is not None:
+        site.connection.hooks["response"].append(response_hook)
+    if session_path is not None:
+        if _restore_session(site, session_path, credential["username"]):
+            logging.info(f"  已复用会话缓存中的登录会话（用户 '{site.username}'）")
+            # 与login()相同地记录凭证，会话之后失效时可以直接调用site.login()重新登录
+            site.credentials = (credential["username"], credential["password"], None)
+            return site
+        logging.info("  会话缓存中没有有效的登录会话，正在重新登录...")
+    site.login(username=credential["username"], password=credential["password"])
+    if session_path is not None:
+        save_session(session_path, site)
+    return site
@@ -1,159 +1,557 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2026 Xie Youtian
-import pypinyin
+import hashlib
+import json
+import os
+import re
 import logging
-from get import PageInfo
-from typing import List, TypedDict
+from bisect import bisect_left
+from contextlib import nullcontext
+from get import PageInfo, merge_category_members
+from typing import (Callable, ContextManager, Iterable, Iterator, List, Mapping, Optional, Sequence, TextIO,
+                    TYPE_CHECKING)
+
+if TYPE_CHECKING:
+    from pinyin_cache import PinyinCache
+    from pinyin_table import PinyinTable
+
+# 平假名到罗马字映射
+HIRAGANA_MAP = {
+    'あ': 'a', 'い': 'i', 'う': 'u', 'え': 'e', 'お': 'o',
+    'か': 'ka', 'き': 'ki', 'く': 'ku', 'け': 'ke', 'こ': 'ko',
+    'さ': 'sa', 'し': 'shi', 'す': 'su', 'せ': 'se', 'そ': 'so',
+    'た': 'ta', 'ち': 'chi', 'つ': 'tsu', 'て': 'te', 'と': 'to',
+    'な': 'na', 'に': 'ni', 'ぬ': 'nu', 'ね': 'ne', 'の': 'no',
+    'は': 'ha', 'ひ': 'hi', 'ふ': 'fu', 'へ': 'he', 'ほ': 'ho',
+    'ま': 'ma', 'み': 'mi', 'む': 'mu', 'め': 'me', 'も': 'mo',
+    'や': 'ya', 'ゆ': 'yu', 'よ': 'yo',
+    'ら': 'ra', 'り': 'ri', 'る': 'ru', 'れ': 're', 'ろ': 'ro',
+    'わ': 'wa', 'を': 'wo', 'ん': 'n',
+    'が': 'ga', 'ぎ': 'gi', 'ぐ': 'gu', 'げ': 'ge', 'ご': 'go',
+    'ざ': 'za', 'じ': 'ji', 'ず': 'zu', 'ぜ': 'ze', 'ぞ': 'zo',
+    'だ': 'da', 'ぢ': 'ji', 'づ': 'zu', 'で': 'de', 'ど': 'do',
+    'ば': 'ba', 'び': 'bi', 'ぶ': 'bu', 'べ': 'be', 'ぼ': 'bo',
+    'ぱ': 'pa', 'ぴ': 'pi', 'ぷ': 'pu', 'ぺ': 'pe', 'ぽ': 'po',
+    'きゃ': 'kya', 'きゅ': 'kyu', 'きょ': 'kyo',
+    'しゃ': 'sha', 'しゅ': 'shu', 'しょ': 'sho',
+    'ちゃ': 'cha', 'ちゅ': 'chu', 'ちょ': 'cho',
+    'にゃ': 'nya', 'にゅ': 'nyu', 'にょ': 'nyo',
+    'ひゃ': 'hya', 'ひゅ': 'hyu', 'ひょ': 'hyo',
+    'みゃ': 'mya', 'みゅ': 'myu', 'みょ': 'myo',
+    'りゃ': 'rya', 'りゅ': 'ryu', 'りょ': 'ryo',
+    'ぎゃ': 'gya', 'ぎゅ': 'gyu', 'ぎょ': 'gyo',
+    'じゃ': 'ja', 'じゅ': 'ju', 'じょ': 'jo',
+    'びゃ': 'bya', 'びゅ': 'byu', 'びょ': 'byo',
+    'ぴゃ': 'pya', 'ぴゅ': 'pyu', 'ぴょ': 'pyo',
+}
+
+# 片假名到罗马字映射
+KATAKANA_MAP = {
+    'ア': 'a', 'イ': 'i', 'ウ': 'u', 'エ': 'e', 'オ': 'o',
+    'カ': 'ka', 'キ': 'ki', 'ク': 'ku', 'ケ': 'ke', 'コ': 'ko',
+    'サ': 'sa', 'シ': 'shi', 'ス': 'su', 'セ': 'se', 'ソ': 'so',
+    'タ': 'ta', 'チ': 'chi', 'ツ': 'tsu', 'テ': 'te', 'ト': 'to',
+    'ナ': 'na', 'ニ': 'ni', 'ヌ': 'nu', 'ネ': 'ne', 'ノ': 'no',
+    'ハ': 'ha', 'ヒ': 'hi', 'フ': 'fu', 'ヘ': 'he', 'ホ': 'ho',
+    'マ': 'ma', 'ミ': 'mi', 'ム': 'mu', 'メ': 'me', 'モ': 'mo',
+    'ヤ': 'ya', 'ユ': 'yu', 'ヨ': 'yo',
+    'ラ': 'ra', 'リ': 'ri', 'ル': 'ru', 'レ': 're', 'ロ': 'ro',
+    'ワ': 'wa', 'ヲ': 'wo', 'ン': 'n',
+    'ガ': 'ga', 'ギ': 'gi', 'グ': 'gu', 'ゲ': 'ge', 'ゴ': 'go',
+    'ザ': 'za', 'ジ': 'ji', 'ズ': 'zu', 'ゼ': 'ze', 'ゾ': 'zo',
+    'ダ': 'da', 'ヂ': 'ji', 'ヅ': 'zu', 'デ': 'de', 'ド': 'do',
+    'バ': 'ba', 'ビ': 'bi', 'ブ': 'bu', 'ベ': 'be', 'ボ': 'bo',
+    'パ': 'pa', 'ピ': 'pi', 'プ': 'pu', 'ペ': 'pe', 'ポ': 'po',
+    'キャ': 'kya', 'キュ': 'kyu', 'キョ': 'kyo',
+    'シャ': 'sha', 'シュ': 'shu', 'ショ': 'sho',
+    'チャ': 'cha', 'チュ': 'chu', 'チョ': 'cho',
+    'ニャ': 'nya', 'ニュ': 'nyu', 'ニョ': 'nyo',
+    'ヒャ': 'hya', 'ヒュ': 'hyu', 'ヒョ': 'hyo',
+    'ミャ': 'mya', 'ミュ': 'myu', 'ミョ': 'myo',
+    'リャ': 'rya', 'リュ': 'ryu', 'リョ': 'ryo',
+    'ギャ': 'gya', 'ギュ': 'gyu', 'ギョ': 'gyo',
+    'ジャ': 'ja', 'ジュ': 'ju', 'ジョ': 'jo',
+    'ビャ': 'bya', 'ビュ': 'byu', 'ビョ': 'byo',
+    'ピャ': 'pya', 'ピュ': 'pyu', 'ピョ': 'pyo',
+    'ヴ': 'vu', 'ヴァ': 'va', 'ヴィ': 'vi', 'ヴェ': 've', 'ヴォ': 'vo',
+    'ファ': 'fa', 'フィ': 'fi', 'フェ': 'fe', 'フォ': 'fo',
+    'ティ': 'ti', 'ディ': 'di', 'トゥ': 'tu', 'ドゥ': 'du',
+}
+
+# 合并映射
+_KANA_MAP = {**HIRAGANA_MAP, **KATAKANA_MAP}
+
+# 促音（っ/ッ）后接假名时重复其罗马字的首个辅音，chi/cha等按平文式写作tchi/tcha；
+# 后接元音、拨音（ん）或非假名时保持原样
+_SOKUON = 'っッ'
+# 长音符（ー）重复前一个假名的元音
+_CHOONPU = 'ー'
+_VOWELS = 'aeiou'
+
+def _compile_kana_tokenizer() -> "re.Pattern[str]":
+    """
+    构建把文本切分为假名单元的正则表达式。
+
+    拗音等2字符组合按首字符归并为字符类（如"キ[ャュョ]"），放在单字符匹配之前，
+    从而与逐字符扫描时"优先匹配2字符"的规则一致。
+    """
+    digraphs: dict[str, list[str]] = {}
+    for kana in _KANA_MAP:
+        if len(kana) == 2:
+            digraphs.setdefault(kana[0], []).append(kana[1])
+    alternatives = [
+        re.escape(first) + '[' + ''.join(re.escape(c) for c in sorted(seconds)) + ']'
+        for first, seconds in sorted(digraphs.items())
+    ]
+    return re.compile('|'.join(alternatives) + '|.', re.DOTALL)
+
+# 在导入时一次性编译
+_KANA_TOKEN_RE = _compile_kana_tokenizer()
+_SPECIAL_MARKS = frozenset(_SOKUON + _CHOONPU)
+
+# 假名转换规则的修订号，修改_kana_to_romaji的处理逻辑（而不仅是映射表）时递增，
+# 使持久化的拼音缓存失效
+ROMAJI_RULES_REVISION = 3
 
 def _kana_to_romaji(text: str) -> List[str]:
     """将假名文本转换为罗马字，用于pypinyin的errors回调"""
-    # 平假名到罗马字映射
-    hiragana_map = {
-        'あ': 'a', 'い': 'i', 'う': 'u', 'え': 'e', 'お': 'o',
-        'か': 'ka', 'き': 'ki', 'く': 'ku', 'け': 'ke', 'こ': 'ko',
-        'さ': 'sa', 'し': 'shi', 'す': 'su', 'せ': 'se', 'そ': 'so',
-        'た': 'ta', 'ち': 'chi', 'つ': 'tsu', 'て': 'te', 'と': 'to',
-        'な': 'na', 'に': 'ni', 'ぬ': 'nu', 'ね': 'ne', 'の': 'no',
-        'は': 'ha', 'ひ': 'hi', 'ふ': 'fu', 'へ': 'he', 'ほ': 'ho',
-        'ま': 'ma', 'み': 'mi', 'む': 'mu', 'め': 'me', 'も': 'mo',
-        'や': 'ya', 'ゆ': 'yu', 'よ': 'yo',
-        'ら': 'ra', 'り': 'ri', 'る': 'ru', 'れ': 're', 'ろ': 'ro',
-        'わ': 'wa', 'を': 'wo', 'ん': 'n',
-        'が': 'ga', 'ぎ': 'gi', 'ぐ': 'gu', 'げ': 'ge', 'ご': 'go',
-        'ざ': 'za', 'じ': 'ji', 'ず': 'zu', 'ぜ': 'ze', 'ぞ': 'zo',
-        'だ': 'da', 'ぢ': 'ji', 'づ': 'zu', 'で': 'de', 'ど': 'do',
-        'ば': 'ba', 'び': 'bi', 'ぶ': 'bu', 'べ': 'be', 'ぼ': 'bo',
-        'ぱ': 'pa', 'ぴ': 'pi', 'ぷ': 'pu', 'ぺ': 'pe', 'ぽ': 'po',
-        'きゃ': 'kya', 'きゅ': 'kyu', 'きょ': 'kyo',
-        'しゃ': 'sha', 'しゅ': 'shu', 'しょ': 'sho',
-        'ちゃ': 'cha', 'ちゅ': 'chu', 'ちょ': 'cho',
-        'にゃ': 'nya', 'にゅ': 'nyu', 'にょ': 'nyo',
-        'ひゃ': 'hya', 'ひゅ': 'hyu', 'ひょ': 'hyo',
-        'みゃ': 'mya', 'みゅ': 'myu', 'みょ': 'myo',
-        'りゃ': 'rya', 'りゅ': 'ryu', 'りょ': 'ryo',
-        'ぎゃ': 'gya', 'ぎゅ': 'gyu', 'ぎょ': 'gyo',
-        'じゃ': 'ja', 'じゅ': 'ju', 'じょ': 'jo',
-        'びゃ': 'bya', 'びゅ': 'byu', 'びょ': 'byo',
-        'ぴゃ': 'pya', 'ぴゅ': 'pyu', 'ぴょ': 'pyo',
-    }
-    
-    # 片假名到罗马字映射
-    katakana_map = {
-        'ア': 'a', 'イ': 'i', 'ウ': 'u', 'エ': 'e', 'オ': 'o',
-        'カ': 'ka', 'キ': 'ki', 'ク': 'ku', 'ケ': 'ke', 'コ': 'ko',
-        'サ': 'sa', 'シ': 'shi', 'ス': 'su', 'セ': 'se', 'ソ': 'so',
-        'タ': 'ta', 'チ': 'chi', 'ツ': 'tsu', 'テ': 'te', 'ト': 'to',
-        'ナ': 'na', 'ニ': 'ni', 'ヌ': 'nu', 'ネ': 'ne', 'ノ': 'no',
-        'ハ': 'ha', 'ヒ': 'hi', 'フ': 'fu', 'ヘ': 'he', 'ホ': 'ho',
-        'マ': 'ma', 'ミ': 'mi', 'ム': 'mu', 'メ': 'me', 'モ': 'mo',
-        'ヤ': 'ya', 'ユ': 'yu', 'ヨ': 'yo',
-        'ラ': 'ra', 'リ': 'ri', 'ル': 'ru', 'レ': 're', 'ロ': 'ro',
-        'ワ': 'wa', 'ヲ': 'wo', 'ン': 'n',
-        'ガ': 'ga', 'ギ': 'gi', 'グ': 'gu', 'ゲ': 'ge', 'ゴ': 'go',
-        'ザ': 'za', 'ジ': 'ji', 'ズ': 'zu', 'ゼ': 'ze', 'ゾ': 'zo',
-        'ダ': 'da', 'ヂ': 'ji', 'ヅ': 'zu', 'デ': 'de', 'ド': 'do',
-        'バ': 'ba', 'ビ': 'bi', 'ブ': 'bu', 'ベ': 'be', 'ボ': 'bo',
-        'パ': 'pa', 'ピ': 'pi', 'プ': 'pu', 'ペ': 'pe', 'ポ': 'po',
-        'キャ': 'kya', 'キュ': 'kyu', 'キョ': 'kyo',
-        'シャ': 'sha', 'シュ': 'shu', 'ショ': 'sho',
-        'チャ': 'cha', 'チュ': 'chu', 'チョ': 'cho',
-        'ニャ': 'nya', 'ニュ': 'nyu', 'ニョ': 'nyo',
-        'ヒャ': 'hya', 'ヒュ': 'hyu', 'ヒョ': 'hyo',
-        'ミャ': 'mya', 'ミュ': 'myu', 'ミョ': 'myo',
-        'リャ': 'rya', 'リュ': 'ryu', 'リョ': 'ryo',
-        'ギャ': 'gya', 'ギュ': 'gyu', 'ギョ': 'gyo',
-        'ジャ': 'ja', 'ジュ': 'ju', 'ジョ': 'jo',
-        'ビャ': 'bya', 'ビュ': 'byu', 'ビョ': 'byo',
-        'ピャ': 'pya', 'ピュ': 'pyu', 'ピョ': 'pyo',
-        'ヴ': 'vu', 'ヴァ': 'va', 'ヴィ': 'vi', 'ヴェ': 've', 'ヴォ': 'vo',
-        'ファ': 'fa', 'フィ': 'fi', 'フェ': 'fe', 'フォ': 'fo',
-        'ティ': 'ti', 'ディ': 'di', 'トゥ': 'tu', 'ドゥ': 'du',
-    }
-    
-    # 合并映射
-    kana_map = {**hiragana_map, **katakana_map}
-    
-    # 处理文本：尝试将假名转换为罗马字
+    kana_map = _KANA_MAP
+    tokens = _KANA_TOKEN_RE.findall(text)
+    # 非假名字符保持原样（pypinyin会处理）
+    if _SPECIAL_MARKS.isdisjoint(text):
+        return [kana_map.get(token, token) for token in tokens]
+
+    # 含促音或长音符时需要参考前后的假名
     result = []
-    i = 0
-    while i < len(text):
-        # 优先尝试匹配2字符的拗音
-        if i + 1 < len(text) and text[i:i+2] in kana_map:
-            result.append(kana_map[text[i:i+2]])
-            i += 2
-        # 匹配单字符假名
-        elif text[i] in kana_map:
-            result.append(kana_map[text[i]])
-            i += 1
-        # 非假名字符，保持原样（pypinyin会处理）
+    last_vowel = None  # 前一个假名罗马字的末尾元音，用于长音符；前面不是假名时为None
+    pending_sokuon = None
+    for token in tokens:
+        romaji = kana_map.get(token)
+        if romaji is not None:
+            if pending_sokuon is not None:
+                first = romaji[0]
+                if first == 'c':
+                    romaji = 't' + romaji
+                elif first not in _VOWELS and romaji != 'n':
+                    romaji = first + romaji
+                else:
+                    # 元音和拨音（ん）前的促音无法解释，保持原样
+                    result.append(pending_sokuon)
+                pending_sokuon = None
+            result.append(romaji)
+            last_vowel = romaji[-1] if romaji[-1] in _VOWELS else None
+            continue
+        if pending_sokuon is not None:
+            # 促音后面不是假名，无法解释，保持原样；之后的长音符也不再延长促音之前的元音
+            result.append(pending_sokuon)
+            pending_sokuon = None
+            last_vowel = None
+        if token in _SOKUON:
+            pending_sokuon = token
+        elif token == _CHOONPU and last_vowel is not None:
+            result.append(last_vowel)
         else:
-            result.append(text[i])
-            i += 1
-    
+            result.append(token)
+            last_vowel = None
+    if pending_sokuon is not None:
+        result.append(pending_sokuon)
+
     # pypinyin期望一个拼音列表
     return result
 
+def transliteration_version(table: Optional["PinyinTable"] = None) -> str:
+    """
+    返回标题转换结果的版本标识。
+
+    由pypinyin版本（使用拼音查找表时为生成该表的pypinyin版本）、假名映射表内容和
+    ROMAJI_RULES_REVISION共同决定，任何一项变化都意味着已缓存的拼音可能不再正确。
+    """
+    kana_digest = hashlib.sha1(
+        json.dumps(sorted(_KANA_MAP.items()), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:12]
+    if table is not None:
+        pypinyin_version = table.pypinyin_version
+    else:
+        # 从包元数据读取版本，避免仅为了版本号而加载pypinyin的词典
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            pypinyin_version = version("pypinyin")
+        except PackageNotFoundError:
+            import pypinyin
+            pypinyin_version = pypinyin.__version__
+    return f"pypinyin-{pypinyin_version}/kana-{kana_digest}/rules-{ROMAJI_RULES_REVISION}"
+
+def title_to_pinyin(title: str, table: Optional["PinyinTable"] = None) -> str:
+    """将页面标题转换为用于排序的拼音/罗马字字符串，提供table时使用预先导出的拼音查找表"""
+    if table is not None:
+        return table.transliterate(title, errors=_kana_to_romaji)
+    # pypinyin加载词典较慢，只在真正需要转换时导入
+    import pypinyin
+    return ''.join(
+        pypinyin.lazy_pinyin(
+            title,
+            style=pypinyin.Style.NORMAL,
+            errors=_kana_to_romaji
+        )
+    )
+
 
-class PinyinPageInfo(TypedDict):
-    page_id: int
-    page_title: str
-    pinyin: str
-    pinyin_group: str
-    user_page: bool
-    deceased: bool
 
+# 需要转换的标题少于该数量时，启动进程池的开销大于并行的收益，始终串行转换
+PARALLEL_MIN_TITLES = 5000
 
+def _transliterate_chunk(titles: List[str], table: Optional["PinyinTable"] = None) -> List[str]:
+    """进程池中的工作函数：转换一批标题（查找表在各进程中按路径重新打开）"""
+    return [title_to_pinyin(title, table) for title in titles]
 
-def get_pinyinized_page_list(unpinyinized_titles: List[PageInfo]) -> List[PinyinPageInfo]:
+def _transliterate_parallel(titles: List[str], workers: int, chunk_size: int,
+                            table: Optional["PinyinTable"] = None) -> dict[str, str]:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    chunks = [titles[start:start + chunk_size] for start in range(0, len(titles), chunk_size)]
+    results: list[Optional[List[str]]] = [None] * len(chunks)
+    processed_count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_transliterate_chunk, chunk, table): index for index, chunk in enumerate(chunks)}
+        # 进度在父进程中按完成的批次汇报
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            processed_count += len(chunks[index])
+            logging.info(f"    已转换 {processed_count}/{len(titles)} 个标题")
+    pinyins: dict[str, str] = {}
+    for chunk, chunk_result in zip(chunks, results):
+        pinyins.update(zip(chunk, chunk_result))
+    return pinyins
+
+def _transliterate(titles: List[str], workers: int, chunk_size: int,
+                   table: Optional["PinyinTable"] = None) -> dict[str, str]:
+    """转换一组互不相同的标题，返回标题到拼音的映射"""
+    if workers > 1 and len(titles) >= PARALLEL_MIN_TITLES:
+        logging.info(f"  使用 {workers} 个进程并行转换，每批 {chunk_size} 个标题")
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            return _transliterate_parallel(titles, workers, chunk_size, table)
+        except (OSError, BrokenProcessPool) as e:
+            logging.warning(f"  无法使用进程池进行拼音转换（{e}），改为串行转换")
+
+    pinyins: dict[str, str] = {}
+    for processed_count, title in enumerate(titles, 1):
+        pinyins[title] = title_to_pinyin(title, table)
+        if processed_count % 1000 == 0:  # 每处理1000个标题输出一次进度
+            logging.info(f"    已转换 {processed_count}/{len(titles)} 个标题")
+    return pinyins
+
+def pinyin_group(pinyin: str) -> str:
+    """拼音所属的首字母分组：A-Z，其余（含空字符串）为'#'"""
+    if not pinyin:
+        return "#"
+    first_char = pinyin[0].upper()
+    if 'A' <= first_char <= 'Z':
+        return first_char
+    else:
+        return "#"
+
+def entry_sort_key(page_info: PageInfo) -> tuple[str, str, bool]:
+    """
+    模板中条目的排序键。
+
+    拼音相同时再按标题和是否为用户页面排序，使顺序与输入顺序无关，
+    从而可以由TemplateIndex增量维护。
+    """
+    return (page_info.pinyin, page_info.page_title, page_info.user_page)
+
+def transliterate_titles(titles: Iterable[str], cache: Optional["PinyinCache"] = None,
+                         workers: int = 1, chunk_size: int = 2000,
+                         table: Optional["PinyinTable"] = None) -> dict[str, str]:
+    """
+    计算一组标题的拼音，返回标题到拼音的映射。
+
+    提供table时使用预先导出的拼音查找表（见pinyin_table.py）代替pypinyin，结果相同。
+
+    缓存查询始终在当前进程中进行，只有未命中的标题才会被转换。
+    workers大于1且需要转换的标题不少于PARALLEL_MIN_TITLES个时，按chunk_size分批交给进程池转换；
+    无论是否并行，结果都与串行转换完全相同。
+    """
+    pinyins: dict[str, str] = {}
+    missing: dict[str, None] = {}
+    for title in titles:
+        if title in pinyins or title in missing:
+            continue
+        pinyin = cache.get(title) if cache is not None else None
+        if pinyin is None:
+            missing[title] = None
+        else:
+            pinyins[title] = pinyin
+
+    converted = _transliterate(list(missing), max(1, workers), max(1, chunk_size), table)
+    if cache is not None:
+        for title, pinyin in converted.items():
+            cache.put(title, pinyin)
+    pinyins.update(converted)
+    return pinyins
+
+def get_pinyinized_page_list(unpinyinized_titles: List[PageInfo],
+                             cache: Optional["PinyinCache"] = None,
+                             workers: int = 1, chunk_size: int = 2000,
+                             table: Optional["PinyinTable"] = None) -> List[PageInfo]:
+    """
+    为每个页面计算拼音并按拼音排序（排序键见entry_sort_key）。
+
+    拼音与首字母分组直接写入传入的记录（不复制），返回排序后的新列表。
+
+    Args:
+        unpinyinized_titles: get_page_list返回的页面列表
+        cache: 可选的持久化拼音缓存，命中的标题不再重新转换
+        workers: 转换使用的进程数，1表示串行转换（见transliterate_titles）
+        chunk_size: 并行转换时每批的标题数
+        table: 可选的拼音查找表，提供时不导入pypinyin
+    """
     import logging
     logging.info(f"  开始处理 {len(unpinyinized_titles)} 个页面的拼音转换...")
-    
-    pinyinized_titles : List[PinyinPageInfo] = []
-    def get_group(pinyin_str: str) -> str:
-        if not pinyin_str:
-            return "#"
-        first_char = pinyin_str[0].upper()
-        if 'A' <= first_char <= 'Z':
-            return first_char
-        else:
-            return "#"
-    
-    processed_count = 0
+
+    pinyins = transliterate_titles((page_info.page_title for page_info in unpinyinized_titles),
+                                   cache=cache, workers=workers, chunk_size=chunk_size, table=table)
     for page_info in unpinyinized_titles:
-        copied_page_info = page_info.copy()
-        copied_page_info["pinyin"] = ''.join(
-            pypinyin.lazy_pinyin(
-                copied_page_info["page_title"],
-                style=pypinyin.Style.NORMAL,
-                errors=_kana_to_romaji
-            )
-        )
-        copied_page_info["pinyin_group"] = get_group(copied_page_info["pinyin"])
-        pinyinized_titles.append(copied_page_info)
-        
-        processed_count += 1
-        if processed_count % 1000 == 0:  # 每处理1000个页面输出一次进度
-            logging.info(f"    已处理 {processed_count}/{len(unpinyinized_titles)} 个页面")
-
-    pinyinized_titles.sort(key=lambda x: x["pinyin"])
+        page_info.pinyin = pinyins[page_info.page_title]
+        page_info.pinyin_group = pinyin_group(page_info.pinyin)
+
+    pinyinized_titles = sorted(unpinyinized_titles, key=entry_sort_key)
+    if cache is not None:
+        logging.info(f"  拼音缓存命中 {cache.hits} 次，未命中 {cache.misses} 次")
     logging.info(f"  拼音转换完成，共处理 {len(pinyinized_titles)} 个页面")
     return pinyinized_titles
 
-def generate_template(
-    pinyinized_titles: List[PinyinPageInfo],
-):
-    # Group pages by first letter of pinyin
-    groups = {}
+def pinyinize_category_stream(batches: Iterator[tuple[bool, List[PageInfo]]],
+                              cache: Optional["PinyinCache"] = None,
+                              table: Optional["PinyinTable"] = None,
+                              timer: Optional[Callable[[], ContextManager]] = None) -> List[PageInfo]:
+    """
+    边获取边转换：每收到一批分类成员（见get.stream_category_members）就立即计算拼音，
+    全部收到后再合并两个分类并排序，结果与get_page_list加get_pinyinized_page_list相同。
+
+    转换在调用线程中串行进行，下载在后台线程中继续，因此转换耗时被网络等待掩盖；
+    同一标题（例如同时属于两个分类的页面）只转换一次。
+
+    Args:
+        batches: (是否来自'逝世的人物'分类, 一批页面)的迭代器
+        cache: 可选的持久化拼音缓存
+        table: 可选的拼音查找表
+        timer: 可选的无参数函数，返回包住每一批转换的上下文管理器，
+            用于把转换耗时单独计入一个指标阶段（见metrics.Metrics.stage）
+    """
+    persons: List[PageInfo] = []
+    deceased: List[PageInfo] = []
+    pinyins: dict[str, str] = {}
+    for from_deceased, batch in batches:
+        with timer() if timer is not None else nullcontext():
+            new_titles = {page_info.page_title for page_info in batch} - pinyins.keys()
+            pinyins.update(transliterate_titles(new_titles, cache=cache, table=table))
+            for page_info in batch:
+                page_info.pinyin = pinyins[page_info.page_title]
+                page_info.pinyin_group = pinyin_group(page_info.pinyin)
+        (deceased if from_deceased else persons).extend(batch)
+        logging.info(f"    已获取并转换 {len(persons) + len(deceased)} 个页面")
+
+    page_list = merge_category_members(persons, deceased)
+    logging.info(f"  成功获取 {len(page_list)} 个页面信息")
+    if cache is not None:
+        logging.info(f"  拼音缓存命中 {cache.hits} 次，未命中 {cache.misses} 次")
+    return sorted(page_list, key=entry_sort_key)
+
+def calculate_balanced_grouping(letter_counts: dict[str, int], max_group_size: int = 40,
+                                target_groups: Optional[int] = None) -> List[str]:
+    """
+    计算最均衡的分组方案，保持字母顺序不变。
+
+    把按字母顺序排列（'#'在最后）的各字母人数划分为若干连续的组，
+    在每组不超过max_group_size人（单个字母本身超过上限时允许独占一组）的前提下，
+    用动态规划求出组大小方差最小的划分。组数固定时总人数和平均值不变，
+    最小化方差等价于最小化各组人数的平方和。
+
+    Args:
+        letter_counts: 各字母组的人数
+        max_group_size: 每组的最大人数
+        target_groups: 目标组数；未指定时取满足上限所需的最少组数，
+            该组数不可行时使用不少于它的最少可行组数
+
+    Returns:
+        List[str]: 分组名称列表，如["A·B·C", "D·E", ...]
+
+    Raises:
+        ValueError: max_group_size不是正数
+    """
+    if max_group_size < 1:
+        raise ValueError(f"每组的最大人数必须为正数: {max_group_size}")
+    sorted_letters = sorted([l for l in letter_counts.keys() if l != '#'])
+    if '#' in letter_counts:
+        sorted_letters.append('#')
+    n = len(sorted_letters)
+    if n == 0:
+        return []
+
+    prefix = [0]
+    for letter in sorted_letters:
+        prefix.append(prefix[-1] + letter_counts[letter])
+    total_count = prefix[-1]
+
+    inf = float('inf')
+    # cost[i][j]: 字母i..j-1组成一组的代价（人数平方），超过上限时不可行
+    cost = [[inf] * (n + 1) for _ in range(n + 1)]
+    for i in range(n):
+        for j in range(i + 1, n + 1):
+            size = prefix[j] - prefix[i]
+            if size > max_group_size and j - i > 1:
+                break
+            cost[i][j] = size * size
+
+    if target_groups is None:
+        target_groups = max(1, (total_count + max_group_size - 1) // max_group_size)  # 向上取整
+
+    # best[k][j]: 前j个字母分成k组的最小代价；split[k][j]: 最后一组的起点。
+    # 逐层增加组数，取第一个不少于目标组数的可行方案（k=n时每个字母独占一组，总是可行）
+    best = [[inf] * (n + 1) for _ in range(n + 1)]
+    split = [[0] * (n + 1) for _ in range(n + 1)]
+    best[0][0] = 0
+    num_groups = n
+    for k in range(1, n + 1):
+        for j in range(k, n + 1):
+            for i in range(k - 1, j):
+                candidate = best[k - 1][i] + cost[i][j]
+                if candidate < best[k][j]:
+                    best[k][j] = candidate
+                    split[k][j] = i
+        if k >= target_groups and best[k][n] < inf:
+            num_groups = k
+            break
+
+    bounds = []
+    j = n
+    for k in range(num_groups, 0, -1):
+        i = split[k][j]
+        bounds.append((i, j))
+        j = i
+    bounds.reverse()
+    return ['·'.join(sorted_letters[i:j]) for i, j in bounds]
+
+# 模板开头（说明部分与Navbox的固定参数）
+_TEMPLATE_HEADER = (
+    "<noinclude>\n"
+    "== 编辑须知 ==\n"
+    "# 兽圈是一个包容性非常强的群体，即便你不出名，你没有拿得出手的作品，'''甚至你认为你只是一个普通人'''，你都可以在这里创建属于你自己的词条。\n"
+    "# 欢迎每一位毛茸茸创建属于自己的词条或修订关于自己的词条，因为'''你比任何人都要了解你自己'''。\n"
+    "# 该模板由机器人维护。当你创建了属于你的词条后，你的名字将于次日或者当日早上7点出现在这个页面上。\n"
+    "# 你可以在[[gh:TimXiedada/wikifur-persons-template-bot|这个GitHub仓库]]找到机器人的源代码（一部分模块使用Vibe Coding方式开发）。\n"
+    "# WikiFur是一个比较专业（或者说严肃）的百科平台，请各位在编辑词条时不要使用太过主观（或随意）的语言。\n"
+    "# WikiFur并不是一个新闻的收集仓库，除非是十分重要的事件，否则请不要加入过多的时事性内容。\n"
+    # "# 因为精力有限，以上内容可能无法包含全部毛茸茸，需要大家修订补充。\n"
+    "# 基于现代中文出版物的做法，该模板中，逝世的人物将会用 {{Departed|示亡号}} 标记。\n\n"
+    "== 模板正文 == \n"
+    "</noinclude>\n"
+    "{{Navbox\n"
+    "|name = 人物\n"
+    "|title = 已收录的人物（总览）\n"
+    "|group1 = 成员\n"
+    "|list1=\n\n"
+    "{{Navbox subgroup\n"
+)
+
+# 模板结尾（未创建词条的分组与分类）
+_TEMPLATE_FOOTER = (
+    "|group10 = 未在 [[WikiFur]] 创建词条\n"
+    "|list10 = >>>>>>>>请前往[[模板:人物/未创建词条人物列表]]查看。<<<<<<<<\n"
+    "}}\n\n"
+    "}}\n\n"
+    "<noinclude>\n\n"
+    "[[分類:相關內容目錄|{{PAGENAME}}]]</noinclude>\n"
+)
+
+# 拆分模式下首字母子页面的开头，只在直接查看子页面时显示
+_SUBPAGE_HEADER = "<noinclude>本页面由机器人维护，是[[{page_title}]]中一个首字母的条目，请勿手动编辑。\n</noinclude>"
+
+# 同一分组中相邻条目之间的分隔符
+_ENTRY_SEPARATOR = " {{·}} "
+
+class _StringBuilder:
+    """收集写入的片段，最后一次性拼接（比io.StringIO占用更少的内存）"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self.write = self._parts.append
+
+    def getvalue(self) -> str:
+        return ''.join(self._parts)
+
+def _format_entry(page_info: PageInfo) -> str:
+    """把页面格式化为模板中的一个条目"""
+    page_title = page_info.page_title
+    if page_info.user_page:
+        link = f"[[用户:{page_title}|{page_title}]]"
+    else:
+        link = f"[[{page_title}]]"
+    if page_info.deceased:
+        return f"{{{{Departed|{link}}}}}"
+    return link
+
+def write_group_entries(out: TextIO, group_name: str, buckets: Mapping[str, Sequence[PageInfo]]) -> None:
+    """写出一个分组的全部条目（|listN的内容），buckets为各首字母已排序的条目"""
+    # Extract letters from group name (e.g., "A·B·C·D" -> ["A", "B", "C", "D"])
+    letters_in_group = [letter for letter in group_name.split("·") if letter.isalpha() or letter == "#"]
+
+    # Write entries for this group letter by letter, separated by {{·}}
+    first = True
+    for letter in letters_in_group:
+        if not buckets.get(letter):
+            continue
+        if not first:
+            out.write(_ENTRY_SEPARATOR)
+        out.write(_ENTRY_SEPARATOR.join(map(_format_entry, buckets[letter])))
+        first = False
+
+def write_group_row(out: TextIO, number: int, group_name: str, buckets: Mapping[str, Sequence[PageInfo]]) -> None:
+    """写出模板中的一个分组（|groupN与|listN两行），buckets为各首字母已排序的条目"""
+    out.write(f"|group{number} = {group_name}\n|list{number} = ")
+    write_group_entries(out, group_name, buckets)
+    out.write("\n\n")
+
+def subpage_title(page_title: str, letter: str) -> str:
+    """
+    首字母子页面的标题，例如'模板:人物/A'（'#'不能出现在页面标题中，改为'其他'）。
+
+    子页面按首字母而不是按分组划分：分组方案变化时只需要更新父模板，子页面的标题和内容都不变。
+    """
+    return f"{page_title}/{'其他' if letter == '#' else letter}"
+
+def _letter_entries(pages: Sequence[PageInfo]) -> str:
+    """一个首字母下全部条目的文本"""
+    return _ENTRY_SEPARATOR.join(map(_format_entry, pages))
+
+def _render_split(grouping: Sequence[str], texts: Mapping[str, str], page_title: str) -> tuple[str, dict[str, str]]:
+    """由各首字母的条目文本组装嵌入子页面的父模板和各子页面内容"""
+    parent = [_TEMPLATE_HEADER]
+    subpages: dict[str, str] = {}
+    for i, group_name in enumerate(grouping, 1):
+        transclusions = []
+        for letter in group_name.split("·"):
+            if not texts.get(letter):
+                continue
+            title = subpage_title(page_title, letter)
+            transclusions.append(f"{{{{{title}}}}}")
+            subpages[title] = _SUBPAGE_HEADER.format(page_title=page_title) + texts[letter]
+        # 展开后与write_group_entries相同：相邻字母的条目之间以_ENTRY_SEPARATOR分隔
+        parent.append(f"|group{i} = {group_name}\n|list{i} = {_ENTRY_SEPARATOR.join(transclusions)}\n\n")
+    parent.append(_TEMPLATE_FOOTER)
+    return "".join(parent), subpages
+
+def _group_pages(
+    pinyinized_titles: List[PageInfo],
+    max_group_size: int,
+    target_groups: Optional[int],
+) -> tuple[dict[str, List[PageInfo]], list[str]]:
+    """按首字母分桶并计算分组方案，返回(各首字母的条目, 分组方案)"""
+    # Group pages by first letter of pinyin (computed by get_pinyinized_page_list)
+    groups: dict[str, List[PageInfo]] = {}
     for page_info in pinyinized_titles:
-        if page_info["pinyin"]:
-            first_char = page_info["pinyin"][0].upper()
-        else:
-            first_char = "#"
-
-        # Handle non-alphabetic characters (only A-Z considered alphabetic)
-        if not ('A' <= first_char <= 'Z'):
-            first_char = "#"
-
+        first_char = page_info.pinyin_group
         if first_char not in groups:
             groups[first_char] = []
         groups[first_char].append(page_info)
@@ -171,73 +569,12 @@ def generate_template(
     total_count = sum(len(group) for group in groups.values())
     logging.info(f"总计: {total_count} 人")
 
-    # Calculate balanced grouping scheme
-    def calculate_balanced_grouping(groups, max_group_size=40):
-        """
-        计算最均衡的分组方案，保持字母顺序不变
-        """
-        sorted_letters = sorted([l for l in groups.keys() if l != '#'])
-        if '#' in groups:
-            sorted_letters.append('#')
-        counts = [len(groups[letter]) for letter in sorted_letters]
-        n = len(counts)
-
-        if n == 0:
-            return []
-
-        # 估算最优组数 - 现在基于max_group_size计算最少需要的组数
-        min_groups_needed = max(1, (total_count + max_group_size - 1) // max_group_size)  # 向上取整
-        estimated_groups = min_groups_needed
-
-        # 尝试不同的组数，选择方差最小的
-        best_result = None
-        best_variance = float('inf')
-
-        for num_groups in range(max(1, estimated_groups - 2), min(len(sorted_letters) + 1, estimated_groups + 3)):
-            # 使用贪心算法进行分组 - 现在严格遵守max_group_size限制
-            groups_split = []
-            current_group = []
-            current_sum = 0
-
-            for i, (letter, count) in enumerate(zip(sorted_letters, counts)):
-                # 如果当前组为空，直接添加
-                if len(current_group) == 0:
-                    current_group = [letter]
-                    current_sum = count
-                # 检查添加当前字母是否会超过最大组大小
-                elif current_sum + count <= max_group_size:
-                    # 添加到当前组
-                    current_group.append(letter)
-                    current_sum += count
-                else:
-                    # 当前组已达到最大大小，开始新组
-                    groups_split.append(current_group)
-                    current_group = [letter]
-                    current_sum = count
-
-            # 添加最后一组
-            if current_group:
-                groups_split.append(current_group)
-
-            # 计算当前分组的方差
-            group_sizes = []
-            for group in groups_split:
-                size = sum(len(groups[letter]) for letter in group)
-                group_sizes.append(size)
-
-            # 检查是否所有组都符合最大大小限制
-            if all(size <= max_group_size for size in group_sizes):
-                mean_size = total_count / len(group_sizes)
-                variance = sum((size - mean_size) ** 2 for size in group_sizes) / len(group_sizes)
-
-                if variance < best_variance:
-                    best_variance = variance
-                    best_result = ['·'.join(group) for group in groups_split]
-
-        return best_result if best_result else [letter for letter in sorted_letters]
-
     # Generate recommended grouping scheme
-    recommended_grouping = calculate_balanced_grouping(groups)
+    recommended_grouping = calculate_balanced_grouping(
+        {letter: len(members) for letter, members in groups.items()},
+        max_group_size=max_group_size,
+        target_groups=target_groups,
+    )
     logging.info(f"推荐的分组方案: {recommended_grouping}")
 
     # Calculate and log size of each recommended group
@@ -246,62 +583,288 @@ def generate_template(
         size = sum(len(groups[letter]) for letter in letters)
         logging.info(f"  推荐组{i+1} ({group}): {size}人")
 
-    # Use the recommended grouping scheme instead of default one
-    grouping_scheme = recommended_grouping
-
-    # Create template string with noinclude header
-    template = "<noinclude>\n"
-    template += "== 编辑须知 ==\n"
-    template += "# 兽圈是一个包容性非常强的群体，即便你不出名，你没有拿得出手的作品，'''甚至你认为你只是一个普通人'''，你都可以在这里创建属于你自己的词条。\n"
-    template += "# 欢迎每一位毛茸茸创建属于自己的词条或修订关于自己的词条，因为'''你比任何人都要了解你自己'''。\n"
-    template += "# 该模板由机器人维护。当你创建了属于你的词条后，你的名字将于次日或者当日早上7点出现在这个页面上。\n"
-    template += "# 你可以在[[gh:TimXiedada/wikifur-persons-template-bot|这个GitHub仓库]]找到机器人的源代码（一部分模块使用Vibe Coding方式开发）。\n"
-    template += "# WikiFur是一个比较专业（或者说严肃）的百科平台，请各位在编辑词条时不要使用太过主观（或随意）的语言。\n"
-    template += "# WikiFur并不是一个新闻的收集仓库，除非是十分重要的事件，否则请不要加入过多的时事性内容。\n"
-    # template += "# 因为精力有限，以上内容可能无法包含全部毛茸茸，需要大家修订补充。\n"
-    template += "# 基于现代中文出版物的做法，该模板中，逝世的人物将会用 {{Departed|示亡号}} 标记。\n\n"
-    template += "== 模板正文 == \n"
-    template += "</noinclude>\n"
-    template += "{{Navbox\n"
-    template += "|name = 人物\n"
-    template += "|title = 已收录的人物（总览）\n"
-    template += "|group1 = 成员\n"
-    template += "|list1=\n\n"
-    template += "{{Navbox subgroup\n"
+    return sorted_groups, recommended_grouping
+
+def write_template(
+    pinyinized_titles: List[PageInfo],
+    out: TextIO,
+    max_group_size: int = 40,
+    target_groups: Optional[int] = None,
+) -> None:
+    """
+    生成人物导航模板并逐段写入out。
+
+    模板按固定开头、各分组行、固定结尾的顺序直接写出，
+    每次只拼接一个字母的条目，不再构造整行或整个模板的中间字符串，
+    因此可以直接流式输出到标准输出或文件。
+
+    Args:
+        pinyinized_titles: 已按拼音排序的页面列表
+        out: 可写的文本流
+        max_group_size: 每个分组的最大人数
+        target_groups: 目标分组数（见calculate_balanced_grouping）
+    """
+    sorted_groups, grouping_scheme = _group_pages(pinyinized_titles, max_group_size, target_groups)
+
+    # Write the noinclude header
+    out.write(_TEMPLATE_HEADER)
 
     # Create letter groups according to grouping_scheme
     for i, group_name in enumerate(grouping_scheme, 1):
-        template += f"|group{i} = {group_name}\n"
-
-        # Extract letters from group name (e.g., "A·B·C·D" -> ["A", "B", "C", "D"])
-        letters_in_group = [letter for letter in group_name.split("·") if letter.isalpha() or letter == "#"]
-
-        # Collect entries for this group
-        entries = []
-        for letter in letters_in_group:
-            if letter in sorted_groups:
-                for page_info in sorted_groups[letter]:
-                    page_title = page_info["page_title"]
-                    if page_info.get("user_page"):
-                        link = f"[[用户:{page_title}|{page_title}]]"
-                    else:
-                        link = f"[[{page_title}]]"
-                    if page_info.get("deceased"):
-                        entries.append(f"{{{{Departed|{link}}}}}")
-                    else:
-                        entries.append(link)
-
-        # Join entries with separator
-        list_content = " {{·}} ".join(entries) if entries else ""
-        template += f"|list{i} = {list_content}\n\n"
+        write_group_row(out, i, group_name, sorted_groups)
 
     # Add the未创建词条 group
-    template += "|group10 = 未在 [[WikiFur]] 创建词条\n"
-    template += "|list10 = >>>>>>>>请前往[[模板:人物/未创建词条人物列表]]查看。<<<<<<<<\n"
+    out.write(_TEMPLATE_FOOTER)
 
-    template += "}}\n\n"
-    template += "}}\n\n"
-    template += "<noinclude>\n\n"
-    template += "[[分類:相關內容目錄|{{PAGENAME}}]]</noinclude>\n"
+def generate_template(
+    pinyinized_titles: List[PageInfo],
+    max_group_size: int = 40,
+    target_groups: Optional[int] = None,
+) -> str:
+    """生成人物导航模板，返回完整的模板文本（参数见write_template）"""
+    builder = _StringBuilder()
+    write_template(pinyinized_titles, builder, max_group_size=max_group_size, target_groups=target_groups)
+    return builder.getvalue()
+
+def generate_split_template(
+    pinyinized_titles: List[PageInfo],
+    page_title: str = "模板:人物",
+    max_group_size: int = 40,
+    target_groups: Optional[int] = None,
+) -> tuple[str, dict[str, str]]:
+    """
+    生成按首字母拆分的人物模板。
+
+    每个首字母的条目放在单独的子页面（见subpage_title）中，父模板的|listN嵌入该分组各字母的子页面，
+    因此新增一个人物时只有它的首字母子页面需要编辑，分组方案变化时只有父模板需要编辑。
+
+    Returns:
+        (父模板文本, {子页面标题: 子页面内容})
+    """
+    groups, grouping = _group_pages(pinyinized_titles, max_group_size, target_groups)
+    return _render_split(grouping, {letter: _letter_entries(pages) for letter, pages in groups.items()}, page_title)
+
+# ---- 增量更新 ----
+#
+# TemplateIndex按首字母桶保存按entry_sort_key排序的条目，插入、删除和修改逝世标记都通过
+# 二分查找定位。它记住各首字母上一次生成的条目文本：只有发生变化的字母会重新生成，
+# 其余字母直接沿用（分组方案变化也只需要重新拼接各行），因此每次更新的耗时与变化量而不是
+# 人物总数成正比。索引在进程内长期保留（--watch守护模式的多次推送之间），也可以连同各字母的
+# 条目文本保存到磁盘（见TemplateIndex.save/load），供之后的--incremental运行继续使用。
+
+# 索引文件的格式标记与版本；条目的格式（_format_entry）变化时需要递增版本
+INDEX_FORMAT = "template-index"
+INDEX_VERSION = 2
+
+class _Bucket:
+    """一个首字母下的条目：排序键与页面记录两个平行列表"""
+    __slots__ = ("keys", "pages")
+
+    def __init__(self):
+        self.keys: list[tuple[str, str, bool]] = []
+        self.pages: list[PageInfo] = []
+
+class TemplateIndex:
+    """
+    按(拼音, 标题, 是否为用户页面)排序的模板条目索引。
+
+    Args:
+        max_group_size: 每个分组的最大人数（见calculate_balanced_grouping）
+        target_groups: 目标分组数
+    """
+
+    def __init__(self, max_group_size: int = 40, target_groups: Optional[int] = None):
+        self.max_group_size = max_group_size
+        self.target_groups = target_groups
+        self._pages: dict[tuple[str, bool], PageInfo] = {}
+        self._buckets: dict[str, _Bucket] = {}
+        self._dirty: set[str] = set()
+        self._grouping: list[str] = []
+        self._texts: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __contains__(self, key: tuple[str, bool]) -> bool:
+        return key in self._pages
+
+    def _locate(self, page: PageInfo) -> tuple[_Bucket, int]:
+        bucket = self._buckets[page.pinyin_group]
+        sort_key = entry_sort_key(page)
+        position = bisect_left(bucket.keys, sort_key)
+        if position == len(bucket.keys) or bucket.keys[position] != sort_key:
+            raise KeyError(page.key)
+        return bucket, position
+
+    def insert(self, page: PageInfo) -> None:
+        """插入一个已填好pinyin与pinyin_group的页面；同一页面已存在时先将其移除"""
+        if page.key in self._pages:
+            self.remove(page.key)
+        bucket = self._buckets.get(page.pinyin_group)
+        if bucket is None:
+            bucket = self._buckets[page.pinyin_group] = _Bucket()
+        sort_key = entry_sort_key(page)
+        position = bisect_left(bucket.keys, sort_key)
+        bucket.keys.insert(position, sort_key)
+        bucket.pages.insert(position, page)
+        self._pages[page.key] = page
+        self._dirty.add(page.pinyin_group)
+
+    def remove(self, key: tuple[str, bool]) -> None:
+        """按(标题, 是否为用户页面)移除页面"""
+        page = self._pages.pop(key)
+        bucket, position = self._locate(page)
+        del bucket.keys[position]
+        del bucket.pages[position]
+        if not bucket.keys:
+            del self._buckets[page.pinyin_group]
+        self._dirty.add(page.pinyin_group)
+
+    def set_deceased(self, key: tuple[str, bool], deceased: bool) -> None:
+        """修改页面的逝世标记（不影响排序位置）"""
+        page = self._pages[key]
+        if page.deceased != deceased:
+            page.deceased = deceased
+            self._dirty.add(page.pinyin_group)
+
+    def sync(self, page_list: list[PageInfo], cache: Optional["PinyinCache"] = None,
+             workers: int = 1, chunk_size: int = 2000, table: Optional["PinyinTable"] = None) -> int:
+        """
+        使索引与完整的页面列表一致，只为新出现的标题计算拼音。
+
+        Returns:
+            int: 新增、移除或逝世标记变化的页面数
+        """
+        current = {page.key: page for page in page_list}
+        changed = 0
+        for key in self._pages.keys() - current.keys():
+            self.remove(key)
+            changed += 1
+
+        if cache is not None:
+            # 索引中已有的标题不再查询缓存，但仍在使用，需要续期以免被淘汰
+            cache.touch(key[0] for key in self._pages)
+
+        new_pages = [page for key, page in current.items() if key not in self._pages]
+        pinyins = transliterate_titles((page.page_title for page in new_pages), cache=cache,
+                                       workers=workers, chunk_size=chunk_size, table=table)
+        for page in new_pages:
+            page.pinyin = pinyins[page.page_title]
+            page.pinyin_group = pinyin_group(page.pinyin)
+            self.insert(page)
+            changed += 1
+
+        for key, page in current.items():
+            if self._pages[key].deceased != page.deceased:
+                self.set_deceased(key, page.deceased)
+                changed += 1
+        return changed
+
+    def pages(self) -> list[PageInfo]:
+        """按模板顺序返回所有页面"""
+        return [page for letter in sorted(self._buckets, key=lambda letter: (letter == "#", letter))
+                for page in self._buckets[letter].pages]
+
+    def _refresh(self) -> None:
+        """按当前条目更新分组方案，并只重新生成发生变化的首字母的条目文本"""
+        grouping = calculate_balanced_grouping(
+            {letter: len(bucket.keys) for letter, bucket in self._buckets.items()},
+            max_group_size=self.max_group_size,
+            target_groups=self.target_groups,
+        )
+        if grouping != self._grouping:
+            logging.info(f"  分组方案: {grouping}")
+            self._grouping = grouping
+        rerendered = 0
+        for letter in self._dirty:
+            bucket = self._buckets.get(letter)
+            if bucket is None:
+                self._texts.pop(letter, None)
+            else:
+                self._texts[letter] = _letter_entries(bucket.pages)
+                rerendered += 1
+        self._dirty.clear()
+        logging.info(f"  重新生成了 {rerendered}/{len(self._buckets)} 个首字母的条目")
+
+    def render(self) -> str:
+        """生成完整的模板文本，输出与generate_template相同"""
+        self._refresh()
+        rows = [f"|group{i} = {group_name}\n|list{i} = "
+                f"{_ENTRY_SEPARATOR.join(self._texts[letter] for letter in group_name.split('·') if letter in self._texts)}\n\n"
+                for i, group_name in enumerate(self._grouping, 1)]
+        return _TEMPLATE_HEADER + "".join(rows) + _TEMPLATE_FOOTER
+
+    def render_split(self, page_title: str = "模板:人物") -> tuple[str, dict[str, str]]:
+        """生成拆分为首字母子页面的模板，输出与generate_split_template相同"""
+        self._refresh()
+        return _render_split(self._grouping, self._texts, page_title)
+
+    def save(self, path: str, version: str) -> None:
+        """
+        原子地把索引保存为JSON：各首字母的条目（含拼音）与条目文本、上次的分组方案，
+        以及尚未重新生成的字母。
 
-    return template
\ No newline at end of file
+        Args:
+            path: 索引文件路径
+            version: 拼音的版本标识（见transliteration_version），版本变化时load会丢弃该文件
+        """
+        data = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_VERSION,
+            "transliteration": version,
+            "buckets": {letter: [[page.page_id, page.page_title, page.user_page, page.deceased, page.pinyin]
+                                 for page in bucket.pages]
+                        for letter, bucket in self._buckets.items()},
+            "grouping": self._grouping,
+            "texts": self._texts,
+            "dirty": sorted(self._dirty),
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, version: str, max_group_size: int = 40,
+             target_groups: Optional[int] = None) -> Optional["TemplateIndex"]:
+        """
+        读取save保存的索引。
+
+        文件不存在、无法解析、格式不符或拼音版本不同时返回None，调用方应从空索引开始。
+        分组参数可以与保存时不同：条目文本按首字母保存，与分组方案无关。
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT \
+                    or data.get("version") != INDEX_VERSION:
+                raise ValueError("不是受支持的模板索引文件")
+            if data.get("transliteration") != version:
+                logging.info(f"  模板索引 '{path}' 的拼音版本已变化，将重新建立索引")
+                return None
+            index = cls(max_group_size=max_group_size, target_groups=target_groups)
+            for letter, entries in data["buckets"].items():
+                bucket = index._buckets[letter] = _Bucket()
+                for page_id, page_title, user_page, deceased, pinyin in entries:
+                    page = PageInfo(page_id, page_title, user_page, deceased)
+                    page.pinyin = pinyin
+                    page.pinyin_group = pinyin_group(pinyin)
+                    if page.pinyin_group != letter:
+                        raise ValueError(f"条目 '{page_title}' 不属于分组 '{letter}'")
+                    bucket.keys.append(entry_sort_key(page))
+                    bucket.pages.append(page)
+                    index._pages[page.key] = page
+                if any(a >= b for a, b in zip(bucket.keys, bucket.keys[1:])):
+                    raise ValueError(f"分组 '{letter}' 的条目未按顺序排列")
+            index._grouping = list(data["grouping"])
+            index._texts = dict(data["texts"])
+            index._dirty = set(data["dirty"])
+            if not index._buckets.keys() <= index._texts.keys() | index._dirty:
+                raise ValueError("缺少部分首字母的条目文本")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"  无法读取模板索引 '{path}'，将重新建立索引: {e}")
+            return None
+        logging.info(f"  已读取模板索引 '{path}'（{len(index)} 个页面）")
+        return index
@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import difflib
+import json
+import re
+from typing import Iterator, Mapping, TypedDict, Union
+
+DIFF_FORMATS = ("entries", "json", "unified")
+
+_ROW_RE = re.compile(r"^\|(group|list)(\d+)\s*=\s*(.*?)\s*$", re.MULTILINE)
+_TRANSCLUSION_RE = re.compile(r"\{\{([^{}|]+)\}\}")
+_NOINCLUDE_RE = re.compile(r"<noinclude>.*?</noinclude>", re.DOTALL)
+_ENTRY_RE = re.compile(r"^(\{\{Departed\|)?\[\[(?:(用户):([^|\]]+)\|[^\]]*|([^|\]]+))\]\](?(1)\}\})$")
+
+class TemplateEntry(TypedDict):
+    title: str
+    user_page: bool
+    group: str
+    deceased: bool
+
+class MovedEntry(TypedDict):
+    title: str
+    user_page: bool
+    from_group: str
+    to_group: str
+
+class EntryDiff(TypedDict):
+    added: list[TemplateEntry]
+    removed: list[TemplateEntry]
+    moved: list[MovedEntry]
+    deceased_changed: list[TemplateEntry]
+
+def unified_diff(current: str, generated: str) -> Iterator[str]:
+    """生成当前页面内容与生成模板之间的统一差异（--- 当前页面，+++ 生成模板）"""
+    return difflib.unified_diff(
+        current.splitlines(keepends=True),
+        generated.splitlines(keepends=True),
+        fromfile='当前页面',
+        tofile='生成模板',
+    )
+
+def transcluded_titles(parent: str, page_title: str) -> list[str]:
+    """父模板中嵌入的首字母子页面标题（以page_title + '/'开头的嵌入）"""
+    prefix = page_title + "/"
+    return [title for title in _TRANSCLUSION_RE.findall(parent) if title.startswith(prefix)]
+
+def expand_subpages(parent: str, subpages: Mapping[str, str]) -> str:
+    """把父模板中嵌入的首字母子页面替换为子页面内容（去掉<noinclude>部分），还原为完整模板"""
+    def replace(match: re.Match) -> str:
+        title = match.group(1)
+        if title not in subpages:
+            return match.group(0)
+        return _NOINCLUDE_RE.sub("", subpages[title])
+    return _TRANSCLUSION_RE.sub(replace, parent)
+
+def parse_template(text: str) -> dict[tuple[str, bool], TemplateEntry]:
+    """
+    把人物模板解析为条目，键为(标题, 是否为用户页面)。
+
+    每个|listN行按{{·}}拆分为条目，所属分组取自它之前最近的|groupN行
+    （页脚的嵌套导航框会重复使用相同的编号）；
+    无法识别为人物链接的内容（如页脚的说明文字）会被忽略。
+    """
+    groups: dict[str, str] = {}
+    entries: dict[tuple[str, bool], TemplateEntry] = {}
+    for kind, number, row in _ROW_RE.findall(text):
+        if kind == "group":
+            groups[number] = row
+            continue
+        group = groups.get(number, "")
+        for item in row.split("{{·}}"):
+            match = _ENTRY_RE.match(item.strip())
+            if match is None:
+                continue
+            departed, user_ns, user_title, title = match.groups()
+            user_page = user_ns is not None
+            title = user_title if user_page else title
+            entries[(title, user_page)] = {"title": title, "user_page": user_page,
+                                           "group": group, "deceased": departed is not None}
+    return entries
+
+def entry_diff(current: str, generated: str) -> EntryDiff:
+    """按条目比较当前页面与生成模板：新增、移除、换组以及逝世标记变化的人物"""
+    old = parse_template(current)
+    new = parse_template(generated)
+    diff: EntryDiff = {
+        "added": [new[key] for key in new.keys() - old.keys()],
+        "removed": [old[key] for key in old.keys() - new.keys()],
+        "moved": [],
+        "deceased_changed": [],
+    }
+    for key in old.keys() & new.keys():
+        before, after = old[key], new[key]
+        if before["group"] != after["group"]:
+            diff["moved"].append({"title": key[0], "user_page": key[1],
+                                  "from_group": before["group"], "to_group": after["group"]})
+        if before["deceased"] != after["deceased"]:
+            diff["deceased_changed"].append(after)
+    for changes in diff.values():
+        changes.sort(key=lambda change: (change["title"], change["user_page"]))
+    return diff
+
+def _display_title(entry: Union[TemplateEntry, MovedEntry]) -> str:
+    return f"用户:{entry['title']}" if entry["user_page"] else entry["title"]
+
+def format_entry_diff(diff: EntryDiff) -> Iterator[str]:
+    """把条目差异格式化为便于审阅的文本行"""
+    for entry in diff["added"]:
+        yield f"+ {_display_title(entry)}（{entry['group']}）\n"
+    for entry in diff["removed"]:
+        yield f"- {_display_title(entry)}（{entry['group']}）\n"
+    for entry in diff["moved"]:
+        yield f"~ {_display_title(entry)}（{entry['from_group']} -> {entry['to_group']}）\n"
+    for entry in diff["deceased_changed"]:
+        action = "添加" if entry["deceased"] else "移除"
+        yield f"† {_display_title(entry)}（{action}逝世标记）\n"
+    counts = {name: len(changes) for name, changes in diff.items()}
+    yield (f"共新增 {counts['added']} 人，移除 {counts['removed']} 人，换组 {counts['moved']} 人，"
+           f"逝世标记变化 {counts['deceased_changed']} 人\n")
+
+def render_diff(current: str, generated: str, diff_format: str = "entries") -> Iterator[str]:
+    """按指定格式（见DIFF_FORMATS）输出当前页面与生成模板之间的差异"""
+    if diff_format == "unified":
+        return unified_diff(current, generated)
+    diff = entry_diff(current, generated)
+    if diff_format == "json":
+        return iter([json.dumps(diff, ensure_ascii=False, indent=2), "\n"])
+    return format_entry_diff(diff)
@@ -0,0 +1,712 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""
+离线的MediaWiki API替身。
+
+在进程内启动一个HTTP服务器，实现本项目（以及mwclient）用到的那一小部分api.php：
+站点信息、登录与令牌、分类成员（含分页续传）、最近更改、页面分类、页面文本和编辑
+（含编辑冲突）。数据来自录制的或合成的夹具（fixture），可以配置每个请求的延迟，
+从而在没有网络和凭证的情况下完整运行并计时整个流程。
+
+用法：
+    python fakewiki.py --synthetic 1000 --port 8080 --latency 0.05
+然后在config.ini中设置 domain=127.0.0.1:8080、scheme=http。
+"""
+import argparse
+import hashlib
+import http.cookies
+import json
+import logging
+import random
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+NAMESPACES = {
+    0: "",
+    1: "讨论",
+    2: "用户",
+    3: "用户讨论",
+    4: "WikiFur",
+    6: "文件",
+    10: "模板",
+    14: "分类",
+}
+# API也接受命名空间的英文规范名称
+_CANONICAL_NAMESPACES = {"Talk": 1, "User": 2, "User talk": 3, "Project": 4, "File": 6,
+                         "Template": 10, "Category": 14}
+
+API_MAX_LIMIT = 500
+SESSION_COOKIE = "fakewiki_session"
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def split_title(title: str) -> tuple[int, str]:
+    """把完整标题拆分为(命名空间, 不含前缀的标题)"""
+    title = title.replace("_", " ").strip()
+    if ":" in title:
+        prefix, rest = title.split(":", 1)
+        for ns, name in NAMESPACES.items():
+            if ns and prefix == name:
+                return ns, rest
+        if prefix in _CANONICAL_NAMESPACES:
+            return _CANONICAL_NAMESPACES[prefix], rest
+    return 0, title
+
+def full_title(ns: int, title: str) -> str:
+    return f"{NAMESPACES[ns]}:{title}" if ns else title
+
+class FakeWiki:
+    """
+    内存中的维基数据与提供api.php的HTTP服务器。
+
+    夹具格式（JSON）：
+        {
+          "username": "Bot", "password": "secret",
+          "pages": [
+            {"pageid": 1, "ns": 0, "title": "张三", "categories": ["人物"], "text": "..."},
+            ...
+          ]
+        }
+    其中title不含命名空间前缀，categories为不含"分类:"前缀的分类名。
+
+    Args:
+        fixture: 夹具数据
+        latency: 每个请求的额外延迟（秒）
+        conflicts: 接下来的多少次编辑请求强制返回editconflict，用于测试重试路径
+    """
+
+    def __init__(self, fixture: Optional[dict] = None, latency: float = 0.0, conflicts: int = 0):
+        fixture = fixture or {}
+        self.username = fixture.get("username", "Bot")
+        self.password = fixture.get("password", "secret")
+        self.latency = latency
+        self.conflicts = conflicts
+
+        self.request_count = 0
+        self.edit_count = 0
+        self._lock = threading.RLock()
+        self._sessions: dict[str, str] = {}
+        self._tokens: dict[str, str] = {}
+        self._pages: dict[int, dict] = {}
+        self._titles: dict[tuple[int, str], int] = {}
+        self._recentchanges: list[dict] = []
+        self._next_pageid = 1
+        self._next_revid = 1
+        self._next_rcid = 1
+        for page in fixture.get("pages", []):
+            self._create_page(page.get("ns", 0), page["title"], page.get("text", ""),
+                              page.get("categories", ()), page.get("pageid"))
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 数据操作 ----
+
+    def _create_page(self, ns: int, title: str, text: str = "", categories=(), pageid: Optional[int] = None) -> dict:
+        with self._lock:
+            if pageid is None:
+                pageid = self._next_pageid
+            self._next_pageid = max(self._next_pageid, pageid + 1)
+            page = {"pageid": pageid, "ns": ns, "title": title, "categories": set(categories), "revisions": []}
+            self._pages[pageid] = page
+            self._titles[(ns, title)] = pageid
+            self._add_revision(page, text, "创建页面")
+            return page
+
+    def _add_revision(self, page: dict, text: str, summary: str) -> dict:
+        revision = {
+            "revid": self._next_revid,
+            "parentid": page["revisions"][-1]["revid"] if page["revisions"] else 0,
+            "timestamp": _timestamp(),
+            "text": text,
+            "sha1": _sha1(text),
+            "comment": summary,
+        }
+        self._next_revid += 1
+        page["revisions"].append(revision)
+        return revision
+
+    def _record_change(self, **change) -> None:
+        change.setdefault("timestamp", _timestamp())
+        change["rcid"] = self._next_rcid
+        self._next_rcid += 1
+        self._recentchanges.append(change)
+
+    def get_page(self, title: str) -> Optional[dict]:
+        """按完整标题查找页面"""
+        with self._lock:
+            pageid = self._titles.get(split_title(title))
+            return self._pages.get(pageid) if pageid is not None else None
+
+    def page_text(self, title: str) -> str:
+        page = self.get_page(title)
+        return page["revisions"][-1]["text"] if page else ""
+
+    def add_page(self, title: str, categories=(), text: str = "") -> int:
+        """新建页面并加入分类（产生相应的分类变更事件），返回页面ID"""
+        ns, bare = split_title(title)
+        with self._lock:
+            page = self._create_page(ns, bare, text)
+            for category in categories:
+                self.add_to_category(title, category)
+            return page["pageid"]
+
+    def add_to_category(self, title: str, category: str, timestamp: Optional[str] = None) -> None:
+        """
+        把页面加入分类。
+
+        MediaWiki的分类变更由作业队列稍后写入，却带有修订版本的时间戳；
+        指定timestamp可以模拟这种时间戳早于已有更改的迟到事件。
+        """
+        self._set_membership(title, category, True, timestamp)
+
+    def remove_from_category(self, title: str, category: str, timestamp: Optional[str] = None) -> None:
+        """把页面移出分类，timestamp见add_to_category"""
+        self._set_membership(title, category, False, timestamp)
+
+    def _set_membership(self, title: str, category: str, member: bool, timestamp: Optional[str] = None) -> None:
+        with self._lock:
+            page = self.get_page(title)
+            if page is None or (category in page["categories"]) == member:
+                return
+            if member:
+                page["categories"].add(category)
+            else:
+                page["categories"].discard(category)
+            action = "已添加至分类" if member else "已从分类中移除"
+            self._record_change(type="categorize", ns=14, title=full_title(14, category),
+                                pageid=0, revid=page["revisions"][-1]["revid"], old_revid=0,
+                                comment=f"[[:{full_title(page['ns'], page['title'])}]]{action}",
+                                timestamp=timestamp or _timestamp())
+
+    def move_page(self, title: str, new_title: str) -> None:
+        with self._lock:
+            page = self.get_page(title)
+            old_key = (page["ns"], page["title"])
+            del self._titles[old_key]
+            page["ns"], page["title"] = split_title(new_title)
+            self._titles[(page["ns"], page["title"])] = page["pageid"]
+            self._record_change(type="log", ns=old_key[0], title=full_title(*old_key), pageid=page["pageid"],
+                                revid=0, old_revid=0, logtype="move", logaction="move",
+                                logparams={"target_ns": page["ns"], "target_title": new_title})
+
+    def delete_page(self, title: str) -> None:
+        with self._lock:
+            page = self.get_page(title)
+            del self._titles[(page["ns"], page["title"])]
+            del self._pages[page["pageid"]]
+            self._record_change(type="log", ns=page["ns"], title=full_title(page["ns"], page["title"]),
+                                pageid=page["pageid"], revid=0, old_revid=0, logtype="delete",
+                                logaction="delete", logparams={})
+
+    def category_members(self, category: str) -> list[dict]:
+        """按排序键（不含前缀的标题）列出分类成员"""
+        with self._lock:
+            members = [page for page in self._pages.values() if category in page["categories"]]
+        return sorted(members, key=lambda page: (page["title"], page["pageid"]))
+
+    # ---- API实现 ----
+
+    def handle(self, params: dict[str, str], session: Optional[str]) -> tuple[dict, Optional[str]]:
+        """处理一次api.php请求，返回(响应, 需要设置的会话ID)"""
+        with self._lock:
+            self.request_count += 1
+            action = params.get("action")
+            new_session = None
+            if session is None or session not in self._sessions:
+                session = secrets.token_hex(8)
+                self._sessions[session] = ""
+                new_session = session
+            user = self._sessions[session]
+            try:
+                if action == "query":
+                    result = self._query(params, session, user)
+                elif action == "login":
+                    result = self._login(params, session)
+                elif action == "edit":
+                    result = self._edit(params, session, user)
+                else:
+                    result = self._error("unknown_action", f"Unrecognized value for parameter \"action\": {action}.")
+            except KeyError as e:
+                result = self._error("missingparam", f"The \"{e.args[0]}\" parameter must be set.")
+            return result, new_session
+
+    @staticmethod
+    def _error(code: str, info: str) -> dict:
+        return {"error": {"code": code, "info": info}}
+
+    @staticmethod
+    def _limit(value: Optional[str], default: int = 10) -> int:
+        if value is None:
+            return default
+        if value == "max":
+            return API_MAX_LIMIT
+        return max(1, min(int(value), API_MAX_LIMIT))
+
+    def _page_info(self, page: dict) -> dict:
+        latest = page["revisions"][-1]
+        return {
+            "pageid": page["pageid"],
+            "ns": page["ns"],
+            "title": full_title(page["ns"], page["title"]),
+            "contentmodel": "wikitext",
+            "touched": latest["timestamp"],
+            "lastrevid": latest["revid"],
+            "length": len(latest["text"].encode("utf-8")),
+            "protection": [],
+            "restrictiontypes": ["edit", "move"],
+        }
+
+    def _resolve_pages(self, params: dict[str, str]) -> list[dict]:
+        """根据titles/pageids/revids参数解析页面，不存在的页面以missing表示"""
+        pages = []
+        missing_id = -1
+        for title in filter(None, params.get("titles", "").split("|")):
+            page = self.get_page(title)
+            if page is None:
+                ns, bare = split_title(title)
+                pages.append({"ns": ns, "title": full_title(ns, bare), "missing": "", "_key": str(missing_id)})
+                missing_id -= 1
+            else:
+                pages.append(page)
+        for pageid in filter(None, params.get("pageids", "").split("|")):
+            page = self._pages.get(int(pageid))
+            pages.append(page if page else {"pageid": int(pageid), "missing": "", "_key": pageid})
+        for revid in filter(None, params.get("revids", "").split("|")):
+            for page in self._pages.values():
+                if any(rev["revid"] == int(revid) for rev in page["revisions"]):
+                    pages.append(page)
+                    break
+        return pages
+
+    def _query(self, params: dict[str, str], session: str, user: str) -> dict:
+        query: dict = {}
+        result: dict = {"batchcomplete": "", "query": query}
+        metas = set(filter(None, params.get("meta", "").split("|")))
+        props = set(filter(None, params.get("prop", "").split("|")))
+
+        if "siteinfo" in metas:
+            query["general"] = {
+                "sitename": "WikiFur",
+                "generator": "MediaWiki 1.39.0",
+                "lang": "zh",
+                "servername": "fakewiki",
+            }
+            query["namespaces"] = {str(ns): {"id": ns, "*": name} for ns, name in NAMESPACES.items()}
+        if "userinfo" in metas:
+            if user:
+                query["userinfo"] = {"id": 1, "name": user, "groups": ["*", "user", "bot"],
+                                     "rights": ["read", "edit", "bot"]}
+            else:
+                query["userinfo"] = {"id": 0, "name": "127.0.0.1", "anon": "", "groups": ["*"],
+                                     "rights": ["read"]}
+        if "tokens" in metas:
+            token_type = params.get("type", "csrf")
+            if token_type == "csrf" and not user:
+                query["tokens"] = {"csrftoken": "+\\"}
+            else:
+                token = self._tokens.setdefault(f"{session}:{token_type}", secrets.token_hex(16) + "+\\")
+                query["tokens"] = {f"{token_type}token": token}
+
+        list_name = params.get("list")
+        if list_name == "categorymembers":
+            self._list_categorymembers(params, "cm", result)
+        elif list_name == "recentchanges":
+            self._list_recentchanges(params, result)
+
+        if params.get("generator") == "categorymembers":
+            pages = self._list_categorymembers(params, "gcm", result)
+        elif any(key in params for key in ("titles", "pageids", "revids")):
+            pages = self._resolve_pages(params)
+        else:
+            pages = None
+        if pages is not None:
+            query["pages"] = {}
+            for page in pages:
+                if "missing" in page:
+                    query["pages"][page["_key"]] = {k: v for k, v in page.items() if k != "_key"}
+                    continue
+                info = self._page_info(page) if "info" in props or not props else {
+                    "pageid": page["pageid"], "ns": page["ns"], "title": full_title(page["ns"], page["title"])}
+                if "categories" in props:
+                    self._prop_categories(params, page, info)
+                if "revisions" in props:
+                    self._prop_revisions(params, page, info)
+                query["pages"][str(page["pageid"])] = info
+        return result
+
+    def _list_categorymembers(self, params: dict[str, str], prefix: str, result: dict) -> list[dict]:
+        category = split_title(params[prefix + "title"])[1]
+        members = self.category_members(category)
+        namespaces = params.get(prefix + "namespace")
+        if namespaces:
+            allowed = {int(ns) for ns in namespaces.split("|")}
+            members = [page for page in members if page["ns"] in allowed]
+        if params.get(prefix + "sort") == "timestamp":
+            # 分类变更时间近似为页面最后一次修订的时间
+            members.sort(key=lambda page: page["revisions"][-1]["timestamp"],
+                         reverse=params.get(prefix + "dir") in ("desc", "older"))
+            start = params.get(prefix + "start")
+            if start:
+                members = [page for page in members if page["revisions"][-1]["timestamp"] >= start]
+
+        offset = int(params.get(prefix + "continue", "0"))
+        limit = self._limit(params.get(prefix + "limit"))
+        chunk = members[offset:offset + limit]
+        if offset + limit < len(members):
+            result["continue"] = {prefix + "continue": str(offset + limit), "continue": f"{prefix}continue||"}
+        if prefix == "gcm":
+            return chunk
+
+        props = params.get("cmprop", "ids|title").split("|")
+        entries = []
+        for page in chunk:
+            entry = {}
+            if "ids" in props:
+                entry["pageid"] = page["pageid"]
+            if "title" in props:
+                entry["ns"] = page["ns"]
+                entry["title"] = full_title(page["ns"], page["title"])
+            if "timestamp" in props:
+                entry["timestamp"] = page["revisions"][-1]["timestamp"]
+            entries.append(entry)
+        result["query"]["categorymembers"] = entries
+        return chunk
+
+    def _list_recentchanges(self, params: dict[str, str], result: dict) -> None:
+        # 与MediaWiki相同，按(时间戳, rcid)排序，而不是按写入顺序
+        changes = sorted(self._recentchanges, key=lambda change: (change["timestamp"], change["rcid"]))
+        if params.get("rcdir", "older") == "older":
+            changes.reverse()
+            start = params.get("rcstart")
+            if start:
+                changes = [change for change in changes if change["timestamp"] <= start]
+        else:
+            start = params.get("rcstart")
+            if start:
+                changes = [change for change in changes if change["timestamp"] >= start]
+        types = params.get("rctype")
+        if types:
+            allowed_types = set(types.split("|"))
+            changes = [change for change in changes if change["type"] in allowed_types]
+        namespaces = params.get("rcnamespace")
+        if namespaces:
+            allowed = {int(ns) for ns in namespaces.split("|")}
+            changes = [change for change in changes if change["ns"] in allowed]
+
+        offset = int(params.get("rccontinue", "0"))
+        limit = self._limit(params.get("rclimit"))
+        chunk = changes[offset:offset + limit]
+        if offset + limit < len(changes):
+            result["continue"] = {"rccontinue": str(offset + limit), "continue": "-||"}
+
+        props = set(params.get("rcprop", "title|timestamp|ids").split("|"))
+        entries = []
+        for change in chunk:
+            entry = {"type": change["type"], "ns": change["ns"]}
+            if "title" in props:
+                entry["title"] = change["title"]
+            if "ids" in props:
+                entry.update(rcid=change["rcid"], pageid=change["pageid"],
+                             revid=change["revid"], old_revid=change["old_revid"])
+            if "timestamp" in props:
+                entry["timestamp"] = change["timestamp"]
+            if "comment" in props:
+                entry["comment"] = change.get("comment", "")
+            if "loginfo" in props and change["type"] == "log":
+                entry.update(logtype=change["logtype"], logaction=change["logaction"],
+                             logparams=change["logparams"])
+            entries.append(entry)
+        result["query"]["recentchanges"] = entries
+
+    @staticmethod
+    def _prop_categories(params: dict[str, str], page: dict, info: dict) -> None:
+        wanted = params.get("clcategories")
+        categories = sorted(page["categories"])
+        if wanted:
+            allowed = {split_title(title)[1] for title in wanted.split("|")}
+            categories = [category for category in categories if category in allowed]
+        if categories:
+            info["categories"] = [{"ns": 14, "title": full_title(14, category)} for category in categories]
+
+    def _prop_revisions(self, params: dict[str, str], page: dict, info: dict) -> None:
+        props = set(params.get("rvprop", "ids|timestamp|flags|comment|user").split("|"))
+        limit = self._limit(params.get("rvlimit"), default=1)
+        revisions = []
+        for revision in reversed(page["revisions"][-limit:]):
+            entry = {}
+            if "ids" in props:
+                entry.update(revid=revision["revid"], parentid=revision["parentid"])
+            if "timestamp" in props:
+                entry["timestamp"] = revision["timestamp"]
+            if "sha1" in props:
+                entry["sha1"] = revision["sha1"]
+            if "size" in props:
+                entry["size"] = len(revision["text"].encode("utf-8"))
+            if "comment" in props:
+                entry["comment"] = revision["comment"]
+            if "content" in props:
+                main = {"contentmodel": "wikitext", "contentformat": "text/x-wiki", "*": revision["text"]}
+                if "rvslots" in params:
+                    entry["slots"] = {"main": main}
+                else:
+                    entry.update(main)
+            revisions.append(entry)
+        info["revisions"] = revisions
+
+    def _login(self, params: dict[str, str], session: str) -> dict:
+        token = params.get("lgtoken")
+        if token is None or token != self._tokens.get(f"{session}:login"):
+            return {"login": {"result": "NeedToken", "token": self._tokens.setdefault(
+                f"{session}:login", secrets.token_hex(16) + "+\\")}}
+        if params.get("lgname") != self.username or params.get("lgpassword") != self.password:
+            return {"login": {"result": "Failed", "reason": "Incorrect username or password entered."}}
+        self._sessions[session] = self.username
+        return {"login": {"result": "Success", "lguserid": 1, "lgusername": self.username}}
+
+    def _edit(self, params: dict[str, str], session: str, user: str) -> dict:
+        # 与MediaWiki相同，匿名会话的CSRF令牌固定为"+\\"，之后再由assert=user拒绝匿名编辑
+        expected_token = self._tokens.get(f"{session}:csrf") if user else "+\\"
+        if params.get("token") != expected_token:
+            return self._error("badtoken", "Invalid CSRF token.")
+        if params.get("assert") == "user" and not user:
+            return self._error("assertuserfailed", "You are no longer logged in.")
+        self.edit_count += 1
+
+        title = params["title"]
+        page = self.get_page(title)
+        latest = page["revisions"][-1] if page else None
+        if self.conflicts > 0:
+            self.conflicts -= 1
+            return self._error("editconflict", "Edit conflict detected.")
+        if latest is not None:
+            base_revid = params.get("baserevid")
+            base_timestamp = params.get("basetimestamp")
+            if base_revid and int(base_revid) != latest["revid"]:
+                return self._error("editconflict", "Edit conflict detected.")
+            if base_timestamp and _normalize_timestamp(base_timestamp) < latest["timestamp"]:
+                return self._error("editconflict", "Edit conflict detected.")
+
+        # 与MediaWiki相同，保存前去掉末尾空白
+        text = params["text"].rstrip()
+        summary = params.get("summary", "")
+        if page is not None and params.get("createonly"):
+            return self._error("articleexists", "The article you tried to create has been created already.")
+        if page is None:
+            ns, bare = split_title(title)
+            page = self._create_page(ns, bare, text)
+            revision = page["revisions"][-1]
+            return {"edit": {"result": "Success", "pageid": page["pageid"], "title": title, "new": "",
+                             "oldrevid": 0, "newrevid": revision["revid"], "newtimestamp": revision["timestamp"]}}
+        if latest["text"] == text:
+            return {"edit": {"result": "Success", "pageid": page["pageid"], "title": title, "nochange": ""}}
+        revision = self._add_revision(page, text, summary)
+        self._record_change(type="edit", ns=page["ns"], title=full_title(page["ns"], page["title"]),
+                            pageid=page["pageid"], revid=revision["revid"], old_revid=latest["revid"],
+                            comment=summary)
+        return {"edit": {"result": "Success", "pageid": page["pageid"], "title": title,
+                         "oldrevid": latest["revid"], "newrevid": revision["revid"],
+                         "newtimestamp": revision["timestamp"]}}
+
+    # ---- 服务器 ----
+
+    @property
+    def host(self) -> str:
+        """供mwclient.Site使用的主机名（含端口）"""
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self, port: int = 0) -> "FakeWiki":
+        """在后台线程中启动服务器，port为0时自动选择空闲端口"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeWiki":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def site(self, login: bool = True):
+        """创建指向本服务器的mwclient.Site（可选地登录）"""
+        import mwclient
+        site = mwclient.Site(self.host, path="/w/", scheme="http")
+        if login:
+            site.login(username=self.username, password=self.password)
+        return site
+
+def _normalize_timestamp(value: str) -> str:
+    """把MediaWiki接受的两种时间戳格式统一为ISO 8601"""
+    if "T" in value:
+        return value
+    return datetime.strptime(value, "%Y%m%d%H%M%S").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _make_handler(wiki: FakeWiki):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, params: dict[str, str]) -> None:
+            if wiki.latency:
+                time.sleep(wiki.latency)
+            cookies = http.cookies.SimpleCookie(self.headers.get("Cookie", ""))
+            session = cookies[SESSION_COOKIE].value if SESSION_COOKIE in cookies else None
+            result, new_session = wiki.handle(params, session)
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if new_session:
+                self.send_header("Set-Cookie", f"{SESSION_COOKIE}={new_session}; Path=/; HttpOnly")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self, query: str) -> Optional[dict[str, str]]:
+            url = urlparse(self.path)
+            if url.path != "/w/api.php":
+                self.send_error(404)
+                return None
+            return {key: values[-1] for key, values in parse_qs(query, keep_blank_values=True).items()}
+
+        def do_GET(self) -> None:
+            params = self._route(urlparse(self.path).query)
+            if params is not None:
+                self._respond(params)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8")
+            params = self._route(body)
+            if params is not None:
+                self._respond(params)
+
+        def log_message(self, format: str, *args) -> None:
+            logging.debug("fakewiki: " + format, *args)
+
+    return Handler
+
+_HAN = "张王李赵刘陈杨黄周吴徐孙马朱胡林郭何高罗郑梁谢宋唐许邓冯韩曹曾彭萧蔡潘田董袁于余叶蒋杜苏魏程吕丁沈任姚卢傅钟姜崔谭廖范汪陆金石戴贾韦夏邱方侯邹熊孟秦白江阎薛尹段雷黎史龙陶贺顾毛郝龚邵万钱严赖覃洪武莫孔狐狼龙虎猫犬兔鹿熊"
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをんアイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンキャシュチョッー"
+_LATIN = "abcdefghijklmnopqrstuvwxyz"
+
+def synthetic_title(rng: random.Random) -> str:
+    """随机生成一个人物标题：以汉字为主，混有假名、拉丁字母、数字开头以及中英混合的名字"""
+    kind = rng.random()
+    if kind < 0.55:
+        return "".join(rng.choice(_HAN) for _ in range(rng.randint(2, 4)))
+    if kind < 0.67:
+        return "".join(rng.choice(_KANA) for _ in range(rng.randint(2, 6)))
+    if kind < 0.87:
+        return rng.choice(_LATIN).upper() + "".join(rng.choice(_LATIN) for _ in range(rng.randint(2, 9)))
+    if kind < 0.92:
+        return str(rng.randint(0, 999)) + "".join(rng.choice(_HAN) for _ in range(rng.randint(0, 2)))
+    return rng.choice(_HAN) + rng.choice(_LATIN).upper() + "".join(rng.choice(_LATIN) for _ in range(rng.randint(0, 4)))
+
+def synthetic_fixture(count: int, deceased_ratio: float = 0.02, user_ratio: float = 0.3,
+                      deceased_only_ratio: float = 0.002, seed: int = 0) -> dict:
+    """
+    生成包含count个人物页面的合成夹具。
+
+    标题见synthetic_title，一部分位于用户命名空间，一部分同时属于'逝世的人物'分类，
+    极少数只属于'逝世的人物'分类，另外混入少量应被过滤的子页面。
+    """
+    rng = random.Random(seed)
+    pages = []
+    titles = set()
+    while len(pages) < count:
+        title = synthetic_title(rng)
+        ns = 2 if rng.random() < user_ratio else 0
+        if (ns, title) in titles:
+            continue
+        titles.add((ns, title))
+        roll = rng.random()
+        if roll < deceased_only_ratio:
+            categories = ["逝世的人物"]
+        elif roll < deceased_only_ratio + deceased_ratio:
+            categories = ["人物", "逝世的人物"]
+        else:
+            categories = ["人物"]
+        pages.append({"pageid": len(pages) + 1, "ns": ns, "title": title, "categories": categories, "text": ""})
+    # 子页面会被客户端过滤，用来确认过滤逻辑
+    pages.append({"pageid": len(pages) + 1, "ns": 2, "title": "Someone/沙盒", "categories": ["人物"], "text": ""})
+    return {"username": "Bot", "password": "secret", "pages": pages}
+
+def record_fixture(site, path: str, extra_pages=("模板:人物",)) -> None:
+    """
+    从真实站点录制夹具：两个人物分类的成员以及指定页面的当前文本。
+
+    Args:
+        site: 已连接的mwclient.Site
+        path: 输出的夹具文件路径
+        extra_pages: 需要一并录制文本的页面（例如要推送的模板页面）
+    """
+    pages: dict[int, dict] = {}
+    for category in ("人物", "逝世的人物"):
+        for page in site.categories[category]:
+            entry = pages.setdefault(page.pageid, {"pageid": page.pageid, "ns": page.namespace,
+                                                   "title": page.page_title, "categories": [], "text": ""})
+            entry["categories"].append(category)
+    for title in extra_pages:
+        page = site.pages[title]
+        if page.exists:
+            pages[page.pageid] = {"pageid": page.pageid, "ns": page.namespace, "title": page.page_title,
+                                  "categories": [], "text": page.text()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"username": "Bot", "password": "secret", "pages": list(pages.values())},
+                  f, ensure_ascii=False, indent=1)
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="启动离线的MediaWiki API替身服务器")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixture", help="夹具JSON文件路径")
+    source.add_argument("--synthetic", type=int, default=100, help="合成夹具的人物数量（默认为100）")
+    parser.add_argument("--port", type=int, default=8080, help="监听端口（默认为8080）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的额外延迟（秒）")
+    parser.add_argument("--conflicts", type=int, default=0, help="接下来多少次编辑返回编辑冲突")
+    parser.add_argument("--churn", type=float, default=0.0, metavar="SECONDS",
+                        help="每隔多少秒新增一个合成人物，用于观察 --watch 守护模式（默认不新增）")
+    args = parser.parse_args(argv[1:])
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    if args.fixture:
+        with open(args.fixture, encoding="utf-8") as f:
+            fixture = json.load(f)
+    else:
+        fixture = synthetic_fixture(args.synthetic)
+    wiki = FakeWiki(fixture, latency=args.latency, conflicts=args.conflicts).start(args.port)
+    logging.info(f"假维基已启动: http://{wiki.host}/w/api.php （用户名 {wiki.username}，密码 {wiki.password}）")
+    logging.info(f"在config.ini中设置 domain={wiki.host}、scheme=http 即可让机器人连接到此服务器")
+    rng = random.Random()
+    try:
+        while True:
+            if args.churn > 0:
+                time.sleep(args.churn)
+                title = synthetic_title(rng)
+                if wiki.get_page(title) is None:
+                    wiki.add_page(title, ["人物"])
+                    logging.info(f"新增人物 '{title}'")
+            else:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        wiki.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,58 +1,152 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2026 Xie Youtian
-import mwclient
-from typing import TypedDict, NotRequired
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator, TYPE_CHECKING
 
-class PageInfo(TypedDict):
-    page_id: int
-    page_title: str
-    user_page: bool
-    deceased: NotRequired[bool]
+if TYPE_CHECKING:
+    import mwclient
 
-def get_page_list(site: mwclient.Site) -> list[PageInfo]:
-    import logging
-    logging.info("  正在获取'人物'分类中的页面列表...")
-    
-    page_list_tagged: list = []
-    cat = site.categories["人物"]
-    cat_deceased = site.categories["逝世的人物"]
+class PageInfo:
+    """
+    一个人物页面的记录。
+
+    使用__slots__而不是字典，每个人物只占一个小对象。同一个对象从get_page_list
+    经get_pinyinized_page_list（原地填入pinyin与pinyin_group）一直传递到模板生成，
+    各阶段之间不再复制。
+    """
+    __slots__ = ("page_id", "page_title", "user_page", "deceased", "pinyin", "pinyin_group")
+
+    def __init__(self, page_id: int, page_title: str, user_page: bool, deceased: bool = False):
+        self.page_id = page_id
+        self.page_title = page_title
+        self.user_page = user_page
+        self.deceased = deceased
+        self.pinyin = ""
+        self.pinyin_group = "#"
+
+    @property
+    def key(self) -> tuple[str, bool]:
+        """用于去重的(标题, 是否为用户页面)"""
+        return (self.page_title, self.user_page)
+
+    def __repr__(self) -> str:
+        return (f"PageInfo(page_id={self.page_id!r}, page_title={self.page_title!r}, "
+                f"user_page={self.user_page!r}, deceased={self.deceased!r}, pinyin={self.pinyin!r})")
+
+# 页面列表文件（--save-snapshot/--from-snapshot）的格式标记与版本。
+# 格式标记用来与snapshot.py的增量同步快照区分，两者的version各自独立
+PAGE_LIST_FORMAT = "page-list"
+PAGE_LIST_VERSION = 1
+
+def save_page_list(path: str, page_list: list[PageInfo]) -> None:
+    """
+    把页面列表原子地保存到JSON文件，供离线生成模板使用。
+
+    每个页面保存为[page_id, page_title, user_page, deceased]，顺序与传入的列表相同：
+    先获取后转换时为get_page_list的顺序，边获取边转换时已按拼音排序（见convert.pinyinize_category_stream）。
+    读取时不依赖保存的顺序，生成模板前总会重新排序。
+    """
+    data = {
+        "format": PAGE_LIST_FORMAT,
+        "version": PAGE_LIST_VERSION,
+        "saved_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "pages": [[page.page_id, page.page_title, page.user_page, page.deceased] for page in page_list],
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def parse_page_list(data: object) -> list[PageInfo]:
+    """
+    从save_page_list保存的JSON数据还原页面列表。
+
+    没有格式标记的文件（早期版本保存的）也可以读取。格式标记、版本或结构不符时抛出ValueError。
+    """
+    if not isinstance(data, dict) or data.get("format", PAGE_LIST_FORMAT) != PAGE_LIST_FORMAT:
+        raise ValueError("不是页面列表文件")
+    if data.get("version") != PAGE_LIST_VERSION:
+        raise ValueError(f"不支持的页面列表文件版本: {data.get('version')!r}")
+    pages = data.get("pages")
+    if not isinstance(pages, list):
+        raise ValueError("页面列表文件缺少pages数组")
+    page_list: list[PageInfo] = []
+    for i, entry in enumerate(pages):
+        if not (isinstance(entry, list) and len(entry) == 4 and isinstance(entry[0], int)
+                and isinstance(entry[1], str) and isinstance(entry[2], bool) and isinstance(entry[3], bool)):
+            raise ValueError(f"页面列表文件的第 {i + 1} 个页面格式不正确: {entry!r}")
+        page_list.append(PageInfo(*entry))
+    return page_list
+
+def load_page_list(path: str) -> list[PageInfo]:
+    """读取save_page_list保存的页面列表，格式不符时抛出ValueError（见parse_page_list）"""
+    with open(path, encoding="utf-8") as f:
+        return parse_page_list(json.load(f))
+
+def iter_category_members(site: "mwclient.Site", category: str) -> Iterator[list[PageInfo]]:
+    """
+    逐批列出分类中主命名空间与用户命名空间的页面（跳过子页面），每次API请求产生一批。
+
+    直接调用list=categorymembers：命名空间由服务器端过滤（cmnamespace=0|2），
+    只请求页面ID和标题，不构造mwclient的Page对象，也不产生额外的页面信息查询。
+    """
+    kwargs = {
+        "list": "categorymembers",
+        "cmtitle": f"{site.namespaces[14]}:{category}",
+        "cmnamespace": "0|2",
+        "cmprop": "ids|title",
+        "cmlimit": "max",
+    }
+    while True:
+        result = site.get("query", **kwargs)
+        members: list[PageInfo] = []
+        for member in result["query"]["categorymembers"]:
+            user_page = member["ns"] == 2
+            # 与mwclient的Page.page_title相同，去掉用户页面的命名空间前缀
+            page_title = member["title"].split(":", 1)[1] if user_page else member["title"]
+            # Skip subpages (pages with "/" in the title)
+            if "/" not in page_title:
+                members.append(PageInfo(member["pageid"], page_title, user_page))
+        yield members
+        if "continue" not in result:
+            break
+        kwargs.update(result["continue"])
+
+def list_category_members(site: "mwclient.Site", category: str) -> list[PageInfo]:
+    """列出分类中主命名空间与用户命名空间的页面（见iter_category_members）"""
+    return [page for batch in iter_category_members(site, category) for page in batch]
+
+def merge_category_members(persons: list[PageInfo], deceased: list[PageInfo]) -> list[PageInfo]:
+    """
+    合并'人物'与'逝世的人物'两个分类的成员。
+
+    以(title, user_page)去重，'人物'分类中的页面按原顺序排在前面，
+    只出现在'逝世的人物'分类中的页面追加到末尾。
+    记录不会被复制：逝世标记直接写入传入的记录中。
+    """
+    page_list_tagged: list[PageInfo] = []
 
     # Collect deceased pages first and store them
-    deceased_pages_info = {}  # Dictionary to store page info by (title, user_page)
-
-    logging.info("  正在处理'逝世的人物'分类...")
-    for page in cat_deceased:
-        # Skip subpages (pages with "/" in the title)
-        if page.namespace in [0, 2] and "/" not in page.page_title:
-            user_page = page.namespace == 2
-            key = (page.page_title, user_page)
-            deceased_pages_info[key] = {
-                "page_id": page.pageid,
-                "page_title": page.page_title,
-                "user_page": user_page,
-                "deceased": True
-            }
+    deceased_pages_info: dict[tuple[str, bool], PageInfo] = {}
+    for page in deceased:
+        page.deceased = True
+        deceased_pages_info[page.key] = page
 
     existing_pages = set()  # (title, user_page)
 
     # Process all person pages
-    logging.info("  正在处理'人物'分类中的所有页面...")
-    for page in cat:
-        # Skip subpages (pages with "/" in the title)
-        if page.namespace in [0, 2] and "/" not in page.page_title:
-            user_page = page.namespace == 2
-            key = (page.page_title, user_page)
-            if key in existing_pages:
-                continue  # 已经处理过，跳过重复
-            is_deceased = key in deceased_pages_info
-            page_info: PageInfo = {
-                "page_id": page.pageid,
-                "page_title": page.page_title,
-                "user_page": user_page,
-                "deceased": is_deceased
-            }
-            page_list_tagged.append(page_info)
-            existing_pages.add(key)
+    for page in persons:
+        key = page.key
+        if key in existing_pages:
+            continue  # 已经处理过，跳过重复
+        page.deceased = key in deceased_pages_info
+        page_list_tagged.append(page)
+        existing_pages.add(key)
 
     # Add any deceased pages that weren't in the main category
     for key, page_info in deceased_pages_info.items():
@@ -60,5 +154,100 @@ def get_page_list(site: mwclient.Site) -> list[PageInfo]:
             page_list_tagged.append(page_info)
             existing_pages.add(key)
 
+    return page_list_tagged
+
+def fetch_categories(site: "mwclient.Site", max_workers: int = 2) -> tuple[list[PageInfo], list[PageInfo]]:
+    """
+    列出'人物'与'逝世的人物'两个分类的成员。
+
+    max_workers大于1时两个分类在线程池中并行分页获取，
+    总耗时约为较慢的那个分类而不是两者之和；为1时依次获取。
+
+    Returns:
+        ('人物'分类成员, '逝世的人物'分类成员)
+    """
+    import logging
+    if max_workers <= 1:
+        logging.info("  正在处理'逝世的人物'分类...")
+        deceased = list_category_members(site, "逝世的人物")
+        logging.info("  正在处理'人物'分类中的所有页面...")
+        persons = list_category_members(site, "人物")
+        return persons, deceased
+
+    logging.info("  正在并行处理'人物'与'逝世的人物'分类...")
+    # 只有两个分类，更多的线程没有意义
+    with ThreadPoolExecutor(max_workers=min(max_workers, 2)) as executor:
+        deceased_future = executor.submit(list_category_members, site, "逝世的人物")
+        persons_future = executor.submit(list_category_members, site, "人物")
+        return persons_future.result(), deceased_future.result()
+
+def stream_category_members(site: "mwclient.Site", max_workers: int = 2,
+                            queue_size: int = 8) -> Iterator[tuple[bool, list[PageInfo]]]:
+    """
+    在后台线程中分页获取'人物'与'逝世的人物'两个分类，每取到一批就交给调用方。
+
+    调用方处理一批的同时，后台线程已经在等待下一批的响应，CPU工作与网络延迟相互重叠。
+    已取到但尚未处理的批次最多保留queue_size个，调用方处理较慢时后台线程会暂停获取。
+    max_workers大于1时两个分类各用一个线程，否则在一个线程中依次获取。
+
+    Yields:
+        (是否来自'逝世的人物'分类, 一批页面)
+    """
+    batches: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # 调用方提前结束时不再阻塞在已满的队列上
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(categories: list[str]) -> None:
+        try:
+            for category in categories:
+                deceased = category == "逝世的人物"
+                for batch in iter_category_members(site, category):
+                    if not put((deceased, batch)):
+                        return
+        except Exception as e:
+            put((None, e))
+            return
+        put((None, None))
+
+    if max_workers <= 1:
+        groups = [["逝世的人物", "人物"]]
+    else:
+        groups = [["逝世的人物"], ["人物"]]
+    threads = [threading.Thread(target=produce, args=(categories,), daemon=True) for categories in groups]
+    for thread in threads:
+        thread.start()
+
+    remaining = len(threads)
+    try:
+        while remaining:
+            deceased, item = batches.get()
+            if deceased is None:
+                # 一个线程结束；item为其中发生的异常
+                remaining -= 1
+                if item is not None:
+                    raise item
+                continue
+            yield deceased, item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+def get_page_list(site: "mwclient.Site", max_workers: int = 2) -> list[PageInfo]:
+    import logging
+    logging.info("  正在获取'人物'分类中的页面列表...")
+
+    persons, deceased = fetch_categories(site, max_workers)
+    page_list_tagged = merge_category_members(persons, deceased)
+
     logging.info(f"  成功获取 {len(page_list_tagged)} 个页面信息")
-    return page_list_tagged
\ No newline at end of file
+    return page_list_tagged
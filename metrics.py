@@ -0,0 +1,162 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""
+运行指标与分析器挂钩。
+
+按阶段记录墙钟时间、CPU时间、API请求数与收发字节数（通过requests的响应钩子统计），
+以及各阶段自行上报的计数（如拼音转换次数、缓存命中数）。
+结果可以输出为表格，也可以保存为JSON；还可以对指定阶段启用cProfile或pyinstrument。
+"""
+import json
+import logging
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional, TextIO
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+class Metrics:
+    """
+    一次运行的分阶段指标。
+
+    Args:
+        profile_stage: 需要分析的阶段名，为None时不启用分析器
+        profiler: 'cprofile'或'pyinstrument'（需要另行安装）
+        profile_output: 分析结果保存路径（cProfile为pstats格式，pyinstrument为HTML），
+            为None时只把摘要输出到stderr
+    """
+
+    def __init__(self, profile_stage: Optional[str] = None, profiler: str = "cprofile",
+                 profile_output: Optional[str] = None):
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_output = profile_output
+        self.stages: dict[str, dict[str, Any]] = {}
+        self._current: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _record(self, name: str) -> dict[str, Any]:
+        return self.stages.setdefault(name, {
+            "wall_seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "api_requests": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+        })
+
+    @contextmanager
+    def stage(self, name: str, attribute_requests: bool = True) -> Iterator[dict[str, Any]]:
+        """
+        测量一个阶段；阶段内发出的API请求都计入该阶段。
+
+        阶段可以嵌套在另一个阶段中，结束后恢复外层阶段。attribute_requests为False时
+        只测量时间，期间（例如由后台线程）发出的请求仍计入外层阶段。
+        """
+        record = self._record(name)
+        previous = self._current
+        if attribute_requests:
+            self._current = name
+        profiler = self._start_profiler() if name == self.profile_stage else None
+        wall_start = time.perf_counter()
+        # process_time包含所有线程，因此并行获取分类成员的CPU时间也会计入
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["cpu_seconds"] += time.process_time() - cpu_start
+            record["wall_seconds"] += time.perf_counter() - wall_start
+            self._current = previous
+            if profiler is not None:
+                self._stop_profiler(profiler, name)
+
+    def count(self, stage: str, key: str, value: int = 1) -> None:
+        """累加阶段的自定义计数"""
+        with self._lock:
+            record = self._record(stage)
+            record[key] = record.get(key, 0) + value
+
+    def on_response(self, response, *args, **kwargs) -> None:
+        """requests的响应钩子，见connection.connect的response_hook参数"""
+        body = response.request.body or b""
+        with self._lock:
+            record = self._record(self._current or "other")
+            record["api_requests"] += 1
+            record["bytes_sent"] += len(body.encode("utf-8") if isinstance(body, str) else body)
+            record["bytes_received"] += len(response.content)
+
+    def _start_profiler(self):
+        import cProfile
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logging.warning("未安装pyinstrument，改用cProfile")
+                self.profiler = "cprofile"
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler, name: str) -> None:
+        import cProfile
+        import io
+        import pstats
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            if self.profile_output:
+                profiler.dump_stats(self.profile_output)
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+            report = stream.getvalue()
+        else:
+            profiler.stop()
+            if self.profile_output:
+                with open(self.profile_output, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+            report = profiler.output_text()
+        print(f"===== 阶段 '{name}' 的分析结果（{self.profiler}）=====", file=sys.stderr)
+        print(report, file=sys.stderr)
+        if self.profile_output:
+            logging.info(f"分析结果已保存到 {self.profile_output}")
+
+    def totals(self) -> dict[str, Any]:
+        total: dict[str, Any] = {}
+        for record in self.stages.values():
+            for key, value in record.items():
+                total[key] = total.get(key, 0) + value
+        return total
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "stages": self.stages,
+            "total": self.totals(),
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def print_table(self, file: TextIO = sys.stderr) -> None:
+        """以表格形式输出各阶段指标，其他计数附在行末"""
+        print(f"{'阶段':<10} {'墙钟(s)':>9} {'CPU(s)':>9} {'请求数':>7} {'发送(KB)':>10} {'接收(KB)':>10}  其他",
+              file=file)
+        rows = list(self.stages.items()) + [("total", self.totals())]
+        for name, record in rows:
+            extra = ", ".join(f"{key}={value}" for key, value in record.items()
+                              if key not in ("wall_seconds", "cpu_seconds", "api_requests",
+                                             "bytes_sent", "bytes_received"))
+            print(f"{name:<10} {record['wall_seconds']:>9.2f} {record['cpu_seconds']:>9.2f} "
+                  f"{record['api_requests']:>7} {record['bytes_sent'] / 1024:>10.1f} "
+                  f"{record['bytes_received'] / 1024:>10.1f}  {extra}", file=file)
@@ -0,0 +1,108 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import logging
+import sqlite3
+from typing import Iterable, Optional
+
+class PinyinCache:
+    """
+    基于SQLite的持久化标题拼音缓存。
+
+    打开时整表读入内存，关闭时把本次运行新增的条目和使用记录写回磁盘。
+    缓存带有版本标识（见convert.transliteration_version），版本变化时整表清空。
+    每次运行记为一代，长期未被使用的标题（通常是已离开人物分类的页面）
+    以及超出max_entries的最久未使用条目会在关闭时被淘汰。
+    """
+
+    def __init__(self, path: str, version: str, max_entries: int = 200000, max_idle_runs: int = 30):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.max_idle_runs = max_idle_runs
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "title TEXT PRIMARY KEY, pinyin TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+
+        stored_version = self._get_meta("version")
+        if stored_version != version:
+            if stored_version is not None:
+                logging.info(f"  拼音缓存版本已变化（{stored_version} -> {version}），清空缓存")
+            self._conn.execute("DELETE FROM entries")
+            self._set_meta("version", version)
+        self.run = int(self._get_meta("run") or 0) + 1
+
+        self._entries: dict[str, str] = dict(self._conn.execute("SELECT title, pinyin FROM entries"))
+        self._used: set[str] = set()
+        self._new: dict[str, str] = {}
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, title: str) -> Optional[str]:
+        """查询标题的拼音，未缓存时返回None"""
+        pinyin = self._entries.get(title)
+        if pinyin is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._used.add(title)
+        return pinyin
+
+    def touch(self, titles: Iterable[str]) -> None:
+        """
+        把已缓存的标题记为本次运行使用过，不计入命中次数。
+
+        调用方自己保存了拼音、不再查询缓存的标题（见convert.TemplateIndex.sync）
+        需要这样续期，否则会在max_idle_runs次运行后被淘汰。
+        """
+        entries = self._entries
+        self._used.update(title for title in titles if title in entries)
+
+    def put(self, title: str, pinyin: str) -> None:
+        """记录新计算出的拼音"""
+        self._entries[title] = pinyin
+        self._new[title] = pinyin
+
+    def close(self) -> None:
+        """写回本次运行的结果，执行淘汰并关闭数据库"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (title, pinyin, last_used) VALUES (?, ?, ?)",
+                ((title, pinyin, self.run) for title, pinyin in self._new.items()),
+            )
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE title = ?",
+                ((self.run, title) for title in self._used),
+            )
+            evicted = self._conn.execute(
+                "DELETE FROM entries WHERE last_used <= ?", (self.run - self.max_idle_runs,)
+            ).rowcount
+            overflow = len(self._entries) - evicted - self.max_entries
+            if overflow > 0:
+                evicted += self._conn.execute(
+                    "DELETE FROM entries WHERE title IN "
+                    "(SELECT title FROM entries ORDER BY last_used ASC LIMIT ?)", (overflow,)
+                ).rowcount
+            self._set_meta("run", str(self.run))
+        if evicted:
+            logging.info(f"  拼音缓存淘汰了 {evicted} 个长期未使用的条目")
+        self._conn.close()
+
+    def __enter__(self) -> "PinyinCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
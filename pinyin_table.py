@@ -0,0 +1,284 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""
+预先导出的拼音查找表。
+
+导入pypinyin会载入完整的单字与词语词典（约0.2秒、数十MB内存），而生成模板只需要
+NORMAL风格、不含多音字的第一读音。build_table把这些读音连同pypinyin分词所需的信息
+导出为一个二进制文件，PinyinTable通过mmap按需读取，不导入pypinyin，
+多个进程（见--pinyin-workers）打开同一个文件时共享操作系统的页面缓存。
+
+PinyinTable.transliterate与pypinyin.lazy_pinyin的处理过程相同：
+    1. 按是否为汉字（pypinyin的RE_HANS字符类）把文本切分为若干段；
+    2. 非汉字段交给errors回调（convert中为假名转罗马字）；
+    3. 汉字段按pypinyin.seg.mmseg的正向最大匹配切分为词语，词语取词典读音，
+       其余单字取单字读音。包括前缀集合在内的匹配细节也完全一致。
+
+文件格式（整数均为小端序）：
+    头部      8字节魔数、格式版本(u16)、元数据长度(u16)、槽位数(u32)
+    元数据    UTF-8 JSON：pypinyin版本、汉字字符类、条目数
+    槽位表    对齐到4字节的u32数组，值为条目的文件偏移，0表示空槽（开放寻址，线性探测，
+              哈希为键的UTF-8编码的zlib.crc32）
+    条目      键长(u8)、标志(u8)、读音长度(u16)、键（UTF-8）、读音（UTF-8，各音节直接拼接）
+
+条目包括pypinyin分词前缀集合中的全部字符串，以及读音与字符本身不同的全部单字。
+
+用法：
+    python pinyin_table.py build pinyin_table.bin
+    python pinyin_table.py verify pinyin_table.bin --size 100000
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+from typing import Callable, Iterable, Iterator, List, Optional
+
+_MAGIC = b"WFPYTBL\0"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHHI")
+_ENTRY = struct.Struct("<BBH")
+
+# 条目标志
+_PREFIX = 1    # 属于mmseg的前缀集合（某个词语的前缀，包括词语本身）
+_PHRASE = 2    # 属于pypinyin的词语词典
+_READING = 4   # 带有读音
+
+# RE_HANS的形式为'^(?:[字符类])+$'，表中只保存其中的字符类
+_HANS_PREFIX = "^(?:["
+_HANS_SUFFIX = "])+$"
+
+class PinyinTable:
+    """
+    以mmap方式打开build_table生成的拼音查找表。
+
+    对象可以被pickle（只传递路径），因此可以交给进程池，各进程各自重新打开文件。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, meta_len, slot_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or format_version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"'{path}' 不是受支持的拼音查找表（格式版本 {format_version}）")
+        meta = json.loads(self._mm[_HEADER.size:_HEADER.size + meta_len].decode("utf-8"))
+        self.pypinyin_version: str = meta["pypinyin"]
+        self.entry_count: int = meta["entries"]
+        slots_offset = _align(_HEADER.size + meta_len)
+        self._slots = memoryview(self._mm)[slots_offset:slots_offset + 4 * slot_count].cast("I")
+        self._mask = slot_count - 1
+        self._hans_split = re.compile(f"([{meta['han_class']}]+)")
+
+    def __reduce__(self):
+        return (PinyinTable, (self.path,))
+
+    def close(self) -> None:
+        self._slots.release()
+        self._mm.close()
+
+    def __enter__(self) -> "PinyinTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _lookup(self, key: str) -> tuple[int, Optional[str]]:
+        """返回(标志, 读音)，不在表中时为(0, None)"""
+        data = key.encode("utf-8")
+        mm = self._mm
+        slots = self._slots
+        mask = self._mask
+        slot = zlib.crc32(data) & mask
+        while True:
+            offset = slots[slot]
+            if offset == 0:
+                return 0, None
+            key_len, flags, reading_len = _ENTRY.unpack_from(mm, offset)
+            start = offset + _ENTRY.size
+            if key_len == len(data) and mm[start:start + key_len] == data:
+                if flags & _READING:
+                    start += key_len
+                    return flags, mm[start:start + reading_len].decode("utf-8")
+                return flags, None
+            slot = (slot + 1) & mask
+
+    def _cut(self, hans: str) -> Iterator[str]:
+        """与pypinyin.seg.mmseg.seg.cut（no_non_phrases=True）相同的正向最大匹配分词"""
+        remain = hans
+        while remain:
+            last_valid = 0
+            for end in range(1, len(remain) + 1):
+                flags, _ = self._lookup(remain[:end])
+                if not flags & _PREFIX:
+                    break
+                if flags & _PHRASE:
+                    last_valid = end
+            else:
+                # 剩余文本整体都是某个词语的前缀，但其中没有词语：逐字输出
+                if not last_valid:
+                    yield from remain
+                    return
+            if last_valid:
+                yield remain[:last_valid]
+                remain = remain[last_valid:]
+            else:
+                yield remain[0]
+                remain = remain[1:]
+
+    def transliterate(self, text: str, errors: Callable[[str], List[str]]) -> str:
+        """
+        返回与''.join(pypinyin.lazy_pinyin(text, style=Style.NORMAL, errors=errors))相同的结果。
+
+        Args:
+            text: 要转换的文本
+            errors: 处理非汉字段的回调，与pypinyin的errors参数相同
+        """
+        parts: list[str] = []
+        for i, segment in enumerate(self._hans_split.split(text)):
+            if not segment:
+                continue
+            if i % 2 == 0:
+                converted = errors(segment)
+                if converted:
+                    parts.extend([converted] if isinstance(converted, str) else
+                                 [item[0] if isinstance(item, list) else item for item in converted])
+                continue
+            for word in self._cut(segment):
+                _, reading = self._lookup(word)
+                # 表中没有读音的单字，pypinyin也会原样保留
+                parts.append(word if reading is None else reading)
+        return "".join(parts)
+
+def _align(offset: int) -> int:
+    return (offset + 3) & ~3
+
+def _han_chars(han_class: str) -> Iterator[str]:
+    """枚举字符类中的全部字符"""
+    pattern = re.compile(f"[{han_class}]")
+    for codepoint in range(sys.maxunicode + 1):
+        char = chr(codepoint)
+        if pattern.match(char):
+            yield char
+
+def build_table(path: str) -> int:
+    """
+    用已安装的pypinyin生成拼音查找表，返回条目数。
+
+    读音通过convert.title_to_pinyin逐个计算，因此与直接调用pypinyin的结果一致。
+    """
+    from pypinyin.constants import PHRASES_DICT, RE_HANS
+    from importlib.metadata import version
+    from convert import title_to_pinyin
+
+    pattern = RE_HANS.pattern
+    if not (pattern.startswith(_HANS_PREFIX) and pattern.endswith(_HANS_SUFFIX)):
+        raise ValueError(f"无法识别pypinyin的汉字正则表达式: {pattern!r}")
+    han_class = pattern[len(_HANS_PREFIX):-len(_HANS_SUFFIX)]
+
+    entries: dict[str, list] = {}  # 键 -> [标志, 读音]
+    for phrase in PHRASES_DICT:
+        for end in range(1, len(phrase) + 1):
+            entries.setdefault(phrase[:end], [0, None])[0] |= _PREFIX
+        entries[phrase][0] |= _PHRASE
+    for char in _han_chars(han_class):
+        reading = title_to_pinyin(char)
+        if reading != char:
+            entries.setdefault(char, [0, None])[1] = reading
+    for key, entry in entries.items():
+        if entry[0] & _PHRASE and RE_HANS.match(key):
+            entry[1] = title_to_pinyin(key)
+        if entry[1] is not None:
+            entry[0] |= _READING
+
+    meta = json.dumps({"pypinyin": version("pypinyin"), "han_class": han_class, "entries": len(entries)},
+                      ensure_ascii=False).encode("utf-8")
+    slot_count = 1
+    while slot_count < len(entries) * 2:
+        slot_count *= 2
+    slots_offset = _align(_HEADER.size + len(meta))
+    offset = slots_offset + 4 * slot_count
+    slots = [0] * slot_count
+    blob = bytearray()
+    for key, (flags, reading) in entries.items():
+        data = key.encode("utf-8")
+        reading_data = (reading or "").encode("utf-8")
+        slot = zlib.crc32(data) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = offset + len(blob)
+        blob += _ENTRY.pack(len(data), flags, len(reading_data)) + data + reading_data
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(meta), slot_count))
+        f.write(meta)
+        f.write(b"\0" * (slots_offset - _HEADER.size - len(meta)))
+        f.write(struct.pack(f"<{slot_count}I", *slots))
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+def verify_table(table: PinyinTable, titles: Iterable[str]) -> list[tuple[str, str, str]]:
+    """逐个比较查找表与pypinyin的转换结果，返回不一致的(标题, pypinyin结果, 查找表结果)"""
+    from convert import title_to_pinyin
+    mismatches = []
+    for title in titles:
+        expected = title_to_pinyin(title)
+        actual = title_to_pinyin(title, table)
+        if expected != actual:
+            mismatches.append((title, expected, actual))
+    return mismatches
+
+def _verify_corpus(size: int, seed: int) -> list[str]:
+    """一致性检查使用的标题：合成人物标题、全部词语和单字，以及由它们随机拼接的文本"""
+    import random
+    import fakewiki
+    from pypinyin.constants import PHRASES_DICT
+    rng = random.Random(seed)
+    fixture = fakewiki.synthetic_fixture(size, seed=seed)
+    titles = [page["title"] for page in fixture["pages"]]
+    phrases = list(PHRASES_DICT)
+    titles.extend(phrases)
+    titles.extend(chr(codepoint) for codepoint in range(0x3000, 0x30000))
+    # 词语首尾相接时最能暴露分词差异
+    for _ in range(size):
+        titles.append("".join(rng.choice(phrases)[:rng.randint(1, 4)] for _ in range(rng.randint(2, 5))))
+    return titles
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="生成或检查预先导出的拼音查找表")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="用已安装的pypinyin生成查找表")
+    build_parser.add_argument("path", help="输出文件路径")
+    verify_parser = subparsers.add_parser("verify", help="检查查找表与pypinyin的结果是否完全一致")
+    verify_parser.add_argument("path", help="查找表文件路径")
+    verify_parser.add_argument("--size", type=int, default=100000, help="合成标题与随机拼接文本的数量（默认为100000）")
+    verify_parser.add_argument("--seed", type=int, default=0, help="语料的随机种子")
+    args = parser.parse_args(argv[1:])
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    if args.command == "build":
+        count = build_table(args.path)
+        logging.info(f"已生成拼音查找表 '{args.path}'：{count} 个条目，{os.path.getsize(args.path) / 1024:.0f} KB")
+        return 0
+
+    titles = _verify_corpus(args.size, args.seed)
+    with PinyinTable(args.path) as table:
+        logging.info(f"正在比较 {len(titles)} 个标题（查找表基于 pypinyin {table.pypinyin_version}）...")
+        mismatches = verify_table(table, titles)
+    for title, expected, actual in mismatches[:20]:
+        logging.error(f"  {title!r}: pypinyin={expected!r} 查找表={actual!r}")
+    if mismatches:
+        logging.error(f"共 {len(mismatches)}/{len(titles)} 个标题不一致")
+        return 1
+    logging.info(f"全部 {len(titles)} 个标题一致")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,14 +1,67 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2026 Xie Youtian
-import mwclient
+import hashlib
+import threading
 import time
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Mapping, Optional, TypedDict, TYPE_CHECKING
 
-def send_template(site: mwclient.Site, template: str, page_title: str = "模板:人物", 
+if TYPE_CHECKING:
+    import mwclient
+
+# send_pages在多个线程中共用一个站点，会话失效时只允许一个线程重新登录
+_login_lock = threading.Lock()
+
+class RevisionInfo(TypedDict):
+    revid: int
+    timestamp: str
+    sha1: str
+
+def template_sha1(template: str) -> str:
+    """
+    计算模板保存后的修订版本SHA-1。
+
+    MediaWiki保存时会去掉文本末尾的空白，revisions的sha1是对保存后文本计算的，
+    因此这里也先去掉末尾空白。
+    """
+    return hashlib.sha1(template.rstrip().encode("utf-8")).hexdigest()
+
+def latest_revision(site: "mwclient.Site", page_title: str) -> Optional[RevisionInfo]:
+    """只获取页面最新修订版本的ID、时间戳与SHA-1，页面不存在时返回None"""
+    result = site.get("query", prop="revisions", titles=page_title, rvprop="ids|timestamp|sha1")
+    for page in result["query"]["pages"].values():
+        if "missing" in page or not page.get("revisions"):
+            return None
+        revision = page["revisions"][0]
+        return {"revid": revision["revid"], "timestamp": revision["timestamp"], "sha1": revision.get("sha1", "")}
+    return None
+
+def latest_revisions(site: "mwclient.Site", page_titles: Iterable[str]) -> dict[str, Optional[RevisionInfo]]:
+    """批量获取多个页面最新修订版本的ID、时间戳与SHA-1（每次请求最多50个标题），不存在的页面对应None"""
+    page_titles = list(page_titles)
+    revisions: dict[str, Optional[RevisionInfo]] = {title: None for title in page_titles}
+    for i in range(0, len(page_titles), 50):
+        result = site.get("query", prop="revisions", titles="|".join(page_titles[i:i + 50]),
+                          rvprop="ids|timestamp|sha1")
+        # 服务器可能规范化标题（例如首字母大写），按原标题返回结果
+        original = {item["to"]: item["from"] for item in result["query"].get("normalized", [])}
+        for page in result["query"]["pages"].values():
+            if "missing" in page or not page.get("revisions"):
+                continue
+            revision = page["revisions"][0]
+            revisions[original.get(page["title"], page["title"])] = {
+                "revid": revision["revid"], "timestamp": revision["timestamp"], "sha1": revision.get("sha1", "")}
+    return revisions
+
+def send_template(site: "mwclient.Site", template: str, page_title: str = "模板:人物", 
                   summary: Optional[str] = None, max_retries: int = 3) -> bool:
     """
     将生成的模板推送到WikiFur页面。
+
+    只获取最新修订版本的SHA-1与模板的哈希比较，内容相同时不下载也不提交页面；
+    提交时附带baserevid/basetimestamp，由服务器端检测编辑冲突。
+    会话失效（assertuserfailed，例如复用的会话缓存已被服务器注销）时丢弃当前会话并重新登录一次。
     
     Args:
         site: 已登录的mwclient.Site对象
@@ -20,28 +73,34 @@ def send_template(site: mwclient.Site, template: str, page_title: str = "模板:
     Returns:
         bool: 推送是否成功
     """
-    import logging
+    import mwclient
     logging.info(f"  正在准备推送模板到页面 '{page_title}'...")
     
     if summary is None:
         summary = "更新人物模板（自动生成）"
     
-    page = site.pages[page_title]
+    sha1 = template_sha1(template)
+    logged_in_again = False
     
     for attempt in range(max_retries):
         try:
-            logging.info(f"  正在获取页面当前内容...")
-            # 获取页面当前内容
-            current_content = page.text()
+            logging.info("  正在获取页面最新修订版本信息...")
+            revision = latest_revision(site, page_title)
             
             # 检查内容是否相同
-            if current_content == template:
+            if revision is not None and revision["sha1"] == sha1:
                 logging.info(f"  页面 '{page_title}' 内容未更改，无需更新。")
                 return True
             
             logging.info(f"  正在向页面 '{page_title}' 推送新内容...")
-            # 编辑页面
-            result = page.edit(template, summary=summary)
+            params = {"title": page_title, "text": template, "summary": summary,
+                      "bot": "1", "assert": "user"}
+            if revision is None:
+                params["createonly"] = "1"
+            else:
+                params["baserevid"] = str(revision["revid"])
+                params["basetimestamp"] = revision["timestamp"]
+            result = site.post("edit", token=site.get_token("csrf"), **params)["edit"]
             
             if result.get('result') == 'Success':
                 logging.info(f"  成功更新页面 '{page_title}'")
@@ -50,10 +109,27 @@ def send_template(site: mwclient.Site, template: str, page_title: str = "模板:
                 logging.error(f"  更新页面 '{page_title}' 失败: {result}")
                 return False
                 
-        except mwclient.errors.EditError as e:
-            if 'editconflict' in str(e).lower() and attempt < max_retries - 1:
+        except mwclient.errors.APIError as e:
+            if e.code == "assertuserfailed" and not logged_in_again and site.credentials \
+                    and attempt < max_retries - 1:
+                logging.warning("  登录会话已失效，正在重新登录...")
+                logged_in_again = True
+                try:
+                    with _login_lock:
+                        # 旧会话的Cookie与令牌都已无效，之后保存会话缓存时会写入新的会话
+                        site.connection.cookies.clear()
+                        site.tokens.clear()
+                        site.login()
+                except Exception as login_error:
+                    logging.error(f"  重新登录失败: {login_error}")
+                    return False
+                continue
+            if e.code in ("editconflict", "articleexists", "badtoken") and attempt < max_retries - 1:
+                if e.code == "badtoken":
+                    # 会话中的令牌已失效，下次重新获取
+                    site.tokens.pop("csrf", None)
                 wait_time = 2 ** attempt  # 指数退避
-                logging.warning(f"  编辑冲突，等待 {wait_time} 秒后重试 (尝试 {attempt + 1}/{max_retries})...")
+                logging.warning(f"  编辑未被接受（{e.code}），等待 {wait_time} 秒后重试 (尝试 {attempt + 1}/{max_retries})...")
                 time.sleep(wait_time)
                 continue
             else:
@@ -65,7 +141,38 @@ def send_template(site: mwclient.Site, template: str, page_title: str = "模板:
     
     return False
 
-def send_template_from_stdin(site: mwclient.Site) -> bool:
+def send_pages(site: "mwclient.Site", pages: Mapping[str, str], summary: Optional[str] = None,
+               max_workers: int = 4) -> bool:
+    """
+    把多个页面推送到WikiFur，只编辑内容哈希发生变化的页面。
+
+    先用一次批量查询（见latest_revisions）比较所有页面的SHA-1，
+    再在最多max_workers个线程中并发调用send_template编辑发生变化的页面。
+
+    Args:
+        site: 已登录的mwclient.Site对象
+        pages: {页面标题: 页面内容}
+        summary: 编辑摘要（默认为自动生成）
+        max_workers: 同时进行的编辑数上限
+
+    Returns:
+        bool: 所有页面是否都推送成功（或无需更新）
+    """
+    revisions = latest_revisions(site, pages)
+    changed = [title for title, text in pages.items()
+               if revisions[title] is None or revisions[title]["sha1"] != template_sha1(text)]
+    logging.info(f"  {len(changed)}/{len(pages)} 个页面内容有变化，需要推送")
+    if not changed:
+        return True
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(lambda title: send_template(site, pages[title], page_title=title, summary=summary),
+                                    changed))
+    failed = [title for title, success in zip(changed, results) if not success]
+    if failed:
+        logging.error(f"  {len(failed)} 个页面推送失败: {', '.join(failed)}")
+    return not failed
+
+def send_template_from_stdin(site: "mwclient.Site") -> bool:
     """
     从标准输入读取模板内容并推送到WikiFur。
     
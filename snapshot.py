@@ -0,0 +1,387 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import json
+import os
+import re
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, TypedDict, TYPE_CHECKING
+
+from get import PageInfo, fetch_categories, merge_category_members, parse_page_list
+
+if TYPE_CHECKING:
+    import mwclient
+
+# 快照文件的格式标记（与get.py的页面列表文件区分）与格式版本，格式不兼容时递增版本
+SNAPSHOT_FORMAT = "category-snapshot"
+SNAPSHOT_VERSION = 1
+
+PERSON_CATEGORY = "人物"
+DECEASED_CATEGORY = "逝世的人物"
+
+# MediaWiki默认只保留90天的最近更改（$wgRCMaxAge），超过该期限的快照无法增量同步
+RC_MAX_AGE = timedelta(days=80)
+
+# 分类变更由作业队列写入，时间戳却是触发它的修订版本的时间，可能早于上次同步时已读到的
+# 最新更改。因此每次增量同步都从上次的游标往前回溯这段时间重新读取，已处理过的更改按
+# rcid跳过（rcid按写入顺序递增，迟到的更改rcid更大）
+RC_LOOKBACK = timedelta(days=1)
+
+# 回溯窗口之外仍可能漏掉更改（例如作业队列积压超过一天），超过这段时间未完整同步的快照
+# 强制完整同步一次
+FULL_SYNC_INTERVAL = timedelta(days=7)
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# 分类变更摘要中的第一个链接指向被加入/移出分类的页面，例如"[[:某页面]]已添加至分类"
+_COMMENT_LINK_RE = re.compile(r"\[\[:?([^\]|]+)")
+
+class SnapshotRecord(TypedDict):
+    page_id: int
+    page_title: str
+    namespace: int
+    person: bool      # 是否属于'人物'分类
+    deceased: bool    # 是否属于'逝世的人物'分类
+    last_seen: str    # 最后一次确认其分类成员身份的时间（ISO 8601）
+
+class Snapshot(TypedDict):
+    format: str
+    version: int
+    domain: str
+    synced_at: Optional[str]  # 上次同步时最新的最近更改时间戳，下次增量同步从这里往前回溯RC_LOOKBACK开始
+    last_rcid: int            # 已处理的最大rcid，回溯窗口内不大于它的更改不再处理
+    last_full_sync: Optional[str]  # 上次完整同步的时间（ISO 8601）
+    records: dict[int, SnapshotRecord]
+
+def new_snapshot(domain: str) -> Snapshot:
+    """创建一个空快照"""
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "domain": domain,
+        "synced_at": None,
+        "last_rcid": 0,
+        "last_full_sync": None,
+        "records": {},
+    }
+
+_RECORD_FIELDS = {"page_id": int, "page_title": str, "namespace": int, "person": bool, "deceased": bool}
+
+def parse_snapshot(data: object) -> Snapshot:
+    """
+    校验从JSON读取的快照并还原为Snapshot（没有格式标记的早期快照也可以读取）。
+
+    格式标记、版本或结构不符时抛出ValueError。
+    """
+    if not isinstance(data, dict) or data.get("format", SNAPSHOT_FORMAT) != SNAPSHOT_FORMAT:
+        raise ValueError("不是分类成员快照文件")
+    if data.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"不支持的快照文件版本: {data.get('version')!r}")
+    records = data.get("records")
+    if not isinstance(records, dict) or not isinstance(data.get("domain"), str):
+        raise ValueError("快照文件缺少domain或records")
+    for page_id, record in records.items():
+        if not isinstance(record, dict) or not all(isinstance(record.get(key), kind)
+                                                   for key, kind in _RECORD_FIELDS.items()):
+            raise ValueError(f"快照文件中页面 {page_id} 的记录格式不正确")
+    data.setdefault("format", SNAPSHOT_FORMAT)
+    data.setdefault("synced_at", None)
+    data.setdefault("last_rcid", 0)
+    data.setdefault("last_full_sync", None)
+    # JSON的键只能是字符串，这里还原为page_id整数
+    data["records"] = {int(page_id): record for page_id, record in records.items()}
+    return data
+
+def load_snapshot(path: str) -> Optional[Snapshot]:
+    """
+    从磁盘读取快照。
+
+    文件不存在、无法解析或格式不符时返回None，调用方应进行完整同步。
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return parse_snapshot(json.load(f))
+    except (OSError, ValueError) as e:
+        logging.warning(f"  无法读取快照文件 '{path}'，将忽略: {e}")
+        return None
+
+def save_snapshot(path: str, snapshot: Snapshot) -> None:
+    """原子地将快照写入磁盘（先写临时文件再替换）"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def snapshot_to_page_list(snapshot: Snapshot) -> list[PageInfo]:
+    """将快照中的记录转换为get_page_list相同格式的页面列表"""
+    page_list: list[PageInfo] = []
+    for record in snapshot["records"].values():
+        page_list.append(PageInfo(record["page_id"], record["page_title"], record["namespace"] == 2,
+                                  record["deceased"]))
+    return page_list
+
+def load_page_list_file(path: str) -> list[PageInfo]:
+    """
+    读取--from-snapshot指定的文件，返回页面列表。
+
+    文件可以是get.save_page_list保存的页面列表，也可以是增量同步的快照（--snapshot-path）。
+    格式不符时抛出ValueError。
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and (data.get("format") == SNAPSHOT_FORMAT or "records" in data):
+        return snapshot_to_page_list(parse_snapshot(data))
+    return parse_page_list(data)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime(_TIMESTAMP_FORMAT)
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.strptime(value, _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+def _strip_namespace(title: str, namespace: int) -> str:
+    return title.split(":", 1)[1] if namespace != 0 else title
+
+def _latest_change(site: "mwclient.Site") -> tuple[str, int]:
+    """获取服务器上最新一条最近更改的(时间戳, rcid)，作为下次增量同步的起点"""
+    result = site.get("query", list="recentchanges", rcprop="timestamp|ids", rclimit=1)
+    changes = result["query"]["recentchanges"]
+    return (changes[0]["timestamp"], changes[0]["rcid"]) if changes else (_now(), 0)
+
+_MEMBERSHIP_KEYS = ("page_title", "namespace", "person", "deceased")
+
+def full_sync(site: "mwclient.Site", snapshot: Snapshot, max_workers: int = 2) -> int:
+    """
+    完整列出两个分类并重建快照中的全部记录。
+
+    Returns:
+        int: 与快照原有记录相比，成员身份发生变化的页面数
+    """
+    # 先记录游标再列出分类，列出期间发生的更改会在下次增量同步时重新处理
+    synced_at, last_rcid = _latest_change(site)
+    persons, deceased = fetch_categories(site, max_workers)
+
+    person_keys = {page.key for page in persons}
+    records: dict[int, SnapshotRecord] = {}
+    for page in merge_category_members(persons, deceased):
+        records[page.page_id] = {
+            "page_id": page.page_id,
+            "page_title": page.page_title,
+            "namespace": 2 if page.user_page else 0,
+            "person": page.key in person_keys,
+            "deceased": page.deceased,
+            "last_seen": synced_at,
+        }
+    old_records = snapshot["records"]
+    changed = len(old_records.keys() - records.keys())
+    changed += sum(1 for page_id, record in records.items()
+                   if page_id not in old_records
+                   or any(old_records[page_id][key] != record[key] for key in _MEMBERSHIP_KEYS))
+    snapshot["records"] = records
+    snapshot["synced_at"] = synced_at
+    snapshot["last_rcid"] = last_rcid
+    snapshot["last_full_sync"] = _now()
+    return changed
+
+def _collect_changes(site: "mwclient.Site", since: str,
+                     after_rcid: int) -> tuple[set[str], set[int], Optional[str], int]:
+    """
+    读取自since以来、rcid大于after_rcid的与人物分类相关的最近更改。
+
+    Returns:
+        (受影响的页面标题, 受影响的修订版本号, 读到的最新一条更改的时间戳（没有任何更改时为None）,
+         读到的最大rcid)
+    """
+    titles: set[str] = set()
+    revids: set[int] = set()
+    latest = None
+    max_rcid = after_rcid
+    categories = {PERSON_CATEGORY, DECEASED_CATEGORY}
+
+    kwargs = {
+        "list": "recentchanges",
+        "rcstart": since,
+        "rcdir": "newer",
+        "rctype": "categorize|log",
+        "rcnamespace": "0|2|14",
+        "rcprop": "title|ids|timestamp|comment|loginfo",
+        "rclimit": "max",
+    }
+    while True:
+        result = site.get("query", **kwargs)
+        for change in result["query"]["recentchanges"]:
+            if latest is None or change["timestamp"] > latest:
+                latest = change["timestamp"]
+            if change["rcid"] <= after_rcid:
+                # 回溯窗口内已经处理过的更改
+                continue
+            max_rcid = max(max_rcid, change["rcid"])
+            if change["type"] == "categorize":
+                # 分类变更事件的标题是分类本身，被影响的页面在摘要和修订号中
+                if _strip_namespace(change["title"], 14) not in categories:
+                    continue
+                match = _COMMENT_LINK_RE.search(change.get("comment", ""))
+                if match:
+                    titles.add(match.group(1))
+                elif change.get("revid"):
+                    revids.add(change["revid"])
+            elif change["ns"] in (0, 2) and change.get("logtype") in ("move", "delete"):
+                # 移动和删除不会产生分类变更事件，但会改变页面标题或使页面消失
+                titles.add(change["title"])
+                target = change.get("logparams", {}).get("target_title")
+                if target:
+                    titles.add(target)
+        if "continue" not in result:
+            break
+        kwargs.update(result["continue"])
+    return titles, revids, latest, max_rcid
+
+def _query_memberships(site: "mwclient.Site", titles: set[str], revids: set[int]) -> list[dict]:
+    """查询页面当前所属的人物分类，每次最多50个标题或修订号"""
+    category_ns = site.namespaces[14]
+    clcategories = f"{category_ns}:{PERSON_CATEGORY}|{category_ns}:{DECEASED_CATEGORY}"
+    pages: list[dict] = []
+    batches = [("titles", list(titles)), ("revids", [str(revid) for revid in revids])]
+    for param, values in batches:
+        for i in range(0, len(values), 50):
+            kwargs = {
+                "prop": "categories",
+                "clcategories": clcategories,
+                "cllimit": "max",
+                param: "|".join(values[i:i + 50]),
+            }
+            while True:
+                result = site.get("query", **kwargs)
+                pages.extend(result["query"].get("pages", {}).values())
+                if "continue" not in result:
+                    break
+                kwargs.update(result["continue"])
+    return pages
+
+def incremental_sync(site: "mwclient.Site", snapshot: Snapshot) -> int:
+    """
+    只读取上次同步以来的分类变更并合并到快照中。
+
+    从synced_at往前回溯RC_LOOKBACK开始读取，以找回作业队列迟到写入、时间戳早于游标的分类变更；
+    回溯窗口内rcid不大于last_rcid的更改已经处理过，直接跳过。
+
+    游标（synced_at与last_rcid）只在查询到的成员身份全部合并后才前移：
+    任何一步请求失败时抛出异常，快照保持不变，下次同步会重新读取同样的更改。
+
+    Returns:
+        int: 成员身份发生变化的页面数
+    """
+    since = (_parse_timestamp(snapshot["synced_at"]) - RC_LOOKBACK).strftime(_TIMESTAMP_FORMAT)
+    titles, revids, latest, max_rcid = _collect_changes(site, since, snapshot["last_rcid"])
+    logging.info(f"  自 {snapshot['synced_at']} 以来有 {len(titles) + len(revids)} 个页面可能发生了分类变更")
+    changed = 0
+    if titles or revids:
+        changed = _merge_memberships(snapshot["records"], _query_memberships(site, titles, revids), latest)
+    if latest is not None and latest > snapshot["synced_at"]:
+        snapshot["synced_at"] = latest
+    snapshot["last_rcid"] = max_rcid
+    return changed
+
+def _merge_memberships(records: dict[int, SnapshotRecord], pages: list[dict], latest: str) -> int:
+    """把_query_memberships查询到的页面合并到快照记录中，返回成员身份发生变化的页面数"""
+    by_title = {(record["page_title"], record["namespace"]): page_id for page_id, record in records.items()}
+
+    # 同一页面可能在多个批次中被查询到（标题与修订号），按page_id合并分类。
+    # 值为[标题, 命名空间, 分类集合]，标题为None表示该页面已不存在
+    memberships: dict[int, list] = {}
+    for page in pages:
+        namespace = page.get("ns", 0)
+        title = _strip_namespace(page["title"], namespace) if "title" in page else None
+        # 页面被删除或移动后，原标题不再对应原来的页面，旧记录需要重新确认
+        old_id = by_title.get((title, namespace))
+        if old_id is not None:
+            memberships.setdefault(old_id, [None, namespace, set()])
+        if "missing" in page or "invalid" in page:
+            continue
+        cats = {_strip_namespace(cat["title"], 14) for cat in page.get("categories", [])}
+        membership = memberships.setdefault(page["pageid"], [None, namespace, set()])
+        membership[0] = title
+        membership[1] = namespace
+        membership[2].update(cats)
+
+    changed = 0
+    for page_id, (title, namespace, cats) in memberships.items():
+        eligible = namespace in (0, 2) and title is not None and "/" not in title
+        person = eligible and PERSON_CATEGORY in cats
+        deceased = eligible and DECEASED_CATEGORY in cats
+        old = records.get(page_id)
+        if not person and not deceased:
+            if old is not None:
+                del records[page_id]
+                changed += 1
+            continue
+        record: SnapshotRecord = {
+            "page_id": page_id,
+            "page_title": title,
+            "namespace": namespace,
+            "person": person,
+            "deceased": deceased,
+            "last_seen": latest,
+        }
+        if old is None or any(old[key] != record[key] for key in _MEMBERSHIP_KEYS):
+            changed += 1
+        records[page_id] = record
+    return changed
+
+def needs_full_sync(snapshot: Snapshot) -> bool:
+    """快照是否已超过FULL_SYNC_INTERVAL未完整同步（旧格式的快照没有记录，视为需要）"""
+    last_full_sync = snapshot.get("last_full_sync")
+    return last_full_sync is None or datetime.now(timezone.utc) - _parse_timestamp(last_full_sync) > FULL_SYNC_INTERVAL
+
+def sync_snapshot(site: "mwclient.Site", path: str, full_resync: bool = False,
+                  max_workers: int = 2) -> Snapshot:
+    """
+    读取本地快照并与站点同步，返回同步后的快照（已写回磁盘）。
+
+    存在可用快照时只向站点请求上次同步以来的分类变更，
+    否则（或指定full_resync时）完整列出两个分类并重建快照。
+
+    Args:
+        site: mwclient.Site对象
+        path: 快照文件路径
+        full_resync: 是否强制完整同步
+        max_workers: 完整同步时并行获取分类的线程数
+    """
+    snapshot = None if full_resync else load_snapshot(path)
+    if snapshot is not None and snapshot["domain"] != site.host:
+        logging.warning(f"  快照属于站点 '{snapshot['domain']}'，将进行完整同步")
+        snapshot = None
+    if snapshot is not None and snapshot["synced_at"] is not None:
+        if datetime.now(timezone.utc) - _parse_timestamp(snapshot["synced_at"]) > RC_MAX_AGE:
+            logging.warning("  快照过旧，最近更改可能已被清理，将进行完整同步")
+            snapshot = None
+        elif needs_full_sync(snapshot):
+            logging.info(f"  快照已超过 {FULL_SYNC_INTERVAL.days} 天未完整同步，将进行完整同步以找回可能遗漏的更改")
+            snapshot = None
+
+    if snapshot is None or snapshot["synced_at"] is None:
+        logging.info("  正在进行完整同步...")
+        snapshot = new_snapshot(site.host)
+        full_sync(site, snapshot, max_workers)
+    else:
+        logging.info(f"  正在从快照 '{path}' 进行增量同步...")
+        changed = incremental_sync(site, snapshot)
+        logging.info(f"  增量同步完成，{changed} 个页面的分类成员身份发生变化")
+
+    save_snapshot(path, snapshot)
+    return snapshot
+
+def sync_page_list(site: "mwclient.Site", path: str, full_resync: bool = False,
+                   max_workers: int = 2) -> list[PageInfo]:
+    """
+    通过本地快照获取人物页面列表（参数见sync_snapshot）。
+
+    Returns:
+        list[PageInfo]: 与get_page_list格式相同的页面列表
+    """
+    snapshot = sync_snapshot(site, path, full_resync=full_resync, max_workers=max_workers)
+    page_list = snapshot_to_page_list(snapshot)
+    logging.info(f"  成功获取 {len(page_list)} 个页面信息")
+    return page_list
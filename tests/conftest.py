@@ -0,0 +1,64 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import importlib.util
+import os
+import sys
+from typing import Callable
+
+import pytest
+
+# 各模块位于仓库根目录（平铺布局，没有包），测试需要能直接导入它们
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakewiki import FakeWiki  # noqa: E402
+
+PERSONS_FIXTURE = {
+    "username": "Bot",
+    "password": "secret",
+    "pages": [
+        {"pageid": 1, "ns": 0, "title": "张三", "categories": ["人物"]},
+        {"pageid": 2, "ns": 0, "title": "李四", "categories": ["人物", "逝世的人物"]},
+        {"pageid": 3, "ns": 2, "title": "Alice", "categories": ["人物"]},
+        {"pageid": 4, "ns": 0, "title": "王五", "categories": ["逝世的人物"]},
+        {"pageid": 5, "ns": 0, "title": "キツネ", "categories": ["人物"]},
+        {"pageid": 6, "ns": 2, "title": "Alice/沙盒", "categories": ["人物"]},
+        {"pageid": 7, "ns": 0, "title": "赵六", "categories": ["人物"]},
+    ],
+}
+
+@pytest.fixture
+def wiki():
+    """在后台线程中运行的离线替身服务器（夹具见PERSONS_FIXTURE）"""
+    with FakeWiki(PERSONS_FIXTURE) as server:
+        yield server
+
+@pytest.fixture
+def site(wiki):
+    """已登录到wiki的mwclient.Site"""
+    return wiki.site()
+
+@pytest.fixture(scope="session")
+def bot_main():
+    """仓库根目录的__main__.py（以其他模块名导入，避免与pytest自身的__main__冲突）"""
+    spec = importlib.util.spec_from_file_location("bot_main", os.path.join(ROOT, "__main__.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def run_bot(wiki, bot_main, tmp_path, monkeypatch) -> Callable[..., int]:
+    """
+    在tmp_path中写入指向wiki的config.ini，返回以命令行参数运行机器人的函数。
+
+    运行期间的工作目录为tmp_path，相对路径的输出文件、快照等都写在那里。
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.ini").write_text(
+        f"[Location]\ndomain={wiki.host}\nscheme=http\npath=/w/\n\n"
+        f"[Credential]\nusername={wiki.username}\npassword={wiki.password}\n",
+        encoding="utf-8")
+
+    def run(*args: str) -> int:
+        return bot_main.main(["__main__.py", *args])
+    return run
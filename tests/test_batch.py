@@ -0,0 +1,56 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import pytest
+
+from batch import run_batch
+
+@pytest.fixture
+def batch_config(wiki, tmp_path, monkeypatch):
+    """在tmp_path中写入指向wiki的批量配置，返回以追加的目标配置节写入文件的函数"""
+    monkeypatch.chdir(tmp_path)
+
+    def write(targets: str) -> str:
+        path = tmp_path / "batch.ini"
+        path.write_text(
+            f"[Credential]\nusername={wiki.username}\npassword={wiki.password}\n\n"
+            f"[Location:fake]\ndomain={wiki.host}\nscheme=http\npath=/w/\n\n{targets}",
+            encoding="utf-8")
+        return str(path)
+    return write
+
+class TestBatch:
+    def test_good_and_failing_target(self, batch_config, run_bot, capsys, caplog, tmp_path):
+        path = batch_config("[Target:good]\nlocation=fake\noutput=good.txt\n\n"
+                            "[Target:bad]\nlocation=fake\nmax_group_size=0\noutput=bad.txt\n")
+        with caplog.at_level("INFO"):
+            assert run_batch(path) == 1
+        assert "[成功] good" in caplog.text and "[失败] bad" in caplog.text
+        assert "1/2 个目标失败" in caplog.text
+        # 失败的目标不影响其他目标，输出与单页面模式相同
+        assert run_bot() == 0
+        assert (tmp_path / "good.txt").read_text(encoding="utf-8") + "\n" == capsys.readouterr().out
+
+    def test_send_split_subpages(self, batch_config, wiki):
+        path = batch_config("[Target:split]\nlocation=fake\npage=模板:人物\nsplit_subpages=yes\n\n"
+                            "[Target:plain]\nlocation=fake\npage=模板:人物2\n")
+        assert run_batch(path, send=True) == 0
+        assert "{{模板:人物/Z}}" in wiki.page_text("模板:人物")
+        assert "[[张三]]" in wiki.page_text("模板:人物/Z")
+        assert "[[张三]]" in wiki.page_text("模板:人物2")
+
+        edits = wiki.edit_count
+        assert run_batch(path, send=True) == 0
+        assert wiki.edit_count == edits
+
+    def test_main_forwards_options(self, batch_config, run_bot, tmp_path):
+        path = batch_config("[Target:good]\nlocation=fake\noutput=good.txt\n")
+        assert run_bot("--batch", path, "--split-subpages", "--pinyin-cache", "pinyin.sqlite") == 0
+        assert (tmp_path / "pinyin.sqlite").exists()
+        assert "===== 模板:人物/Z =====" in (tmp_path / "good.txt").read_text(encoding="utf-8")
+
+    @pytest.mark.parametrize("option", [["--incremental"], ["--metrics"], ["--metrics-json", "m.json"],
+                                        ["--save-snapshot", "pages.json"]])
+    def test_rejects_unsupported_options(self, batch_config, run_bot, option):
+        path = batch_config("[Target:good]\nlocation=fake\n")
+        with pytest.raises(SystemExit):
+            run_bot("--batch", path, *option)
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import json
+import os
+import stat
+
+import pytest
+
+from connection import connect
+from send import send_template
+
+@pytest.fixture
+def logins(wiki, monkeypatch) -> list[str]:
+    """记录wiki收到的每个登录请求"""
+    calls: list[str] = []
+    login = wiki._login
+
+    def counting(params, session):
+        calls.append(session)
+        return login(params, session)
+
+    monkeypatch.setattr(wiki, "_login", counting)
+    return calls
+
+@pytest.fixture
+def connect_wiki(wiki, tmp_path):
+    """返回以tmp_path中的会话缓存连接wiki的函数"""
+    path = str(tmp_path / "session.json")
+
+    def run():
+        return connect({"domain": wiki.host, "scheme": "http", "path": "/w/"},
+                       {"username": wiki.username, "password": wiki.password}, session_path=path)
+    run.path = path
+    return run
+
+class TestSessionCache:
+    def test_file_is_private(self, connect_wiki):
+        connect_wiki()
+        assert stat.S_IMODE(os.stat(connect_wiki.path).st_mode) == 0o600
+
+    def test_reused_session_skips_login(self, connect_wiki, logins, wiki):
+        connect_wiki()
+        assert len(logins) == 1
+        site = connect_wiki()
+        assert len(logins) == 1
+        assert site.username == wiki.username
+        # 复用的CSRF令牌仍然可以编辑
+        assert send_template(site, "内容", page_title="模板:测试")
+        assert wiki.page_text("模板:测试") == "内容"
+
+    def test_login_token_is_not_saved(self, connect_wiki):
+        connect_wiki()
+        with open(connect_wiki.path, encoding="utf-8") as f:
+            sessions = json.load(f)["sessions"]
+        assert all("login" not in entry["tokens"] for entry in sessions.values())
+
+    def test_rejected_session_logs_in_again(self, connect_wiki, logins, wiki):
+        connect_wiki()
+        with open(connect_wiki.path, encoding="utf-8") as f:
+            saved = f.read()
+        # 服务器注销了所有会话
+        wiki._sessions.clear()
+        site = connect_wiki()
+        assert len(logins) == 2
+        assert "user" in site.groups
+        with open(connect_wiki.path, encoding="utf-8") as f:
+            assert f.read() != saved
+        # 新保存的会话可以复用
+        connect_wiki()
+        assert len(logins) == 2
+
+    def test_ignores_world_readable_file(self, connect_wiki, logins):
+        connect_wiki()
+        os.chmod(connect_wiki.path, 0o644)
+        connect_wiki()
+        assert len(logins) == 2
+        assert stat.S_IMODE(os.stat(connect_wiki.path).st_mode) == 0o600
+
+    def test_dropped_session_during_edit(self, connect_wiki, logins, wiki):
+        connect_wiki()
+        site = connect_wiki()
+        wiki._sessions.clear()
+        assert send_template(site, "内容", page_title="模板:测试")
+        assert len(logins) == 2
+        assert wiki.page_text("模板:测试") == "内容"
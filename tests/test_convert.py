@@ -0,0 +1,183 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import random
+
+import pytest
+
+import convert
+from convert import (TemplateIndex, _kana_to_romaji, calculate_balanced_grouping, entry_sort_key,
+                     generate_split_template, generate_template, get_pinyinized_page_list, pinyin_group,
+                     title_to_pinyin)
+from diff import expand_subpages
+from fakewiki import synthetic_title
+from get import PageInfo
+
+def _random_pages(rng: random.Random, count: int, taken: set) -> list[PageInfo]:
+    """生成count个标题不重复的页面（taken为已使用的(标题, 是否为用户页面)）"""
+    pages = []
+    while len(pages) < count:
+        page = PageInfo(len(taken) + 1, synthetic_title(rng), rng.random() < 0.3, rng.random() < 0.05)
+        if page.key in taken:
+            continue
+        taken.add(page.key)
+        page.pinyin = title_to_pinyin(page.page_title)
+        page.pinyin_group = pinyin_group(page.pinyin)
+        pages.append(page)
+    return pages
+
+def _expected(pages: dict, max_group_size: int = 40) -> str:
+    return generate_template(sorted(pages.values(), key=entry_sort_key), max_group_size=max_group_size)
+
+class TestKanaToRomaji:
+    @pytest.mark.parametrize("kana, romaji", [
+        ("あいう", "aiu"),
+        ("キャット", "kyatto"),
+        ("カッコ", "kakko"),
+        ("マッチ", "matchi"),
+        ("ラーメン", "raamen"),
+        ("ッッカ", "ッkka"),
+    ])
+    def test_converts(self, kana, romaji):
+        assert "".join(_kana_to_romaji(kana)) == romaji
+
+    def test_keeps_non_kana(self):
+        assert "".join(_kana_to_romaji("ッA")) == "ッA"
+
+    @pytest.mark.parametrize("kana, tokens", [
+        # 无法解释的促音之后，长音符不延长促音之前的元音
+        ("カッー", ["ka", "ッ", "ー"]),
+        ("ッー", ["ッ", "ー"]),
+        # 拨音与元音不能重复
+        ("っん", ["っ", "n"]),
+        ("カッン", ["ka", "ッ", "n"]),
+        ("ッア", ["ッ", "a"]),
+        # 末尾的促音
+        ("カッ", ["ka", "ッ"]),
+        ("っ", ["っ"]),
+        # 开头的长音符
+        ("ーカ", ["ー", "ka"]),
+        ("ー", ["ー"]),
+    ])
+    def test_unresolved_marks_stay_literal(self, kana, tokens):
+        assert _kana_to_romaji(kana) == tokens
+
+    def test_title_to_pinyin_mixes_scripts(self):
+        assert title_to_pinyin("张三キツネ") == "zhangsankitsune"
+
+class TestParallelPinyin:
+    def test_matches_serial(self, monkeypatch, caplog):
+        rng = random.Random(6)
+        titles = list(dict.fromkeys(synthetic_title(rng) for _ in range(1500)))
+        # 混入假名与拉丁字母标题，覆盖所有转换路径
+        titles += ["キツネ", "カッー", "Alice", "123狐狸"]
+        serial = get_pinyinized_page_list([PageInfo(i, title, i % 3 == 0) for i, title in enumerate(titles)])
+
+        monkeypatch.setattr(convert, "PARALLEL_MIN_TITLES", 0)
+        with caplog.at_level("INFO"):
+            parallel = get_pinyinized_page_list([PageInfo(i, title, i % 3 == 0) for i, title in enumerate(titles)],
+                                                workers=2, chunk_size=200)
+        assert "使用 2 个进程并行转换" in caplog.text
+        assert [(page.page_id, page.pinyin, page.pinyin_group) for page in parallel] == \
+            [(page.page_id, page.pinyin, page.pinyin_group) for page in serial]
+
+class TestBalancedGrouping:
+    def test_respects_max_group_size(self):
+        counts = {letter: 15 for letter in "ABCDEFGH"}
+        grouping = calculate_balanced_grouping(counts, max_group_size=40)
+        assert "·".join(grouping).split("·") == list("ABCDEFGH")
+        assert all(sum(counts[letter] for letter in group.split("·")) <= 40 for group in grouping)
+
+    def test_oversized_letter_gets_own_group(self):
+        grouping = calculate_balanced_grouping({"A": 100, "B": 5, "C": 5}, max_group_size=40)
+        assert grouping[0] == "A"
+
+    def test_rejects_non_positive_max_group_size(self):
+        with pytest.raises(ValueError):
+            calculate_balanced_grouping({"A": 1}, max_group_size=0)
+
+class TestTemplateIndex:
+    def test_render_matches_generate_template(self):
+        rng = random.Random(1)
+        taken: set = set()
+        pages = {page.key: page for page in _random_pages(rng, 300, taken)}
+        index = TemplateIndex()
+        for page in pages.values():
+            index.insert(page)
+        assert index.render() == _expected(pages)
+
+        for step in range(20):
+            for page in _random_pages(rng, rng.randint(0, 5), taken):
+                index.insert(page)
+                pages[page.key] = page
+            for key in rng.sample(sorted(pages), rng.randint(0, 5)):
+                index.remove(key)
+                del pages[key]
+            key = rng.choice(sorted(pages))
+            index.set_deceased(key, not pages[key].deceased)
+            assert index.render() == _expected(pages), f"第 {step} 步后输出不一致"
+
+    def test_render_split_matches_generate_split_template(self):
+        rng = random.Random(2)
+        taken: set = set()
+        pages = {page.key: page for page in _random_pages(rng, 200, taken)}
+        index = TemplateIndex(max_group_size=30)
+        for page in pages.values():
+            index.insert(page)
+        for key in rng.sample(sorted(pages), 20):
+            index.remove(key)
+            del pages[key]
+
+        parent, subpages = index.render_split()
+        ordered = sorted(pages.values(), key=entry_sort_key)
+        assert (parent, subpages) == generate_split_template(ordered, max_group_size=30)
+        assert expand_subpages(parent, subpages) == generate_template(ordered, max_group_size=30)
+
+    def test_regrouping_keeps_subpages(self):
+        rng = random.Random(3)
+        pages = _random_pages(rng, 200, set())
+        index = TemplateIndex(max_group_size=40)
+        for page in pages:
+            index.insert(page)
+        parent, subpages = index.render_split()
+        index.max_group_size = 60
+        regrouped_parent, regrouped_subpages = index.render_split()
+        assert regrouped_parent != parent
+        assert regrouped_subpages == subpages
+
+    def test_sync(self):
+        rng = random.Random(4)
+        taken: set = set()
+        pages = _random_pages(rng, 100, taken)
+        index = TemplateIndex()
+        assert index.sync(pages) == 100
+
+        updated = [PageInfo(page.page_id, page.page_title, page.user_page, page.deceased) for page in pages[10:]]
+        updated[0].deceased = not updated[0].deceased
+        updated += [PageInfo(page.page_id, page.page_title, page.user_page) for page in _random_pages(rng, 5, taken)]
+        assert index.sync(updated) == 10 + 1 + 5
+        assert index.render() == generate_template(get_pinyinized_page_list(updated))
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "index.json")
+        rng = random.Random(5)
+        taken: set = set()
+        pages = {page.key: page for page in _random_pages(rng, 100, taken)}
+        index = TemplateIndex()
+        for page in pages.values():
+            index.insert(page)
+        index.render()
+        # 尚未重新生成的字母也要保存
+        extra = _random_pages(rng, 1, taken)[0]
+        index.insert(extra)
+        pages[extra.key] = extra
+        index.save(path, "v1")
+
+        loaded = TemplateIndex.load(path, "v1")
+        assert loaded is not None and len(loaded) == len(pages)
+        assert loaded.render() == _expected(pages)
+        assert TemplateIndex.load(path, "v2") is None
+
+    def test_load_rejects_corrupt_file(self, tmp_path):
+        path = tmp_path / "index.json"
+        path.write_text('{"format": "template-index"}', encoding="utf-8")
+        assert TemplateIndex.load(str(path), "v1") is None
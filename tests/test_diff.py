@@ -0,0 +1,66 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+from diff import entry_diff, expand_subpages, format_entry_diff, parse_template, transcluded_titles
+
+_FOOTER = "|group10 = 未在 [[WikiFur]] 创建词条\n|list10 = >>>>>>>>请前往[[模板:人物/未创建词条人物列表]]查看。<<<<<<<<\n"
+
+_CURRENT = (
+    "|group1 = A·B\n"
+    "|list1 = [[Alice]] {{·}} [[用户:Bob|Bob]]\n"
+    "|group2 = C·D·E\n"
+    "|list2 = [[北风]] {{·}} [[Carol]] {{·}} {{Departed|[[Dave]]}} {{·}} [[Eve]]\n"
+    + _FOOTER
+)
+
+_GENERATED = (
+    "|group1 = A·B\n"
+    "|list1 = [[Alice]] {{·}} [[Amy]] {{·}} [[用户:Bob|Bob]] {{·}} [[北风]]\n"
+    "|group2 = C·D·E\n"
+    "|list2 = {{Departed|[[Carol]]}} {{·}} {{Departed|[[Dave]]}}\n"
+    + _FOOTER
+)
+
+class TestParseTemplate:
+    def test_entries(self):
+        entries = parse_template(_CURRENT)
+        assert set(entries) == {("Alice", False), ("Bob", True), ("北风", False), ("Carol", False),
+                                ("Dave", False), ("Eve", False)}
+        assert entries[("Bob", True)]["group"] == "A·B"
+        assert entries[("Dave", False)]["deceased"]
+
+    def test_ignores_footer(self):
+        assert parse_template(_FOOTER) == {}
+
+class TestEntryDiff:
+    def test_added_removed_moved_deceased(self):
+        diff = entry_diff(_CURRENT, _GENERATED)
+        assert [entry["title"] for entry in diff["added"]] == ["Amy"]
+        assert [entry["title"] for entry in diff["removed"]] == ["Eve"]
+        assert [(entry["title"], entry["from_group"], entry["to_group"]) for entry in diff["moved"]] == [
+            ("北风", "C·D·E", "A·B")]
+        assert [(entry["title"], entry["deceased"]) for entry in diff["deceased_changed"]] == [("Carol", True)]
+
+    def test_reverse(self):
+        diff = entry_diff(_GENERATED, _CURRENT)
+        assert [entry["title"] for entry in diff["added"]] == ["Eve"]
+        assert [entry["title"] for entry in diff["removed"]] == ["Amy"]
+        assert [(entry["title"], entry["deceased"]) for entry in diff["deceased_changed"]] == [("Carol", False)]
+
+    def test_identical(self):
+        diff = entry_diff(_CURRENT, _CURRENT)
+        assert all(not changes for changes in diff.values())
+        assert list(format_entry_diff(diff)) == ["共新增 0 人，移除 0 人，换组 0 人，逝世标记变化 0 人\n"]
+
+    def test_format(self):
+        lines = list(format_entry_diff(entry_diff(_CURRENT, _GENERATED)))
+        assert "+ Amy（A·B）\n" in lines
+        assert "- Eve（C·D·E）\n" in lines
+        assert "~ 北风（C·D·E -> A·B）\n" in lines
+        assert "† Carol（添加逝世标记）\n" in lines
+
+class TestSubpages:
+    def test_expand(self):
+        parent = "|group1 = A·B\n|list1 = {{模板:人物/A}} {{·}} {{模板:人物/B}}\n{{其他模板}}\n"
+        subpages = {"模板:人物/A": "<noinclude>说明\n</noinclude>[[Alice]]", "模板:人物/B": "[[Bob]]"}
+        assert transcluded_titles(parent, "模板:人物") == ["模板:人物/A", "模板:人物/B"]
+        assert expand_subpages(parent, subpages) == "|group1 = A·B\n|list1 = [[Alice]] {{·}} [[Bob]]\n{{其他模板}}\n"
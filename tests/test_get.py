@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import pytest
+
+import get
+from fakewiki import API_MAX_LIMIT, FakeWiki, synthetic_fixture
+from get import fetch_categories, get_page_list, stream_category_members
+
+def _keys(pages) -> list[tuple[str, bool, bool]]:
+    return [(page.page_title, page.user_page, page.deceased) for page in pages]
+
+class TestFetch:
+    def test_get_page_list(self, site):
+        assert sorted(_keys(get_page_list(site))) == sorted([
+            ("张三", False, False),
+            ("李四", False, True),
+            ("Alice", True, False),
+            ("王五", False, True),
+            ("キツネ", False, False),
+            ("赵六", False, False),
+        ])
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_fetch_categories(self, site, max_workers):
+        persons, deceased = fetch_categories(site, max_workers=max_workers)
+        assert {page.page_title for page in persons} == {"张三", "李四", "Alice", "キツネ", "赵六"}
+        assert {page.page_title for page in deceased} == {"李四", "王五"}
+
+class TestStream:
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_paginated_batches(self, max_workers):
+        fixture = synthetic_fixture(2 * API_MAX_LIMIT + 50, seed=7)
+        with FakeWiki(fixture) as wiki:
+            site = wiki.site()
+            batches = list(stream_category_members(site, max_workers=max_workers))
+            expected_persons, expected_deceased = fetch_categories(site, max_workers=1)
+        assert len(batches) > 2
+        persons = [page for deceased, batch in batches if not deceased for page in batch]
+        deceased = [page for is_deceased, batch in batches if is_deceased for page in batch]
+        # 每个分类内部的顺序与依次获取时相同
+        assert [page.key for page in persons] == [page.key for page in expected_persons]
+        assert [page.key for page in deceased] == [page.key for page in expected_deceased]
+        assert all("/" not in page.page_title for page in persons)
+
+    def test_stops_early(self, site):
+        stream = stream_category_members(site, queue_size=1)
+        next(stream)
+        # 提前关闭时后台线程应当结束，而不是阻塞在已满的队列上
+        stream.close()
+
+    def test_propagates_errors(self, site, monkeypatch):
+        def failing(site, category):
+            yield []
+            raise ConnectionError("模拟的网络错误")
+
+        monkeypatch.setattr(get, "iter_category_members", failing)
+        with pytest.raises(ConnectionError):
+            list(stream_category_members(site))
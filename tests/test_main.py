@@ -0,0 +1,137 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""端到端测试：以命令行参数运行__main__.main，站点为fakewiki的替身服务器（见conftest.run_bot）"""
+import json
+
+import pytest
+
+import send
+from get import get_page_list, load_page_list
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits: list[float] = []
+    monkeypatch.setattr(send.time, "sleep", waits.append)
+    return waits
+
+def _output(capsys) -> str:
+    return capsys.readouterr().out
+
+class TestDefaultOutput:
+    def test_stdout(self, run_bot, capsys):
+        assert run_bot() == 0
+        out = _output(capsys)
+        assert "{{Navbox" in out
+        assert "[[张三]]" in out and "[[用户:Alice|Alice]]" in out
+        assert "{{Departed|[[李四]]}}" in out and "{{Departed|[[王五]]}}" in out
+        # 子页面不出现在模板中
+        assert "沙盒" not in out
+
+    def test_output_file_matches_stdout(self, run_bot, capsys, tmp_path):
+        assert run_bot() == 0
+        stdout = _output(capsys)
+        assert run_bot("-o", "template.txt") == 0
+        assert (tmp_path / "template.txt").read_text(encoding="utf-8") + "\n" == stdout
+
+    def test_without_streaming(self, run_bot, capsys):
+        assert run_bot() == 0
+        streamed = _output(capsys)
+        assert run_bot("--pinyin-workers", "2") == 0
+        assert _output(capsys) == streamed
+
+class TestSend:
+    def test_unchanged_then_changed(self, run_bot, wiki):
+        assert run_bot("--send") == 0
+        template = wiki.page_text("模板:人物")
+        assert "[[张三]]" in template
+        edits = wiki.edit_count
+
+        assert run_bot("--send") == 0
+        assert wiki.edit_count == edits
+
+        wiki.add_page("孙七", categories=["人物"])
+        assert run_bot("--send") == 0
+        assert wiki.edit_count == edits + 1
+        assert "[[孙七]]" in wiki.page_text("模板:人物")
+
+    def test_retries_edit_conflict(self, run_bot, wiki, sleeps):
+        assert run_bot("--send") == 0
+        wiki.add_page("孙七", categories=["人物"])
+        wiki.conflicts = 1
+        assert run_bot("--send") == 0
+        assert "[[孙七]]" in wiki.page_text("模板:人物")
+        assert sleeps == [1]
+
+    def test_fails_after_repeated_conflicts(self, run_bot, wiki, sleeps):
+        wiki.conflicts = 3
+        assert run_bot("--send") == 1
+        assert wiki.get_page("模板:人物") is None
+
+    def test_dry_run(self, run_bot, wiki, capsys):
+        assert run_bot("--send") == 0
+        wiki.add_page("孙七", categories=["人物"])
+        _output(capsys)
+        edits = wiki.edit_count
+        assert run_bot("--dry-run") == 0
+        assert "+ 孙七" in _output(capsys)
+        assert wiki.edit_count == edits
+
+class TestSnapshotFiles:
+    def test_save_and_load(self, run_bot, wiki, capsys):
+        assert run_bot("--save-snapshot", "pages.json") == 0
+        live = _output(capsys)
+        # 离线生成不连接站点
+        wiki.stop()
+        assert run_bot("--from-snapshot", "pages.json") == 0
+        assert _output(capsys) == live
+
+    def test_incremental_twice(self, run_bot, wiki, capsys, tmp_path):
+        assert run_bot("--incremental") == 0
+        first = _output(capsys)
+        assert (tmp_path / "persons_snapshot.json").exists()
+        assert (tmp_path / "persons_snapshot.index.json").exists()
+
+        wiki.add_page("孙七", categories=["人物"])
+        wiki.remove_from_category("张三", "人物")
+        assert run_bot("--incremental") == 0
+        second = _output(capsys)
+        assert second != first
+        assert "[[孙七]]" in second and "[[张三]]" not in second
+
+        assert run_bot() == 0
+        assert _output(capsys) == second
+
+    def test_incremental_from_snapshot_file(self, run_bot, capsys):
+        assert run_bot("--incremental") == 0
+        incremental = _output(capsys)
+        assert run_bot("--from-snapshot", "persons_snapshot.json") == 0
+        assert _output(capsys) == incremental
+
+    def test_rejects_incremental_from_snapshot(self, run_bot):
+        with pytest.raises(SystemExit):
+            run_bot("--incremental", "--from-snapshot", "pages.json")
+
+class TestStreaming:
+    def test_streaming_records_pinyin_stage(self, run_bot, tmp_path):
+        assert run_bot("--metrics-json", "metrics.json") == 0
+        stages = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))["stages"]
+        assert list(stages) == ["connect", "fetch", "pinyin", "template"]
+        assert stages["pinyin"]["conversions"] == 6
+        # 转换期间后台线程的请求计入获取阶段
+        assert stages["pinyin"]["api_requests"] == 0
+        assert stages["fetch"]["api_requests"] > 0
+
+    def test_profile_pinyin(self, run_bot, capsys):
+        assert run_bot("--profile", "pinyin") == 0
+        profiled = capsys.readouterr()
+        assert "阶段 'pinyin' 的分析结果" in profiled.err
+        assert run_bot() == 0
+        assert capsys.readouterr().out == profiled.out
+
+    def test_saved_page_list_round_trip(self, run_bot, site, tmp_path):
+        # 默认边获取边转换，保存的页面列表已按拼音排序
+        assert run_bot("--save-snapshot", "pages.json") == 0
+        saved = load_page_list(str(tmp_path / "pages.json"))
+        fetched = get_page_list(site)
+        assert sorted((page.page_id, page.page_title, page.user_page, page.deceased) for page in saved) == \
+            sorted((page.page_id, page.page_title, page.user_page, page.deceased) for page in fetched)
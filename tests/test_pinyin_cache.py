@@ -0,0 +1,61 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import convert
+from convert import get_pinyinized_page_list, title_to_pinyin, transliteration_version
+from get import PageInfo
+from pinyin_cache import PinyinCache
+
+def _pages() -> list[PageInfo]:
+    return [PageInfo(1, "张三", False), PageInfo(2, "キツネ", False), PageInfo(3, "Alice", True)]
+
+class TestPinyinCache:
+    def test_hit_after_miss(self, tmp_path):
+        path = str(tmp_path / "pinyin.sqlite")
+        with PinyinCache(path, "v1") as cache:
+            first = get_pinyinized_page_list(_pages(), cache=cache)
+            assert (cache.hits, cache.misses) == (0, 3)
+            assert cache.get("张三") == "zhangsan"
+
+        with PinyinCache(path, "v1") as cache:
+            second = get_pinyinized_page_list(_pages(), cache=cache)
+            assert (cache.hits, cache.misses) == (3, 0)
+        assert [(page.page_title, page.pinyin) for page in second] == \
+            [(page.page_title, page.pinyin) for page in first]
+
+    def test_invalidated_when_version_changes(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "pinyin.sqlite")
+        with PinyinCache(path, transliteration_version()) as cache:
+            # 模拟旧版转换规则写入的拼音
+            cache.put("キツネ", "kitune")
+
+        monkeypatch.setattr(convert, "ROMAJI_RULES_REVISION", convert.ROMAJI_RULES_REVISION + 1)
+        version = transliteration_version()
+        with PinyinCache(path, version) as cache:
+            assert len(cache) == 0
+            pinyinized = get_pinyinized_page_list(_pages(), cache=cache)
+        assert {page.page_title: page.pinyin for page in pinyinized}["キツネ"] == title_to_pinyin("キツネ")
+
+        with PinyinCache(path, version) as cache:
+            assert cache.get("キツネ") == title_to_pinyin("キツネ")
+
+    def test_evicts_idle_entries(self, tmp_path):
+        path = str(tmp_path / "pinyin.sqlite")
+        with PinyinCache(path, "v1", max_idle_runs=2) as cache:
+            cache.put("张三", "zhangsan")
+            cache.put("李四", "lisi")
+        for _ in range(2):
+            with PinyinCache(path, "v1", max_idle_runs=2) as cache:
+                cache.touch(["张三"])
+        with PinyinCache(path, "v1", max_idle_runs=2) as cache:
+            assert cache.get("张三") == "zhangsan"
+            assert cache.get("李四") is None
+
+    def test_main_output_unchanged(self, run_bot, capsys, tmp_path):
+        assert run_bot() == 0
+        expected = capsys.readouterr().out.encode("utf-8")
+        # 第一次运行写入缓存，第二次全部命中
+        for _ in range(2):
+            assert run_bot("--pinyin-cache", "pinyin.sqlite") == 0
+            assert capsys.readouterr().out.encode("utf-8") == expected
+        with PinyinCache(str(tmp_path / "pinyin.sqlite"), transliteration_version()) as cache:
+            assert cache.get("张三") == "zhangsan"
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import pickle
+import random
+
+import pytest
+
+from convert import entry_sort_key, get_pinyinized_page_list, title_to_pinyin, transliteration_version
+from fakewiki import synthetic_title
+from get import PageInfo
+from pinyin_table import PinyinTable, build_table, verify_table
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    """用已安装的pypinyin生成的查找表（生成约需数秒，整个模块共用）"""
+    path = str(tmp_path_factory.mktemp("pinyin_table") / "pinyin_table.bin")
+    build_table(path)
+    with PinyinTable(path) as opened:
+        yield opened
+
+def _corpus(size: int, seed: int) -> list[str]:
+    """合成人物标题，以及由其中的汉字片段首尾相接组成的文本（最能暴露分词差异）"""
+    from pypinyin.constants import PHRASES_DICT
+    rng = random.Random(seed)
+    titles = [synthetic_title(rng) for _ in range(size)]
+    phrases = list(PHRASES_DICT)
+    titles += ["".join(rng.choice(phrases)[:rng.randint(1, 4)] for _ in range(rng.randint(2, 5)))
+               for _ in range(size)]
+    return titles
+
+class TestPinyinTable:
+    def test_matches_pypinyin(self, table):
+        titles = _corpus(3000, seed=0)
+        assert [title_to_pinyin(title, table) for title in titles] == [title_to_pinyin(title) for title in titles]
+        assert verify_table(table, titles) == []
+
+    @pytest.mark.parametrize("title", ["", "张三", "重庆火锅", "キツネ", "Alice", "123狐狸", "银狐X", "〇", "𠀀"])
+    def test_edge_cases(self, table, title):
+        assert title_to_pinyin(title, table) == title_to_pinyin(title)
+
+    def test_pinyinized_page_list(self, table):
+        rng = random.Random(1)
+        titles = list(dict.fromkeys(synthetic_title(rng) for _ in range(1000)))
+        without = get_pinyinized_page_list([PageInfo(i, title, i % 3 == 0) for i, title in enumerate(titles)])
+        with_table = get_pinyinized_page_list([PageInfo(i, title, i % 3 == 0) for i, title in enumerate(titles)],
+                                              table=table)
+        assert [(page.page_title, page.pinyin, page.pinyin_group) for page in with_table] == \
+            [(page.page_title, page.pinyin, page.pinyin_group) for page in without]
+        assert with_table == sorted(with_table, key=entry_sort_key)
+
+    def test_pickles_by_path(self, table):
+        # 进程池中的工作进程按路径重新打开查找表
+        with pickle.loads(pickle.dumps(table)) as reopened:
+            assert title_to_pinyin("银狐", reopened) == title_to_pinyin("银狐", table)
+
+    def test_version_follows_table(self, table):
+        assert transliteration_version(table).startswith(f"pypinyin-{table.pypinyin_version}/")
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "not_a_table.bin"
+        path.write_bytes(b"\0" * 64)
+        with pytest.raises(ValueError):
+            PinyinTable(str(path))
+
+    def test_main_output_unchanged(self, table, run_bot, capsys):
+        assert run_bot() == 0
+        expected = capsys.readouterr().out
+        assert run_bot("--pinyin-table", table.path) == 0
+        assert capsys.readouterr().out == expected
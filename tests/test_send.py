@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import pytest
+
+import send
+from send import send_pages, send_template
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录重试前的等待时间，不真正等待"""
+    waits: list[float] = []
+    monkeypatch.setattr(send.time, "sleep", waits.append)
+    return waits
+
+class TestSendTemplate:
+    def test_creates_missing_page(self, wiki, site):
+        assert send_template(site, "新内容\n", page_title="模板:测试")
+        assert wiki.page_text("模板:测试") == "新内容"
+
+    def test_unchanged_content_is_not_submitted(self, wiki, site):
+        assert send_template(site, "内容", page_title="模板:测试")
+        edits = wiki.edit_count
+        # 末尾空白在保存时会被去掉，哈希仍然相同
+        assert send_template(site, "内容\n\n", page_title="模板:测试")
+        assert wiki.edit_count == edits
+
+    def test_retries_on_editconflict(self, wiki, site, sleeps):
+        send_template(site, "旧内容", page_title="模板:测试")
+        wiki.conflicts = 2
+        assert send_template(site, "新内容", page_title="模板:测试")
+        assert wiki.page_text("模板:测试") == "新内容"
+        assert sleeps == [1, 2]
+
+    def test_gives_up_after_max_retries(self, wiki, site, sleeps):
+        send_template(site, "旧内容", page_title="模板:测试")
+        wiki.conflicts = 3
+        assert not send_template(site, "新内容", page_title="模板:测试", max_retries=3)
+        assert wiki.page_text("模板:测试") == "旧内容"
+        assert len(sleeps) == 2
+
+    def test_retries_on_badtoken(self, wiki, site, sleeps):
+        site.tokens["csrf"] = "0123456789abcdef+\\"
+        assert send_template(site, "新内容", page_title="模板:测试")
+        assert wiki.page_text("模板:测试") == "新内容"
+        assert sleeps == [1]
+        assert site.tokens["csrf"] != "0123456789abcdef+\\"
+
+    def test_logs_in_again_when_session_is_dropped(self, wiki, site, sleeps):
+        site.get_token("csrf")
+        # 服务器注销了会话：之后的请求都是匿名的，带assert=user的编辑被拒绝
+        wiki._sessions.clear()
+        assert send_template(site, "新内容", page_title="模板:测试")
+        assert wiki.page_text("模板:测试") == "新内容"
+        # 旧会话的令牌先被拒绝（badtoken），换成匿名令牌后才由assert=user发现会话失效
+        assert sleeps == [1]
+
+    def test_anonymous_site_is_not_logged_in(self, wiki, sleeps):
+        assert not send_template(wiki.site(login=False), "新内容", page_title="模板:测试")
+        assert wiki.get_page("模板:测试") is None
+
+class TestSendPages:
+    def test_edits_only_changed_pages(self, wiki, site):
+        pages = {"模板:人物": "父模板", "模板:人物/A": "A", "模板:人物/B": "B"}
+        assert send_pages(site, pages)
+        edits = wiki.edit_count
+        assert send_pages(site, {**pages, "模板:人物/B": "B2"})
+        assert wiki.edit_count == edits + 1
+        assert wiki.page_text("模板:人物/B") == "B2"
@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import snapshot as snapshot_module
+from snapshot import (FULL_SYNC_INTERVAL, RC_LOOKBACK, full_sync, incremental_sync, load_snapshot,
+                      needs_full_sync, new_snapshot, save_snapshot, sync_snapshot)
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def _shift(timestamp: str, delta: timedelta) -> str:
+    value = datetime.strptime(timestamp, _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc) + delta
+    return value.strftime(_TIMESTAMP_FORMAT)
+
+def _memberships(snapshot) -> dict[int, tuple[str, int, bool, bool]]:
+    """快照中各页面的(标题, 命名空间, 人物, 逝世)，忽略last_seen等同步时间"""
+    return {page_id: (record["page_title"], record["namespace"], record["person"], record["deceased"])
+            for page_id, record in snapshot["records"].items()}
+
+def _synced(site):
+    snapshot = new_snapshot(site.host)
+    full_sync(site, snapshot)
+    return snapshot
+
+class TestFullSync:
+    def test_lists_both_categories(self, site):
+        assert _memberships(_synced(site)) == {
+            1: ("张三", 0, True, False),
+            2: ("李四", 0, True, True),
+            3: ("Alice", 2, True, False),
+            4: ("王五", 0, False, True),
+            5: ("キツネ", 0, True, False),
+            7: ("赵六", 0, True, False),
+        }
+
+    def test_records_cursor(self, site):
+        snapshot = _synced(site)
+        assert snapshot["synced_at"] is not None
+        assert snapshot["last_full_sync"] is not None
+        assert not needs_full_sync(snapshot)
+
+class TestIncrementalSync:
+    def test_matches_full_sync(self, wiki, site):
+        snapshot = _synced(site)
+        wiki.add_page("孙七", categories=["人物"])
+        wiki.add_to_category("赵六", "逝世的人物")
+        wiki.remove_from_category("张三", "人物")
+        wiki.move_page("李四", "李四（画师）")
+        wiki.delete_page("用户:Alice")
+
+        assert incremental_sync(site, snapshot) == 5
+        assert _memberships(snapshot) == _memberships(_synced(site))
+        assert snapshot["records"][2]["page_title"] == "李四（画师）"
+        assert 1 not in snapshot["records"] and 3 not in snapshot["records"]
+
+    def test_move_out_of_eligible_namespace(self, wiki, site):
+        snapshot = _synced(site)
+        wiki.move_page("赵六", "用户:Someone/赵六")
+        incremental_sync(site, snapshot)
+        assert 7 not in snapshot["records"]
+
+    def test_processed_changes_are_skipped(self, wiki, site):
+        snapshot = _synced(site)
+        wiki.add_page("孙七", categories=["人物"])
+        assert incremental_sync(site, snapshot) == 1
+        last_rcid = snapshot["last_rcid"]
+        # 回溯窗口仍然包含上面的更改，但它的rcid不大于last_rcid
+        assert incremental_sync(site, snapshot) == 0
+        assert snapshot["last_rcid"] == last_rcid
+
+    def test_failed_membership_query_keeps_cursor(self, wiki, site, monkeypatch):
+        snapshot = _synced(site)
+        wiki.add_page("孙七", categories=["人物"])
+        cursor = (snapshot["synced_at"], snapshot["last_rcid"])
+
+        def fail(*args, **kwargs):
+            raise ConnectionError("模拟的网络错误")
+
+        # 最近更改已经读到，查询成员身份时失败
+        monkeypatch.setattr(snapshot_module, "_query_memberships", fail)
+        with pytest.raises(ConnectionError):
+            incremental_sync(site, snapshot)
+        assert (snapshot["synced_at"], snapshot["last_rcid"]) == cursor
+
+        monkeypatch.undo()
+        assert incremental_sync(site, snapshot) == 1
+        assert any(record["page_title"] == "孙七" for record in snapshot["records"].values())
+
+    def test_late_change_within_lookback(self, wiki, site):
+        wiki.add_page("钱八")
+        snapshot = _synced(site)
+        # 作业队列迟到写入的分类变更：时间戳早于上次同步的游标
+        late = _shift(snapshot["synced_at"], -RC_LOOKBACK / 2)
+        wiki.add_to_category("钱八", "人物", timestamp=late)
+        assert incremental_sync(site, snapshot) == 1
+        assert _memberships(snapshot) == _memberships(_synced(site))
+
+    def test_change_beyond_lookback_recovered_by_full_sync(self, wiki, site, tmp_path):
+        path = str(tmp_path / "snapshot.json")
+        wiki.add_page("钱八")
+        snapshot = sync_snapshot(site, path)
+        late = _shift(snapshot["synced_at"], -2 * RC_LOOKBACK)
+        wiki.add_to_category("钱八", "人物", timestamp=late)
+
+        snapshot = sync_snapshot(site, path)
+        assert all(record["page_title"] != "钱八" for record in snapshot["records"].values())
+
+        snapshot["last_full_sync"] = _shift(snapshot["last_full_sync"], -(FULL_SYNC_INTERVAL + timedelta(days=1)))
+        save_snapshot(path, snapshot)
+        assert needs_full_sync(load_snapshot(path))
+        snapshot = sync_snapshot(site, path)
+        assert any(record["page_title"] == "钱八" for record in snapshot["records"].values())
+        assert not needs_full_sync(snapshot)
+
+class TestSnapshotFile:
+    def test_round_trip(self, site, tmp_path):
+        path = str(tmp_path / "snapshot.json")
+        snapshot = _synced(site)
+        save_snapshot(path, snapshot)
+        assert load_snapshot(path) == snapshot
+
+    def test_rejects_page_list(self, tmp_path):
+        path = tmp_path / "pages.json"
+        path.write_text('{"format": "page-list", "version": 1, "pages": []}', encoding="utf-8")
+        assert load_snapshot(str(path)) is None
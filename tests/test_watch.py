@@ -0,0 +1,116 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+import threading
+import time
+from typing import Callable
+
+import pytest
+
+import snapshot
+import watch as watch_module
+from watch import watch
+
+INTERVAL = 0.05
+DEBOUNCE = 0.3
+
+class Publisher:
+    """记录每次推送的页面标题与时间；results依次决定各次推送是否成功，用完后总是成功"""
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.calls: list[tuple[float, set[str]]] = []
+
+    def __call__(self, page_list) -> bool:
+        self.calls.append((time.monotonic(), {page.page_title for page in page_list}))
+        return self.results.pop(0) if self.results else True
+
+def _wait_for(predicate: Callable[[], bool], timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.01)
+
+@pytest.fixture
+def run_watch(site, tmp_path):
+    """在后台线程中运行watch，测试结束时停止"""
+    stop = threading.Event()
+    threads: list[threading.Thread] = []
+
+    def start(publish: Publisher) -> str:
+        path = str(tmp_path / "snapshot.json")
+        thread = threading.Thread(target=watch, args=(site, path, publish),
+                                  kwargs={"interval": INTERVAL, "debounce": DEBOUNCE, "stop": stop})
+        thread.start()
+        threads.append(thread)
+        return path
+
+    yield start
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+
+class TestWatch:
+    def test_failed_initial_publish_is_retried(self, run_watch):
+        publish = Publisher(results=[False])
+        run_watch(publish)
+        _wait_for(lambda: len(publish.calls) >= 2)
+        (first, titles), (second, retried) = publish.calls[:2]
+        assert second - first >= DEBOUNCE
+        assert retried == titles
+
+    def test_changes_are_debounced(self, run_watch, wiki):
+        publish = Publisher()
+        run_watch(publish)
+        _wait_for(lambda: len(publish.calls) == 1)
+        wiki.add_page("孙七", categories=["人物"])
+        time.sleep(INTERVAL * 2)
+        wiki.add_page("周八", categories=["人物"])
+        _wait_for(lambda: len(publish.calls) >= 2)
+        # 两次变化合并为一次推送
+        assert {"孙七", "周八"} <= publish.calls[1][1]
+        time.sleep(DEBOUNCE * 2)
+        assert len(publish.calls) == 2
+
+    def test_poll_error_is_retried(self, run_watch, wiki, monkeypatch):
+        failures = []
+        query_memberships = snapshot._query_memberships
+
+        def flaky(*args, **kwargs):
+            if not failures:
+                failures.append(True)
+                raise ConnectionError("模拟的网络错误")
+            return query_memberships(*args, **kwargs)
+
+        monkeypatch.setattr(snapshot, "_query_memberships", flaky)
+        publish = Publisher()
+        run_watch(publish)
+        _wait_for(lambda: len(publish.calls) == 1)
+        wiki.add_page("孙七", categories=["人物"])
+        _wait_for(lambda: len(publish.calls) >= 2)
+        assert failures
+        assert "孙七" in publish.calls[1][1]
+
+    def test_full_sync_saves_once(self, run_watch, wiki, monkeypatch):
+        saves = []
+        monkeypatch.setattr(watch_module, "save_snapshot", lambda path, data: saves.append(path))
+        force = threading.Event()
+
+        def needs_full_sync(data):
+            # 在强制的那一次完整同步之前加入分类，使变化只能由完整同步发现
+            if force.is_set():
+                force.clear()
+                wiki.add_to_category("孙七", "人物")
+                return True
+            return False
+
+        monkeypatch.setattr(watch_module, "needs_full_sync", needs_full_sync)
+        publish = Publisher()
+        wiki.add_page("孙七")
+        run_watch(publish)
+        _wait_for(lambda: len(publish.calls) == 1)
+        force.set()
+        _wait_for(lambda: len(publish.calls) >= 2)
+        assert "孙七" in publish.calls[1][1]
+        assert len(saves) == 1
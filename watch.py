@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2026 Xie Youtian
+"""
+守护模式：保持一个已登录的会话，轮询最近更改，只在人物分类成员变化时重新生成并推送模板。
+
+分类变更的读取与合并复用snapshot.py的增量同步：启动时读取（或完整重建）本地快照，
+之后每隔interval秒调用一次incremental_sync，快照超过FULL_SYNC_INTERVAL未完整同步时改为完整同步一次。检测到变化后不会立即重新生成，
+而是等待debounce秒内不再有新的变化，把一连串编辑（例如批量添加分类）合并为一次推送。
+"""
+import logging
+import threading
+import time
+from typing import Callable, Optional, TYPE_CHECKING
+
+from get import PageInfo
+from snapshot import (FULL_SYNC_INTERVAL, full_sync, incremental_sync, load_snapshot, needs_full_sync,
+                      save_snapshot, snapshot_to_page_list, sync_snapshot)
+
+if TYPE_CHECKING:
+    import mwclient
+
+def watch(site: "mwclient.Site", snapshot_path: str, publish: Callable[[list[PageInfo]], bool],
+          interval: float = 60.0, debounce: float = 30.0, full_resync: bool = False,
+          max_workers: int = 2, stop: Optional[threading.Event] = None) -> int:
+    """
+    持续监视人物分类，成员变化时调用publish。
+
+    启动时先同步快照并调用一次publish，确保页面与当前分类一致。
+
+    Args:
+        site: 已登录的mwclient.Site对象，整个运行期间共用
+        snapshot_path: 快照文件路径（与 --incremental 相同）
+        publish: 接收页面列表、完成转换/生成/推送的回调，返回是否成功
+        interval: 轮询最近更改的间隔（秒）
+        debounce: 最后一次变化后需要保持平静的时间（秒）
+        full_resync: 启动时忽略现有快照并完整同步
+        max_workers: 完整同步时并行获取分类的线程数
+        stop: 设置后退出循环的事件（用于测试或信号处理）
+
+    Returns:
+        int: 正常停止时为0
+    """
+    stop = stop or threading.Event()
+    logging.info(f"【守护】正在同步快照 '{snapshot_path}'...")
+    snapshot = sync_snapshot(site, snapshot_path, full_resync=full_resync, max_workers=max_workers)
+    pending = False
+    last_change = 0.0
+    if not publish(snapshot_to_page_list(snapshot)):
+        # 与之后的推送失败相同地保留待处理状态，等待一个平静期后重试，而不是等到分类再次变化
+        logging.error(f"【守护】首次推送失败，将在 {debounce:g} 秒后重试")
+        pending = True
+        last_change = time.monotonic()
+
+    logging.info(f"【守护】开始监视分类变化（每 {interval:g} 秒轮询，平静 {debounce:g} 秒后推送）")
+    while not stop.is_set():
+        full = needs_full_sync(snapshot)
+        try:
+            if full:
+                logging.info(f"【守护】快照已超过 {FULL_SYNC_INTERVAL.days} 天未完整同步，正在完整同步...")
+                changed = full_sync(site, snapshot, max_workers)
+            else:
+                changed = incremental_sync(site, snapshot)
+        except Exception as e:
+            logging.warning(f"【守护】读取最近更改失败，将在下次轮询时重试: {e}")
+            # 不沿用内存中可能只更新了一部分的快照，从上次保存的快照重新开始
+            snapshot = load_snapshot(snapshot_path) or snapshot
+            full = False
+            changed = 0
+        if changed or full:
+            # 完整同步即使没有发现变化，也更新了游标与完整同步时间
+            save_snapshot(snapshot_path, snapshot)
+            logging.info(f"【守护】{changed} 个页面的分类成员身份发生变化")
+            pending = True
+            last_change = time.monotonic()
+
+        wait = interval
+        if pending:
+            quiet = time.monotonic() - last_change
+            if quiet >= debounce:
+                logging.info("【守护】分类已平静，正在重新生成模板...")
+                if publish(snapshot_to_page_list(snapshot)):
+                    pending = False
+                else:
+                    # 推送失败时保留待处理状态，下次轮询后重试
+                    logging.error("【守护】推送失败，将在下次轮询后重试")
+                    last_change = time.monotonic()
+            else:
+                wait = min(interval, debounce - quiet)
+        stop.wait(wait)
+
+    logging.info("【守护】已停止")
+    return 0